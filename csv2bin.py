@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+
+"""
+Copyright (c) 2013, LAMP development team
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+    * Redistributions of source code must retain the above copyright
+      notice, this list of conditions and the following disclaimer.
+    * Redistributions in binary form must reproduce the above copyright
+      notice, this list of conditions and the following disclaimer in the
+      documentation and/or other materials provided with the distribution.
+    * Neither the name of the LAMP development team nor the
+      names of its contributors may be used to endorse or promote products
+      derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL LAMP DEVELOPMENT TEAM BE LIABLE FOR ANY
+DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+(INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+# Convert the item-file in the CSV format to the binary format.
+# The binary file is read by readFile.readTransactionFile without parsing text,
+# and it can be given to lamp.py and fastwy.py in place of the CSV file.
+
+import sys
+from optparse import OptionParser
+import readFile
+
+def run( item_file, output_file ):
+	sys.stderr.write( "Read the item-file...\n" )
+	transaction_list, gene2id, columnid2name = readFile.readTransactionFile( item_file, ',' )
+	sys.stderr.write( "Write the binary file...\n" )
+	readFile.writeBinaryTransactionFile( transaction_list, columnid2name, output_file )
+	sys.stdout.write( "# of items: %s, # of transactions: %s\n" % ( len(columnid2name), len(transaction_list) ) )
+
+
+if __name__ == "__main__":
+	usage = "usage: %prog item-file output-file"
+	p = OptionParser(usage = usage)
+
+	opts, args = p.parse_args()
+	
+	# check arguments
+	if (len(args) < 2):
+		sys.stderr.write("Error: input item-file and output-file.\n")
+		sys.exit()
+
+	run( args[0], args[1] )
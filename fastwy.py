@@ -37,9 +37,11 @@ SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 # significance-level: The statistical significance threshold.
 # @author Terada 10, March, 2014
 
-import sys, os.path, time, datetime, random, math
+import sys, os.path, time, datetime, random, math, itertools, multiprocessing
 import transaction, readFile, lamp
 import frepattern.frequentPatterns as frequentPatterns
+import frepattern.patternCache as patternCache
+import frepattern.patternStore as patternStore
 from optparse import OptionParser
 
 import functions.functionsSuper as fs
@@ -47,49 +49,62 @@ import functions.functions4fisher as functions4fisher
 import functions.functions4u_test as functions4u_test
 import functions.functions4chi as functions4chi
 
+np = fs.np
+
 set_opts = ("fisher", "u_test", "chi") # methods which used each test
 
 __version__ =  "1.0.1" + " (LAMP ver." + lamp.__version__ + ")"
 
+# The data used by calPermutation. This is set before the worker processes are forked,
+# so the workers share the mined patterns with the main process.
+worker_context = None
+
 
 def version():
 	return __version__
 
 
-def getValuesList( transaction_list ):
-	values_list = []
-	for t in transaction_list:
-		values_list.append( t.value )
-	return values_list
+##
+# Return the random number generator of the index-th permuted dataset.
+# The generator is the index-th jumped stream of PCG64 if numpy.random.Generator is available.
+# Otherwise, RandomState of NumPy (or the random module) is seeded by the pair of seed and index.
+# seed: the seed of the permuted datasets
+# index: the index of the permuted dataset
+##
+def permuteRandom( seed, index ):
+	seed = seed & 0xffffffffffffffff
+	if np == None:
+		return random.Random( ( seed << 32 ) + index )
+	if hasattr( np.random, "Generator" ):
+		return np.random.Generator( np.random.PCG64( seed ).jumped( index ) )
+	return np.random.RandomState( [ seed & 0xffffffff, seed >> 32, index & 0xffffffff ] )
 
 ##
-# Generate the permuted values dataset.
-# transaction_list: the original transaction list.
-# org_values_list: the values list contained the transaction_list
+# Generate the permuted dataset.
+# The values of the transactions are not moved, and the transaction IDs are shuffled instead,
+# that is, the i-th transaction in the original dataset has the value of the org2shuffled_list[i]-th
+# transaction in the permuted dataset.
+# size: the number of transactions
+# rand: the random number generator made by permuteRandom
+# Return org2shuffled_list.
 ##
-def permuteData( transaction_list, org_values_list ):
-	random_index_list = range( 0, len(org_values_list) )
-	random.shuffle( random_index_list )
-	permute_transaction_list = []; org2shuffled_list = [-1]*len( transaction_list )
-	for i in xrange( 0, len( random_index_list ) ):
-		random_index = random_index_list[ i ]
-		t = transaction_list[ random_index ]
-		new_t = t.copy()
-		new_t.setValue( org_values_list[ i ] )
-		permute_transaction_list.append( new_t )
-		org2shuffled_list[ t.getID() ] = i
-	return permute_transaction_list, org2shuffled_list
+def permuteIndex( size, rand ):
+	if hasattr( rand, "permutation" ):
+		return rand.permutation( size ).tolist()
+	org2shuffled_list = list( range( 0, size ) )
+	rand.shuffle( org2shuffled_list )
+	return org2shuffled_list
 
 ##
-# Calculate the minimum p-value in the permute_transaction_list
-# transaction_list: the permuted transaction list
+# Calculate the minimum p-value in the permuted dataset
+# transaction_list: the transaction list. The values are moved by org2shuffled_list.
 # trans4lcm: the filename to run LCM
 # fre_pattern: the instance to obtain the frequent pattern from the min_sup
 # func_f: the instance to calculate MASL and the p-value
 # max_comb: the limit to maximum combination size
 # org2shuffled_list: the mapping from transaction ID from the row dataset to shuffled dataset
 ##
-def calculateMinimumPValue( permute_transaction_list, trans4lcm, fre_pattern, func_f, \
+def calculateMinimumPValue( transaction_list, trans4lcm, fre_pattern, func_f, \
 							max_comb, org2shuffled_list ):
 	min_p = 1.0; min_p_pattern = None # the minimum p-value of the permuted set
 	flag = True; low_sup = fre_pattern.max_support; i = 0
@@ -104,21 +119,23 @@ def calculateMinimumPValue( permute_transaction_list, trans4lcm, fre_pattern, fu
 		cal_list = fre_pattern.getFrequentList( low_sup ) # Itemset calculated its P-value
 		endtime = time.time()
 		freq_time += endtime - starttime # time to construct apriori
-		for cal_item_set, cal_transaction_list in cal_list:
+		# In the compact mode, the transactions are read from the flat array of PatternStore
+		# by the offsets, without slicing the array for each pattern.
+		occ_ptr = None
+		if isinstance( cal_list, patternStore.PatternStore ):
+			item_ptr, items, occ_ptr, occs = cal_list.csr()
+		for j in xrange( 0, len( cal_list ) ):
 			i = i + 1
-#			sys.stderr.write("--- testing %s [ " % i)
-#			for j in cal_item_set:
-#				sys.stderr.write("%s " % j)
-#			sys.stderr.write("]: ")
-			flag_transaction_list = [] # transaction list which has all items in itemset.
-			for t in cal_transaction_list:
-				shuffled_id = org2shuffled_list[ t ]
-				flag_transaction_list.append( shuffled_id )
+			# transaction list which has all items in itemset.
+			if occ_ptr != None:
+				flag_transaction_list = [ org2shuffled_list[ occs[k] ] for k in xrange( occ_ptr[j], occ_ptr[j+1] ) ]
+			else:
+				flag_transaction_list = [ org2shuffled_list[ t ] for t in cal_list[j][1] ]
 #			sys.stderr.write("%s" % flag_transaction_list)
-			p, stat_score = func_f.calPValue( permute_transaction_list, flag_transaction_list )
+			p, stat_score = func_f.calPValue( transaction_list, flag_transaction_list )
 #			sys.stderr.write("p " + str(p) + ", stat_score %s\n" % stat_score)
 			if p < min_p:
-				min_p = p; min_p_pattern = cal_item_set
+				min_p = p; min_p_pattern = cal_list[j][0]
 		
 #		sys.stderr.write( "min_p: %s, low_bound: %s, min_sup: %s\n" % (min_p, bound, low_sup) )
 		# If the minimum p-value is less than the lower bound of P-value, finish the calculation.
@@ -129,6 +146,52 @@ def calculateMinimumPValue( permute_transaction_list, trans4lcm, fre_pattern, fu
 			low_sup = low_sup - 1
 	return min_p, low_sup, freq_time
 
+##
+# Calculate the minimum p-values of the several permuted datasets at once.
+# The permuted datasets are given as the matrix whose rows are the statistic vectors (statVector)
+# in the order of the original transaction IDs. The statistics of each pattern for all permuted
+# datasets are computed by summing the columns of its transactions, that is, the product of
+# the matrix and the pattern-transaction matrix.
+# Each permuted dataset stops at the minimum support where its minimum p-value is less than
+# the lower bound of P-value, as calculateMinimumPValue.
+# stat_matrix: the matrix of the statistic vectors (# of permuted datasets x # of transactions)
+# trans4lcm: the filename to run LCM
+# fre_pattern: the instance to obtain the frequent pattern from the min_sup
+# func_f: the instance to calculate MASL and the p-value
+# max_comb: the limit to maximum combination size
+# Return the arrays of the minimum p-values, the minimum supports and the numbers of tested patterns,
+# and the time to construct the frequent patterns.
+##
+def calculateMinimumPValues( stat_matrix, trans4lcm, fre_pattern, func_f, max_comb ):
+	permute_num = stat_matrix.shape[0]
+	min_p = np.ones( permute_num ) # the minimum p-value of each permuted set
+	low_sups = np.zeros( permute_num, dtype = int ); test_nums = np.zeros( permute_num, dtype = int )
+	active = np.arange( permute_num ) # the permuted sets whose minimum p-values are not fixed
+	low_sup = fre_pattern.max_support; freq_time = 0
+	while len( active ) > 0:
+		starttime = time.time() # time to construct apriori
+		fre_pattern.frequentPatterns( trans4lcm, low_sup, max_comb ) # construct frequent patterns
+		bound = fre_pattern.getBound( low_sup )
+		if bound > 1:
+			bound = func_f.funcF( low_sup ) # minimum support value
+			fre_pattern.setBound( low_sup, bound )
+		indptr, indices = func_f.batch2CSR( fre_pattern.getTransactionBatch( low_sup ) )
+		freq_time += time.time() - starttime # time to construct apriori
+		pattern_num = len( indptr ) - 1
+		if pattern_num > 0:
+			stats = func_f.sumByPattern( stat_matrix[ active ], indptr, indices )
+			p_values, stat_scores = func_f.calPValuesFromStats( np.tile( np.diff( indptr ), len( active ) ), stats.ravel() )
+			p_values = np.asarray( p_values ).reshape( len( active ), pattern_num )
+			min_p[ active ] = np.minimum( min_p[ active ], p_values.min( axis = 1 ) )
+			test_nums[ active ] += pattern_num
+		low_sups[ active ] = low_sup
+		if low_sup <= 1:
+			break
+		# The permuted sets whose minimum p-value is over than MASL repeat the calculation with the smaller support.
+		active = active[ min_p[ active ] >= bound ]
+		low_sup = low_sup - 1
+	return min_p, low_sups, test_nums, freq_time
+
 ##
 # Generate a probability distribution of the minimum P-value using permuted datasets 
 # transaction_list: List of itemset and expression value.
@@ -139,9 +202,22 @@ def calculateMinimumPValue( permute_transaction_list, trans4lcm, fre_pattern, fu
 # max_comb: the limit to maximum combination size
 # permute_num: the number of permuted dataset used in FastWY
 # outlog: file object to output logs
+# miner: the program to enumerate the frequent patterns (lcm/python).
+# compact: If True, the frequent patterns are stored in the flat arrays.
+# precompute: If True, the P-values of Fisher's exact test are computed for all tables in advance.
+# exact: If True, the exact P-values of U-test are computed for the small groups.
+# prefetch: If True, the combinations are enumerated once at the lower bound of lambda in breadthFirst.
+# lambda_search: the search of the optimal lambda for U-test (linear/bisect/depth).
+# jobs: the number of processes to compute the permuted datasets.
+# seed: the seed of random numbers. If None, the seed is drawn from the random module.
+# batch: the number of permuted datasets computed at once in the matrix form (calculateMinimumPValues).
+# cache: instance of PatternCache to reuse the frequent patterns. If None, the patterns are not cached.
+# transport: the transport of the input and the output of LCM (file/pipe).
 ##
 def generateMinPDist(transaction_list, trans4lcm, threshold, set_method, lcm_path, \
-					 max_comb, permute_num, outlog, alternative):
+					 max_comb, permute_num, outlog, alternative, miner = "lcm", compact = False, \
+					 precompute = False, jobs = 1, seed = None, batch = 1, exact = False, prefetch = False, \
+					 lambda_search = "linear", cache = None, transport = "file"):
 #	sys.stderr.write("--- original dataset ---\n")
 #	for j in transaction_list:
 #		j.output()
@@ -152,34 +228,99 @@ def generateMinPDist(transaction_list, trans4lcm, threshold, set_method, lcm_pat
 	# Initialize the apriori and functinos using LAMP. 
 	fre_pattern, lam_star, max_lambda, correction_term_time, func_f \
 				 = lamp.runMultTest( transaction_list, trans4lcm, threshold, set_method, \
-									 lcm_path, max_comb, outlog, alternative )
+									 lcm_path, max_comb, outlog, alternative, miner, \
+									 compact = compact, precompute = precompute, exact = exact, \
+									 prefetch = prefetch, lambda_search = lambda_search, cache = cache, \
+									 transport = transport )
 	
 	# calculate the set of minimum p-values using permuted data
 	min_p_list = [] # the list stores the minimum p-values
-	org_values_list = getValuesList( transaction_list ) # Raw (non-permuted) dataset
+	
+	worker_start = time.time()
+	# Each permuted dataset is generated by its own random numbers (permuteRandom),
+	# so the results do not depend on the number of processes.
+	if seed == None:
+		seed = random.getrandbits( 64 )
+	permute_ids = range( 0, permute_num )
+	global worker_context
+	worker_context = tuple( [ transaction_list, trans4lcm, fre_pattern, func_f, max_comb, seed ] )
+	pool = None; map_func = itertools.imap
+	if jobs > 1:
+		pool = multiprocessing.Pool( jobs, initializer = initWorker )
+		map_func = pool.imap
+	if batch > 1:
+		id_batches = [ permute_ids[i:i+batch] for i in xrange( 0, permute_num, batch ) ]
+		min_p_iter = itertools.chain.from_iterable( map_func( calPermutationBatch, id_batches ) )
+	else:
+		min_p_iter = map_func( calPermutation, permute_ids )
 	
 	# estimate the probability distribution of the minimum p-value using permuted datasets.
 	for i in xrange( 0, permute_num ):
-		per_start = time.time()
-		permute_transaction_list, org2shuffled_list = permuteData( transaction_list, org_values_list ) # generate the permuted dataset.
-#		for j in permute_transaction_list:
-#			sys.stderr.write("%s %s " % (j.id, j.name))
-#			sys.stderr.write("%s" % j.itemset)
-#			sys.stderr.write(" %s\n" % j.value)
-		func_f.calTime = 0
-		min_p, low_sup, freq_time = calculateMinimumPValue( permute_transaction_list, trans4lcm, fre_pattern,
-															func_f, max_comb, org2shuffled_list )
-		per_time = time.time() - per_start
+		min_p, low_sup, total, freq_time, per_time, cal_time = min_p_iter.next()
 		if ( i == 0 ):
-			per_time = time.time() - starttime
-		min_p_list.append( tuple( [ min_p, low_sup, fre_pattern.getTotal( low_sup ), freq_time, per_time, func_f.calTime ] ) )
+			per_time = per_time + worker_start - starttime
+		min_p_list.append( tuple( [ min_p, low_sup, total, freq_time, per_time, cal_time ] ) )
 		
 		outlog.write( "[permute %s] minP %s, minSupport %s, totalTest %s, freqTime %s, totalTime %s, #ofPvalue %s\n" \
 						  % (i, min_p_list[i][0], min_p_list[i][1], min_p_list[i][2], \
 							 min_p_list[i][3], min_p_list[i][4], min_p_list[i][5]))
+	if pool != None:
+		pool.close()
+		pool.join()
+	worker_context = None
 		
 	return min_p_list, fre_pattern, func_f
 
+##
+# Initialize the worker process.
+# The LCM output files of each process are separated.
+##
+def initWorker():
+	fre_pattern = worker_context[2]
+	fre_pattern.out_suffix = ".process" + str( os.getpid() )
+
+##
+# Calculate the minimum P-value of the permute_id-th permuted dataset.
+# This function is called in the worker processes when jobs > 1.
+# Return the tuple of (minimum P-value, minimum support, # of tested combinations,
+# time to construct frequent patterns, total time, # of computed P-values).
+##
+def calPermutation( permute_id ):
+	transaction_list, trans4lcm, fre_pattern, func_f, max_comb, seed = worker_context
+	per_start = time.time()
+	org2shuffled_list = permuteIndex( len( transaction_list ), \
+									  permuteRandom( seed, permute_id ) ) # generate the permuted dataset.
+	func_f.calTime = 0
+	min_p, low_sup, freq_time = calculateMinimumPValue( transaction_list, trans4lcm, fre_pattern,
+														func_f, max_comb, org2shuffled_list )
+	per_time = time.time() - per_start
+	return tuple( [ min_p, low_sup, fre_pattern.getTotal( low_sup ), freq_time, per_time, func_f.calTime ] )
+
+##
+# Calculate the minimum P-values of the permuted datasets at once.
+# The permuted datasets are identical to those of calPermutation.
+# Return the list of the tuples as calPermutation. The times are divided equally among the permuted datasets,
+# and the number of computed P-values is the number of the tested patterns.
+##
+def calPermutationBatch( permute_ids ):
+	transaction_list, trans4lcm, fre_pattern, func_f, max_comb, seed = worker_context
+	per_start = time.time()
+	stat_vector = func_f.statVector( transaction_list )
+	stat_matrix = np.empty( ( len( permute_ids ), len( transaction_list ) ) )
+	for i in xrange( 0, len( permute_ids ) ):
+		org2shuffled_list = permuteIndex( len( transaction_list ), permuteRandom( seed, permute_ids[i] ) )
+		stat_matrix[i] = stat_vector[ org2shuffled_list ]
+	min_p, low_sups, test_nums, freq_time = calculateMinimumPValues( stat_matrix, trans4lcm, fre_pattern, \
+																	 func_f, max_comb )
+	per_time = ( time.time() - per_start ) / len( permute_ids )
+	freq_time = freq_time / len( permute_ids )
+	results = []
+	for i in xrange( 0, len( permute_ids ) ):
+		low_sup = int( low_sups[i] )
+		results.append( tuple( [ float( min_p[i] ), low_sup, fre_pattern.getTotal( low_sup ), freq_time, \
+								 per_time, int( test_nums[i] ) ] ) )
+	return results
+
 ##
 # Calculate the adjusted significance level
 # min_p_list: the list of minimum P-values used by FastWY
@@ -228,16 +369,16 @@ def enumerateSigComb(transaction_list, trans4lcm, fre_pattern, func_f, \
 		cal_list = fre_pattern.getFrequentList( low_sup ) # Itemset calculated its P-value
 		freq_time = freq_time + time.time() - freq_start_time
 		func_f.calTime = 0
-		for item_set, item_transid_list in cal_list:
+		# compute the P-values of all itemsets of low_sup at once
+		p_values, stat_scores = func_f.calPValues( transaction_list, fre_pattern.getTransactionBatch( low_sup ) )
+		p_values = list( p_values ); stat_scores = list( stat_scores )
+		for j in xrange( 0, len( cal_list ) ):
 			i = i + 1
 			outlog.write("--- testing %s: " % i)
-			flag_transaction_list = [] # transaction list which has all items in itemset.
-			for t in item_transid_list:
-				flag_transaction_list.append( t )
-			p, stat_score = func_f.calPValue( transaction_list, flag_transaction_list )
+			p = float( p_values[j] ); stat_score = stat_scores[j]
 			outlog.write( "p " + str(p) + ", stat_score %s\n" % stat_score )
 			if ( p <= adjusted_threshold ):
-				enrich_lst.append([item_set, p, low_sup, stat_score])
+				enrich_lst.append([set( cal_list[j][0] ), p, low_sup, stat_score])
 		# If the minimum p-value is less than MASL, finish the calculation.
 		if (adjusted_threshold < bound) or (low_sup <= 1):
 			flag = False
@@ -360,8 +501,21 @@ def outputMinP( min_p_list ):
 # set_method: The procedure name for calibration p-value (fisher/u_test).
 # max_comb: the maximal size which the largest combination size in tests set.
 # alternative: alternative hypothesis. 1 -> greater, -1 -> less, 0 -> two.sided.
+# miner: the program to enumerate the frequent patterns (lcm/python).
+# compact: If True, the frequent patterns are stored in the flat arrays.
+# precompute: If True, the P-values of Fisher's exact test are computed for all tables in advance.
+# exact: If True, the exact P-values of U-test are computed for the small groups.
+# prefetch: If True, the combinations are enumerated once at the lower bound of lambda in breadthFirst.
+# lambda_search: the search of the optimal lambda for U-test (linear/bisect/depth).
+# jobs: the number of processes to compute the permuted datasets.
+# seed: the seed of random numbers to generate the permuted datasets.
+# batch: the number of permuted datasets computed at once in the matrix form.
+# cache: instance of PatternCache to reuse the frequent patterns. If None, the patterns are not cached.
+# transport: the transport of the input and the output of LCM (file/pipe).
 ##
-def run(transaction_file, flag_file, threshold, k, set_method, lcm_path, max_comb, log_file, alternative):
+def run(transaction_file, flag_file, threshold, k, set_method, lcm_path, max_comb, log_file, alternative, \
+		miner = "lcm", compact = False, precompute = False, jobs = 1, seed = None, batch = 1, \
+		exact = False, prefetch = False, lambda_search = "linear", cache = None, transport = "file"):
 	# read 2 files and get transaction list
 	sys.stderr.write( "Read input files ...\n" )
 	transaction_list = set()
@@ -392,7 +546,8 @@ def run(transaction_file, flag_file, threshold, k, set_method, lcm_path, max_com
 	outlog.write("Calculate the minimum p-value distribution using the permutation test ...\n")
 	min_p_list, fre_pattern, func_f = \
 				generateMinPDist(transaction_list, trans4lcm, threshold, set_method, \
-								 lcm_path, max_comb, k, outlog, alternative)
+								 lcm_path, max_comb, k, outlog, alternative, miner, compact, precompute, \
+								 jobs, seed, batch, exact, prefetch, lambda_search, cache, transport)
 	# adjusted significance level
 	outlog.write("Adjust significance level ...\n")
 	adjusted_threshold, sorted_min_p_list = adjustedThreshold( min_p_list, threshold, k )
@@ -403,6 +558,7 @@ def run(transaction_file, flag_file, threshold, k, set_method, lcm_path, max_com
 	enrich_lst, time_enumerate_freq, time_enumerate_total = \
 				enumerateSigComb( transaction_list, trans4lcm, fre_pattern, func_f, \
 								  max_comb, adjusted_threshold, outlog )
+	fre_pattern.saveCache()
 	
 	finish_test_time = time.time()
 
@@ -437,6 +593,42 @@ if __name__ == "__main__":
 	p.add_option('-e', dest = "log_filename", default = "", help = "The file name to output log.\n")
 
 	p.add_option('--alternative', dest = "alternative", default = "greater", help = "Indicate which alternative hypothesis is used. Select \"greater\", \"less\" or \"two.sided\"\n, and the default is \"greater\".")
+
+	p.add_option('--miner', dest = "miner", default = "lcm", \
+				 help = "Choose the program to enumerate the combinations from \"lcm\" (lcm53 program) or \"python\" (in-process enumeration), and the default is \"lcm\".")
+
+	p.add_option('--compact', dest = "compact", action = "store_true", default = False, \
+				 help = "Store the combinations in the compact arrays to reduce the memory usage.")
+
+	p.add_option('--precompute', dest = "precompute", action = "store_true", default = False, \
+				 help = "Compute the P-values of Fisher's exact test for all tables in advance (NumPy is required).")
+
+	p.add_option('--exact', dest = "exact", action = "store_true", default = False, \
+				 help = "Compute the exact P-values of U-test for the small groups and use the tie-corrected normal approximation for the others (NumPy is required).")
+
+	p.add_option('--prefetch', dest = "prefetch", action = "store_true", default = False, \
+				 help = "Enumerate the combinations once at the lower bound of the minimum support when the minimum support is searched for U-test.")
+
+	p.add_option('--lambda_search', dest = "lambda_search", default = "linear", \
+				 help = "Choose the search of the minimum support for U-test from \"linear\", \"bisect\" (binary search) or \"depth\" (one enumeration by LCM-LAMP, not available with --exact), and the default is \"linear\".")
+
+	p.add_option('--jobs', dest = "jobs", type = "int", default = 1, \
+				 help = "The number of processes to compute the permuted datasets, and the default is 1.")
+
+	p.add_option('--seed', dest = "seed", type = "int", default = None, \
+				 help = "Set the seed of random numbers to generate the permuted datasets.")
+
+	p.add_option('--cache_dir', dest = "cache_dir", default = None, \
+				 help = "Save the enumerated combinations to the directory and reuse them for the same item-file.")
+
+	p.add_option('--cache_size', dest = "cache_size", type = "int", default = 1024, \
+				 help = "The disk budget of the cache in MB, and the default is 1024. The least recently used combinations are removed.")
+
+	p.add_option('--lcm_transport', dest = "lcm_transport", default = "file", \
+				 help = "Choose how the data is passed to LCM from \"file\" (the files next to the item-file) or \"pipe\" (the input on tmpfs and the output over the pipe), and the default is \"file\".")
+
+	p.add_option('--batch', dest = "batch", type = "int", default = 1, \
+				 help = "The number of permuted datasets computed at once in the matrix form (NumPy is required), and the default is 1.")
 	
 	opts, args = p.parse_args()
 	
@@ -495,6 +687,37 @@ if __name__ == "__main__":
 	else:
 		sys.stderr.write( "Error: \"alternative\" should be one of {\"greater\", \"less\", \"two.sided\"}\n" )
 		sys.exit()
+
+	# check the number of processes
+	if opts.jobs < 1:
+		sys.stderr.write( "Error: \"jobs\" should be positive.\n" )
+		sys.exit()
+
+	# check the number of permuted datasets computed at once
+	if opts.batch < 1:
+		sys.stderr.write( "Error: \"batch\" should be positive.\n" )
+		sys.exit()
+	if ( opts.batch > 1 ) and ( np == None ):
+		sys.stderr.write( "Error: NumPy is required to use \"batch\".\n" )
+		sys.exit()
+
+	# check the miner
+	if not opts.miner in lamp.MINERS:
+		sys.stderr.write( "Error: \"miner\" should be one of {\"lcm\", \"python\"}\n" )
+		sys.exit()
+
+	# check the search of lambda
+	if not opts.lambda_search in lamp.LAMBDA_SEARCHES:
+		sys.stderr.write( "Error: \"lambda_search\" should be one of {\"linear\", \"bisect\", \"depth\"}\n" )
+		sys.exit()
+	if ( opts.lambda_search == "depth" ) and opts.exact:
+		sys.stderr.write( "Error: \"lambda_search\" depth is not available with --exact.\n" )
+		sys.exit()
+
+	# check the transport of LCM
+	if not opts.lcm_transport in frequentPatterns.TRANSPORTS:
+		sys.stderr.write( "Error: \"lcm_transport\" should be one of {\"file\", \"pipe\"}\n" )
+		sys.exit()
 		
 	# change log file
 	d = datetime.datetime.today()
@@ -503,8 +726,14 @@ if __name__ == "__main__":
 		log_file = opts.log_filename
 	
 	opts.delimiter = ','
+
+	cache = None
+	if opts.cache_dir != None:
+		cache = patternCache.PatternCache( opts.cache_dir, opts.cache_size * 1024 * 1024 )
 	
 	transaction_file = args[0]; flag_file = args[1]; threshold = float(args[2])
 	enrich_lst, adjusted_threshold, columnid2name \
 				= run(transaction_file, flag_file, threshold, k, opts.pvalue_procedure, \
-					  opts.lcm_path, opts.max_comb, log_file, opts.alternative)
+					  opts.lcm_path, opts.max_comb, log_file, opts.alternative, opts.miner, \
+					  opts.compact, opts.precompute, opts.jobs, opts.seed, opts.batch, \
+					  opts.exact, opts.prefetch, opts.lambda_search, cache, opts.lcm_transport)
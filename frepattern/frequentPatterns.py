@@ -40,9 +40,57 @@ SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 #     From this fix, this program use lcm52.
 # @ editor Terada 10, Jan. 2013
 #     
+# In the stream mode, the output of LCM is read from the pipe, and the patterns are not stored.
+# Only the number of patterns of each support is kept, and the patterns are enumerated
+# again by iterPatterns when they are tested.
+# In the compact mode, the patterns are stored in the flat arrays (PatternStore) instead of
+# the list of sets and lists.
+# If the prefetch support is set, LCM is run once at that support, and the patterns of the larger
+# supports are answered from the nodes without running LCM again.
+# In the stream mode, LCM-LAMP also outputs the number of patterns of each support (histogram),
+# and the nodes are counted from it without running LCM at the optimal minimum support.
+# If the cache is set, the patterns are loaded from PatternCache instead of running LCM,
+# and the patterns enumerated by LCM are saved to the cache by saveCache.
+# In the pipe transport, the input of LCM is written once to tmpfs and the outputs of LCM
+# (including LCM-LAMP) are read from the pipe, so the result files of LCM are not made.
+# The input can not be given over stdin because LCM reads the input file twice.
+# If the labels of the transactions are set by makeLabelFile in the stream mode, LCM outputs
+# the number of positive transactions of each pattern (-LAMP_F option of lcm53) instead of
+# the transaction IDs, and iterBatches yields CountBatch for Fisher's exact test and chi-square test.
+# If the number of jobs is set by setJobs, the enumeration of LCM is divided into the processes
+# (-T option of lcm53), and the results are merged by LCM.
+# If the output format is binary, LCM outputs the itemsets and the transactions as int32 arrays
+# (B option of lcm53), and they are read by lcmBinary without parsing the text.
+# The outputs of LCM-LAMP and LCM with the labels are always text.
 
-import subprocess, os, time, sys
-from . import nodeClass
+import subprocess, os, time, sys, tempfile, atexit
+from . import nodeClass, patternStore, patternCache, lcmBinary
+import functions.functionsSuper as fs
+
+TRANSPORTS = tuple( [ "file", "pipe" ] ) # file -> write the files of LCM, pipe -> use tmpfs and the pipe
+OUTPUT_FORMATS = tuple( [ "text", "binary" ] ) # the output format of LCM for the patterns
+TMPFS_DIR = "/dev/shm" # the directory on memory used for the input of LCM in the pipe transport
+
+##
+# Return the directory to write the input of LCM in the pipe transport.
+# If tmpfs is not available, the temporary directory is used.
+##
+def tmpfsDir():
+	if os.path.isdir( TMPFS_DIR ) and os.access( TMPFS_DIR, os.W_OK ):
+		return TMPFS_DIR
+	return tempfile.gettempdir()
+
+##
+# Remove the file on tmpfs.
+# The file is removed only by the process which made it, not by the forked processes.
+##
+def removeTmpfsFile( path, pid ):
+	if os.getpid() != pid:
+		return
+	try:
+		os.remove( path )
+	except OSError:
+		pass
 
 class LCMError(Exception):
 	def __init__(self, e):
@@ -50,16 +98,44 @@ class LCMError(Exception):
 
 
 class LCM():
-	def __init__(self, lcm_path, max_support, outlog):
+	def __init__(self, lcm_path, max_support, outlog, stream = False, compact = False):
 		self.frequent_list = [] # index: max-support - support, In the list: Instance of Node class
 		self.max_support = max_support # maximum value of the minimum support.
 		self.constructed_index = -1 # frequent_list is constructed that its index is less than the value.
 		self.outlog = outlog
+		self.stream = stream # If True, the patterns are not stored and only counted.
+		self.compact = compact # If True, the patterns are stored in PatternStore.
+		self.input_file = None # the filename for LCM used at the last construction.
+		self.arity_limit = -1 # the arity limit used at the last construction.
+		self.out_suffix = "" # the suffix of the LCM output files to separate the files of each process.
+		self.prefetch_sup = None # the minimum support used at the first construction.
+		self.support_hist = None # key: support, value: #patterns counted by LCM-LAMP in the stream mode.
+		self.support_hist_lb = None # the histogram is complete for the supports of this value or more.
+		self.support_hist_args = None # tuple of (input_file, arity_limit) used to make the histogram.
+		self.support_count = {} # key: support, value: #patterns counted in the stream mode.
+		self.cache = None # instance of PatternCache.
+		self.matrix_hash = None # the hash of the item matrix used as the key of the cache.
+		self.cache_entry = None # tuple of (arity_limit, min_sup, hist, store) loaded from the cache.
+		self.cache_dirty = False # If True, the patterns enumerated by LCM are not saved to the cache.
+		self.transport = "file" # the transport of the input and the output of LCM (file/pipe).
+		self.lcm_input = None # the input file of LCM on tmpfs in the pipe transport.
+		self.tmpfs_files = [] # the files on tmpfs made in the pipe transport.
+		self.tmpfs_pid = None # the process which made the files on tmpfs.
+		self.labels = None # the labels (0/1) of transactions to count the positives by LCM.
+		self.label_file = None # the file of the labels for LCM.
+		self.jobs = 1 # the number of processes to run LCM.
+		self.output_format = "text" # the output format of LCM for the patterns (text/binary).
 	
 		# Initialize the frequent_list.
 		for i in range(0, self.max_support):
-			self.frequent_list.append( nodeClass.Node() )
+			self.frequent_list.append( nodeClass.Node( self.compact ) )
 		
+		self.setLCMPath( lcm_path )
+
+	##
+	# Set the path to the LCM program and check it exists.
+	##
+	def setLCMPath(self, lcm_path):
 		# set LCM code path
 		if lcm_path == None:
 			current_dir = os.getcwd() # curent directory
@@ -93,8 +169,22 @@ class LCM():
 		node = self.frequent_list[ self.getIndex(min_sup) ]
 		node.setBound( bound )
 
+	##
+	# Set the support to run LCM at the first construction.
+	# The patterns whose support is prefetch_sup or more are kept in the nodes,
+	# so frequentPatterns for the supports does not run LCM.
+	##
+	def setPrefetchSupport(self, prefetch_sup):
+		self.prefetch_sup = prefetch_sup
+
 	def getFrequentList(self, support):
 		return self.frequent_list[ self.getIndex(support) ].itemset_list
+
+	##
+	# Return the transactions of the itemsets of the support for FunctionsSuper.calPValues.
+	##
+	def getTransactionBatch(self, support):
+		return self.frequent_list[ self.getIndex(support) ].getTransactionBatch()
 	
 	##
 	# Make file for running LCM. 
@@ -102,14 +192,146 @@ class LCM():
 	# transaction_list: list of transactions
 	##
 	def makeFile4Lem(self, transaction_list, output_file):
-		fw = open(output_file, 'w')
+		fw, path = self.openFile4Lem( output_file, ".4lcm53" )
 		for t in transaction_list:
-			for item in t.itemset:
-				fw.write(str(item) + " ")
-			fw.write('\n')
+			fw.write( "".join( [ str(item) + " " for item in t.itemset ] ) + "\n" )
+		fw.close()
+		if self.transport == "pipe":
+			self.lcm_input = path
+
+	##
+	# Make the file of the labels (0/1) of transactions for LCM.
+	# After that, the numbers of positives are counted by LCM in the stream mode.
+	# labels: the list of the labels. The i-th label is the value of the i-th transaction.
+	##
+	def makeLabelFile(self, labels, output_file):
+		fw, self.label_file = self.openFile4Lem( output_file, ".label" )
+		fw.write( "".join( [ "%d\n" % l for l in labels ] ) )
 		fw.close()
+		self.labels = labels
+
+	##
+	# Open the file for LCM and return a tuple (file object, filename).
+	# In the pipe transport, the file is made on tmpfs instead of output_file.
+	##
+	def openFile4Lem(self, output_file, suffix):
+		if self.transport != "pipe":
+			return open( output_file, 'w' ), output_file
+		fd, path = tempfile.mkstemp( prefix = "lamp_", suffix = suffix, dir = tmpfsDir() )
+		self.tmpfs_pid = os.getpid()
+		self.tmpfs_files.append( path )
+		atexit.register( removeTmpfsFile, path, self.tmpfs_pid )
+		return os.fdopen( fd, 'w' ), path
+
+	##
+	# Remove the files on tmpfs when the instance is released.
+	##
+	def __del__(self):
+		for path in self.tmpfs_files:
+			removeTmpfsFile( path, self.tmpfs_pid )
+
+	##
+	# Set the transport of the input and the output of LCM (file/pipe).
+	# This method has to be called before makeFile4Lem.
+	##
+	def setTransport(self, transport):
+		self.transport = transport
+
+	##
+	# Set the number of processes to run LCM (-T option of lcm53).
+	##
+	def setJobs(self, jobs):
+		self.jobs = jobs
+
+	##
+	# Set the output format of LCM for the patterns (text/binary).
+	##
+	def setOutputFormat(self, output_format):
+		self.output_format = output_format
+
+	##
+	# Return the mode character of LCM to output the patterns in the output format.
+	##
+	def outputMode(self):
+		if self.output_format == "binary":
+			return "B"
+		return "f"
+
+	##
+	# Return the command to run LCM with the mode and the options common to all runs.
+	##
+	def lcmCommand(self, mode):
+		args = [self.__LCMPATH, mode]
+		if self.jobs > 1:
+			args.extend( ["-T", str(self.jobs)] )
+		return args
+
+	##
+	# Return the filename given to LCM instead of input_file.
+	##
+	def lcmInputFile(self, input_file):
+		if self.lcm_input != None:
+			return self.lcm_input
+		return input_file
 	
 	
+	##
+	# Re-initialize the nodes whose support is between low_sup and upper_sup.
+	##
+	def initNodes(self, low_sup, upper_sup):
+		for i in range( low_sup, upper_sup + 1 ):
+			node = nodeClass.Node( self.compact )
+			self.frequent_list[ self.getIndex( i ) ] = node
+			self.support_count.pop( i, None )
+
+	##
+	# Return the node of the support.
+	# The patterns whose support is larger than max_support are gathered to the first node.
+	##
+	def getNode(self, support):
+		node_index = self.getIndex( support )
+		if ( node_index < 0 ):
+			return self.frequent_list[ 0 ]
+		return self.frequent_list[ node_index ]
+
+	##
+	# Add the pattern to the node of its support.
+	# itemset: set of items.
+	# transactions: list of transaction IDs which contain the itemset.
+	##
+	def addPattern(self, itemset, transactions):
+		node = self.getNode( len( transactions ) )
+		node.addItemSet( tuple([itemset, transactions]) )
+
+	##
+	# Count the pattern to the node of its support without storing it.
+	##
+	def countPattern(self, support):
+		self.countPatterns( support, 1 )
+
+	##
+	# Count num patterns of the support.
+	##
+	def countPatterns(self, support, num):
+		self.getNode( support ).countItemSet( num )
+		self.support_count[ support ] = self.support_count.get( support, 0 ) + num
+
+	##
+	# Count the patterns whose support is between low_sup and upper_sup from the histogram.
+	# Return False if the histogram does not cover low_sup.
+	# upper_sup: the maximum support. If None, the support is not limited.
+	##
+	def countHistogram(self, input_file, low_sup, upper_sup, arity_limit):
+		if ( self.support_hist == None ) or ( self.support_hist_args != (input_file, arity_limit) ) \
+			   or ( low_sup < self.support_hist_lb ):
+			return False
+		for support, num in self.support_hist.items():
+			if ( support < low_sup ) or ( ( upper_sup != None ) and ( support > upper_sup ) ):
+				continue
+			self.countPatterns( support, num )
+		self.outlog.write( "count patterns from the histogram of LCM-LAMP: min. support = %s\n" % low_sup )
+		return True
+
 	##
 	# Read LCM result file and return itemset list.
 	# result_lcm_file: the result filename of running LCM
@@ -118,9 +340,11 @@ class LCM():
 	##
 	def readResultLCMFile(self, result_lcm_file, low_sup, upper_sup):
 		# Initialize re-constructed nodes
-		for i in range( low_sup, upper_sup + 1 ):
-			node = nodeClass.Node()
-			self.frequent_list[ self.getIndex( i ) ] = node
+		self.initNodes( low_sup, upper_sup )
+		
+		if self.output_format == "binary":
+			self.readResultLCMBinary( result_lcm_file )
+			return
 		
 		# convert output of lcm_basic to item set list
 		try:
@@ -147,18 +371,26 @@ class LCM():
 					else:
 						for i in range(0, len(transactions)):
 							transactions[i] = int(transactions[i])
-					support = len( transactions )
-					node = None; node_index = self.getIndex( support )
-					if ( node_index < 0 ):
-						node = self.frequent_list[ 0 ]
-					else:
-						node = self.frequent_list[ self.getIndex( support ) ]
-					node.addItemSet( tuple([itemset, transactions]) )
+					self.addPattern( itemset, transactions )
 				itemset_line = f.readline()
 			f.close()
 		except IOError as e:
 			sys.stderr.write("%s" % e)
 			sys.exit()
+
+	##
+	# Read the result file of LCM in the binary format and store the non-empty itemsets.
+	##
+	def readResultLCMBinary(self, result_lcm_file):
+		try:
+			f = open(result_lcm_file, 'rb')
+			for items, support, transactions in lcmBinary.iterRecords( f ):
+				if len( items ) > 0:
+					self.addPattern( set( items ), transactions )
+			f.close()
+		except IOError as e:
+			sys.stderr.write("%s" % e)
+			sys.exit()
 	
 		
 	##
@@ -168,8 +400,144 @@ class LCM():
 	# arity_limit: The limit to apriori depth.
 	##
 	def frequentPatterns(self, input_file, low_sup, arity_limit):
+		self.frequentPatternsUpTo( input_file, low_sup, arity_limit, None )
+
+	##
+	# Construct frequent patterns list as frequentPatterns, but stop the construction
+	# when the number of the patterns whose support is low_sup or more reaches limit.
+	# Return the number of the patterns whose support is low_sup or more, or limit if stopped.
+	# If stopped, the nodes are not changed. The prefetch support is used only without limit.
+	# limit: the number of the patterns, or None if not limited.
+	##
+	def frequentPatternsUpTo(self, input_file, low_sup, arity_limit, limit):
 		# If frequent pattern has already serched, then return.
 		if self.getIndex( low_sup ) <= self.constructed_index:
+			return self.getTotal( low_sup )
+		
+		min_sup = low_sup
+		upper_sup = self.max_support - self.constructed_index - 1
+		if ( limit == None ) and ( self.prefetch_sup != None ) and ( self.constructed_index == -1 ):
+			low_sup = max( min( low_sup, self.prefetch_sup ), 1 )
+		self.input_file = input_file; self.arity_limit = arity_limit
+		total = 0
+		if (self.constructed_index > -1):
+			total = self.frequent_list[ self.constructed_index ].total
+		if ( limit != None ) and ( total >= limit ):
+			return limit
+		if not self.loadCache( low_sup, upper_sup, arity_limit ):
+			if limit == None:
+				self.minePatterns( input_file, low_sup, upper_sup, arity_limit )
+			elif not self.minePatternsUpTo( input_file, low_sup, upper_sup, arity_limit, limit - total ):
+				return limit
+			self.cache_dirty = True
+
+		# Update the total number of transactions
+		for i in range( upper_sup, low_sup - 1, -1 ):
+			node = self.frequent_list[ self.getIndex( i ) ]
+			total = total + node.pattern_num
+			node.total = total
+		
+		self.constructed_index = self.getIndex( low_sup )
+		return self.getTotal( min_sup )
+	
+	##
+	# Set the cache of the patterns.
+	# cache: instance of PatternCache.
+	# transaction_list: list of transactions to compute the key of the cache.
+	##
+	def setCache(self, cache, transaction_list):
+		self.cache = cache
+		self.matrix_hash = patternCache.matrixHash( transaction_list )
+		self.cache_entry = None
+
+	##
+	# Store the patterns whose support is between low_sup and upper_sup from the cache.
+	# In the stream mode, the patterns are only counted from the histogram.
+	# Return False if the cache is not set or has no entry for low_sup.
+	##
+	def loadCache(self, low_sup, upper_sup, arity_limit):
+		if self.cache == None:
+			return False
+		entry = self.cache_entry
+		if ( entry == None ) or ( entry[0] != arity_limit ) or ( entry[1] > low_sup ) \
+			   or ( ( not self.stream ) and ( entry[3] == None ) ):
+			loaded = self.cache.load( self.matrix_hash, arity_limit, low_sup, not self.stream )
+			if loaded == None:
+				return False
+			entry = tuple( [ arity_limit ] + list( loaded ) )
+			self.cache_entry = entry
+		min_sup, hist, store = entry[1:]
+		self.initNodes( low_sup, upper_sup )
+		if self.constructed_index == -1:
+			upper_sup = None
+		if self.stream:
+			for support, num in hist.items():
+				if ( support >= low_sup ) and ( ( upper_sup == None ) or ( support <= upper_sup ) ):
+					self.countPatterns( support, num )
+		else:
+			for i in xrange( 0, len( store ) ):
+				support = store.getSupport( i )
+				if ( support >= low_sup ) and ( ( upper_sup == None ) or ( support <= upper_sup ) ):
+					self.addPattern( set( store.getItemSet( i ) ), store.getTransactionSet( i ).tolist() )
+		self.outlog.write( "load the patterns from the cache: min. support = %s\n" % low_sup )
+		return True
+
+	##
+	# Save the constructed patterns to the cache if they are enumerated by LCM.
+	# All patterns whose support is the constructed minimum support or more are saved,
+	# and only the histogram of the supports is saved in the stream mode.
+	##
+	def saveCache(self):
+		if ( self.cache == None ) or ( not self.cache_dirty ) or ( self.constructed_index == -1 ):
+			return
+		min_sup = self.max_support - self.constructed_index
+		store = None; hist = {}
+		if self.stream:
+			for support, num in self.support_count.items():
+				if support >= min_sup:
+					hist[ support ] = num
+		else:
+			store = patternStore.PatternStore()
+			for support in range( self.max_support, min_sup - 1, -1 ):
+				item_list = self.getFrequentList( support )
+				# the arrays of PatternStore are concatenated without slicing them for each pattern
+				if isinstance( item_list, patternStore.PatternStore ):
+					store.extend( item_list )
+					for i in xrange( 0, len( item_list ) ):
+						hist[ item_list.getSupport( i ) ] = hist.get( item_list.getSupport( i ), 0 ) + 1
+					continue
+				for itemset, transactions in item_list:
+					store.append( tuple( [ sorted( itemset ), transactions ] ) )
+					hist[ len( transactions ) ] = hist.get( len( transactions ), 0 ) + 1
+		self.cache.store( self.matrix_hash, self.arity_limit, min_sup, hist, store )
+		self.cache_dirty = False
+
+	##
+	# Run LCM and store the patterns whose support is between low_sup and upper_sup to the nodes.
+	# In the stream mode, the patterns are only counted.
+	# input_file: filename for LCM.
+	# low_sup: the minimum support.
+	# upper_sup: the maximum support. This is used only when the frequent_list is partially constructed.
+	# arity_limit: limit for appriori depth.
+	##
+	def minePatterns(self, input_file, low_sup, upper_sup, arity_limit):
+		if self.stream:
+			self.initNodes( low_sup, upper_sup )
+			if self.constructed_index == -1:
+				upper_sup = None
+			if self.countHistogram( input_file, low_sup, upper_sup, arity_limit ):
+				return
+			for itemset, support, transactions in self.__runLCM( input_file, low_sup, upper_sup, \
+																 arity_limit, False ):
+				self.countPattern( support )
+			return
+		if self.transport == "pipe":
+			self.initNodes( low_sup, upper_sup )
+			if self.constructed_index == -1:
+				upper_sup = None
+			for itemset, support, transactions in self.__runLCM( input_file, low_sup, upper_sup, \
+																 arity_limit, True ):
+				self.addPattern( itemset, transactions )
 			return
 		
 		out_dir = input_file + ".results." + self.__LCMNAME
@@ -177,30 +545,30 @@ class LCM():
 			os.mkdir(out_dir)
 		out_file_s = input_file.split("/")
 		out_file_name = out_file_s[len(out_file_s)-1]
-		out_file_pre = out_dir + "/" + out_file_name
+		out_file_pre = out_dir + "/" + out_file_name + self.out_suffix
+		out_mode = "I" + self.outputMode()
 
-		upper_sup = self.max_support - self.constructed_index - 1
 		# Run LCM
 		try:
 			# If the arity size is not limited, run LCM to get closed frequent pattern.
 			if ( arity_limit < 0 and self.constructed_index > -1 ):
 				out_file = out_file_pre + ".lowsup" + str( low_sup ) + ".upsup" + str( upper_sup ) + ".closed"
-				subprocess.check_call([self.__LCMPATH, "CIf", "-U", str(upper_sup), \
+				subprocess.check_call(self.lcmCommand( "C" + out_mode ) + ["-U", str(upper_sup), \
 									   input_file, str(low_sup), out_file], \
 									  stdout=self.outlog, stderr = self.outlog)
 			elif ( arity_limit < 0 and self.constructed_index == -1 ):
 				out_file = out_file_pre + ".lowsup" + str( low_sup ) + ".closed"
-				subprocess.check_call([self.__LCMPATH, "CIf", input_file, str(low_sup), out_file], \
+				subprocess.check_call(self.lcmCommand( "C" + out_mode ) + [input_file, str(low_sup), out_file], \
 									  stdout=self.outlog, stderr = self.outlog)
 			elif ( arity_limit >= 0 and self.constructed_index > -1):
 				out_file = out_file_pre + ".lowsup" + str( low_sup ) + ".upsup" + str( upper_sup ) \
 						   + ".aritylim" + str( arity_limit )
-				subprocess.check_call([self.__LCMPATH, "FIf", "-U", str(upper_sup), "-u", \
+				subprocess.check_call(self.lcmCommand( "F" + out_mode ) + ["-U", str(upper_sup), "-u", \
 									   str( arity_limit ), input_file, str(low_sup), out_file], \
 									  stdout=self.outlog, stderr = self.outlog)
 			else:
 				out_file = out_file_pre + ".lowsup" + str( low_sup ) +".aritylim" + str( arity_limit )
-				subprocess.check_call([self.__LCMPATH, "FIf", "-u", str( arity_limit ), \
+				subprocess.check_call(self.lcmCommand( "F" + out_mode ) + ["-u", str( arity_limit ), \
 									   input_file, str(low_sup), out_file], \
 									  stdout=self.outlog, stderr = self.outlog)
 		except subprocess.CalledProcessError as p:
@@ -209,17 +577,219 @@ class LCM():
 		# Read the file of LCM result
 		self.readResultLCMFile( out_file, low_sup, upper_sup )
 
-		# Update the total number of transactions
-		total = 0
-		if (low_sup < self.max_support) and (self.constructed_index > -1):
-			total = self.frequent_list[ self.getIndex( low_sup ) - 1 ].total
-		for i in range( upper_sup, low_sup - 1, -1 ):
-			node = self.frequent_list[ self.getIndex( i ) ]
-			total = total + len( node.itemset_list )
-			node.total = total
-		
-		self.constructed_index = self.getIndex( low_sup )
-	
+	##
+	# Store the patterns whose support is between low_sup and upper_sup as minePatterns,
+	# but stop LCM when limit patterns are found. The patterns are read from the pipe.
+	# Return False if stopped, and then the nodes between low_sup and upper_sup are initialized again.
+	##
+	def minePatternsUpTo(self, input_file, low_sup, upper_sup, arity_limit, limit):
+		self.initNodes( low_sup, upper_sup )
+		lcm_upper = upper_sup
+		if self.constructed_index == -1:
+			lcm_upper = None
+		if self.stream and self.countHistogram( input_file, low_sup, lcm_upper, arity_limit ):
+			return True
+		count = 0
+		patterns = self.__runLCM( input_file, low_sup, lcm_upper, arity_limit, not self.stream )
+		for itemset, support, transactions in patterns:
+			if self.stream:
+				self.countPattern( support )
+			else:
+				self.addPattern( itemset, transactions )
+			count = count + 1
+			if count >= limit:
+				patterns.close()
+				self.initNodes( low_sup, upper_sup )
+				return False
+		return True
+
+	##
+	# Run LCM and read the output from the pipe.
+	# This generator yields a tuple (itemset, support, transactions) for each non-empty itemset.
+	# upper_sup: the maximum support. If None, the support is not limited.
+	# occurrence: If False, the transactions are not output by LCM and None is yielded instead.
+	##
+	def __runLCM(self, input_file, low_sup, upper_sup, arity_limit, occurrence):
+		mode = "C"
+		if ( arity_limit >= 0 ):
+			mode = "F"
+		if occurrence:
+			mode = mode + "I"
+		args = self.lcmCommand( mode + self.outputMode() )
+		if ( upper_sup != None ):
+			args.extend( ["-U", str(upper_sup)] )
+		if ( arity_limit >= 0 ):
+			args.extend( ["-u", str(arity_limit)] )
+		args.extend( [self.lcmInputFile( input_file ), str(low_sup), "-"] )
+		# the pipe is buffered, because readline reads the unbuffered pipe by one byte
+		p = subprocess.Popen( args, bufsize=-1, stdout=subprocess.PIPE, stderr=self.outlog )
+		try:
+			for pattern in self.__readLCM( p.stdout, occurrence ):
+				yield pattern
+		except GeneratorExit:
+			# the caller stopped reading the patterns, so LCM is stopped
+			p.stdout.close(); p.kill(); p.wait()
+			raise
+		self.__waitLCM( p, args )
+
+	##
+	# Read the patterns output by LCM.
+	# This generator yields a tuple (itemset, support, transactions) for each non-empty itemset.
+	# fr: the file object of the output of LCM.
+	##
+	def __readLCM(self, fr, occurrence):
+		if self.output_format == "binary":
+			for items, support, transactions in lcmBinary.iterRecords( fr ):
+				if len( items ) > 0:
+					if not occurrence:
+						transactions = None
+					yield set( items ), support, transactions
+			return
+		readline = fr.readline
+		itemset_line = readline()
+		while itemset_line:
+			# The numbers of patterns are output at the end. These lines are ignored.
+			if not itemset_line.rstrip().endswith(")"):
+				itemset_line = readline()
+				continue
+			s = itemset_line.split(' ')
+			support = int( s[-1].strip()[1:-1] )
+			transactions = None
+			if occurrence:
+				transactions_line = readline()[1:-1]
+				transactions = []
+				if transactions_line != "":
+					transactions = [ int(t) for t in transactions_line.split(' ') ]
+			# if line startswith space, the itemset is empty and ignored
+			if not itemset_line.startswith(" "):
+				itemset = set()
+				for i in range(0, len(s)-1):
+					itemset.add(int(s[i]))
+				yield itemset, support, transactions
+			itemset_line = readline()
+
+	##
+	# Close the pipe and wait for LCM to finish.
+	##
+	def __waitLCM(self, p, args):
+		p.stdout.close()
+		returncode = p.wait()
+		if returncode != 0:
+			sys.stderr.write('subprocess.CalledProcessError: cmd:%s returncode:%s\n' % (args, returncode) )
+			sys.exit()
+
+	##
+	# Enumerate the patterns whose support is low_sup or more.
+	# Each pattern is yielded as a tuple (itemset, transactions) in the same format as getFrequentList.
+	# If the patterns are stored, they are yielded in descending order of the support.
+	# Otherwise, LCM is run again and the patterns are yielded as they are output.
+	##
+	def iterPatterns(self, low_sup):
+		if not self.stream:
+			for support in range( self.max_support, low_sup - 1, -1 ):
+				for item_tuple in self.getFrequentList( support ):
+					yield item_tuple
+			return
+		for item_tuple in self.streamPatterns( low_sup ):
+			yield item_tuple
+
+	##
+	# Enumerate the patterns whose support is low_sup or more by the batch.
+	# This generator yields a tuple (item_trans_list, batch), where item_trans_list is
+	# the list of (itemset, transactions) and batch is the input of FunctionsSuper.calPValues.
+	# If the patterns are stored, the batch is the patterns of each support.
+	# Otherwise, the batch is the batch_size patterns output by LCM.
+	# If the labels are set in the stream mode, the batch is CountBatch and
+	# item_trans_list is the list of (itemset, support).
+	# skip: the function of a support, which returns True if the patterns of the support are not needed.
+	#       The patterns of the first node are not skipped because their supports are not unique.
+	#       skip is called once for each support before the patterns are enumerated.
+	##
+	def iterBatches(self, low_sup, batch_size = 10000, skip = None):
+		skipped = set() # the supports whose patterns are skipped
+		if skip != None:
+			skipped = set( [ support for support in range( low_sup, self.max_support ) if skip( support ) ] )
+		if not self.stream:
+			for support in range( self.max_support, low_sup - 1, -1 ):
+				if support in skipped:
+					continue
+				yield self.getFrequentList( support ), self.getTransactionBatch( support )
+			return
+		if self.labels != None:
+			item_list = []; sizes = []; positives = []
+			for itemset, support, pos_size in self.streamCounts( low_sup ):
+				if support in skipped:
+					continue
+				item_list.append( tuple( [ itemset, support ] ) )
+				sizes.append( support ); positives.append( pos_size )
+				if len( item_list ) >= batch_size:
+					yield item_list, fs.CountBatch( sizes, positives )
+					item_list = []; sizes = []; positives = []
+			if len( item_list ) > 0:
+				yield item_list, fs.CountBatch( sizes, positives )
+			return
+		item_trans_list = []
+		for item_tuple in self.streamPatterns( low_sup ):
+			if len( item_tuple[1] ) in skipped:
+				continue
+			item_trans_list.append( item_tuple )
+			if len( item_trans_list ) >= batch_size:
+				yield item_trans_list, [ t[1] for t in item_trans_list ]
+				item_trans_list = []
+		if len( item_trans_list ) > 0:
+			yield item_trans_list, [ t[1] for t in item_trans_list ]
+
+	##
+	# Enumerate the patterns by running LCM in the stream mode.
+	##
+	def streamPatterns(self, low_sup):
+		for itemset, support, transactions in self.__runLCM( self.input_file, low_sup, None, \
+															 self.arity_limit, True ):
+			yield itemset, transactions
+
+	##
+	# Enumerate the patterns by running LCM with the labels.
+	# This generator yields a tuple (itemset, support, the number of positives) for each non-empty itemset.
+	##
+	def streamCounts(self, low_sup):
+		for itemset, support, values in self.__runLCMLabels( low_sup, [] ):
+			yield itemset, support, int( values[0] )
+
+	##
+	# Enumerate and test the patterns in LCM, and yield only the patterns whose P-value is less than cutoff.
+	# This generator yields a tuple (itemset, support, the number of positives, P-value).
+	# p_mode: the integer that indicates the kind of statistical test.
+	#         1 -> Fisher's exact test,  2 -> chi-square test
+	# alternative: alternative hypothesis, 1 -> greater, 0 -> two-sided.
+	##
+	def streamSignificant(self, low_sup, cutoff, p_mode, alternative):
+		options = ["-LAMP_T", repr( float( cutoff ) ), "-LAMP_P", str( p_mode ), "-LAMP_A", str( alternative )]
+		for itemset, support, values in self.__runLCMLabels( low_sup, options ):
+			yield itemset, support, int( values[0] ), float( values[1] )
+
+	##
+	# Run LCM with the labels of transactions (-LAMP_F).
+	# This generator yields a tuple (itemset, support, the list of values following to the support)
+	# for each non-empty itemset.
+	##
+	def __runLCMLabels(self, low_sup, options):
+		args = self.lcmCommand( "Cf" )
+		if ( self.arity_limit >= 0 ):
+			args = self.lcmCommand( "Ff" ) + ["-u", str(self.arity_limit)]
+		args.extend( ["-LAMP_F", self.label_file] + options )
+		args.extend( [self.lcmInputFile( self.input_file ), str(low_sup), "-"] )
+		p = subprocess.Popen( args, stdout=subprocess.PIPE, stderr=self.outlog )
+		for line in p.stdout:
+			# each line is "items (support) values".
+			# The numbers of patterns are output at the end. These lines are ignored.
+			if not "(" in line:
+				continue
+			# if line startswith space, the itemset is empty and ignored
+			if not line.startswith( " " ):
+				head, values = line.split( ")" )
+				items, support = head.split( "(" )
+				yield set( [ int( i ) for i in items.split() ] ), int( support ), values.split()
+		self.__waitLCM( p, args )
 		
 	##
 	# Run LCM-LAMP and return the optimal minimum support. 
@@ -228,38 +798,56 @@ class LCM():
 	# n1: the number of positive samples.
 	# sig_level: the significance level.
 	# p_mode: the integer that indicates the kind of statistical test.
-	#         1 -> Fisher's exact test,  2 -> chi-square test
+	#         1 -> Fisher's exact test,  2 -> chi-square test, 3 -> U-test (n1 is the upper bound of the support)
+	# In the stream mode, the histogram of the supports is also read.
+	# In the pipe transport, the output of LCM-LAMP is read from the pipe instead of the file.
 	##
 	def runLCMLAMP( self, input_file, arity_limit, n1, sig_level, p_mode ):
-		out_dir = input_file + ".results." + self.__LCMNAME
-		if not os.path.exists(out_dir):
-			os.mkdir(out_dir)
-		out_file_s = input_file.split("/")
-		out_file_name = out_file_s[len(out_file_s)-1]
-		out_file_pre = out_dir + "/" + out_file_name
-		out_file = ""
+		hist_opt = []
+		if self.stream:
+			hist_opt = ["-LAMP_H", "1"]
+		mode = "C"; arity_opt = []
+		if ( arity_limit >= 0 ):
+			mode = "F"; arity_opt = ["-u", str(arity_limit)]
+		args = self.lcmCommand( mode ) + ["-LAMP", str(n1), "-LAMP_P", str(p_mode)] + hist_opt + arity_opt + \
+			   [self.lcmInputFile( input_file ), str(sig_level)]
 		
-		if ( arity_limit < 0 ):
-			out_file = out_file_pre + ".lcmlamp.closed"
-			outlog_lcmlamp = open( out_file, 'w' )
-			subprocess.check_call( [self.__LCMPATH, "C", "-LAMP", str(n1), "-LAMP_P", str(p_mode), \
-									input_file, str(sig_level)], \
-								   stdout=outlog_lcmlamp, stderr=outlog_lcmlamp )
-			outlog_lcmlamp.close()
+		if self.transport == "pipe":
+			p = subprocess.Popen( args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT )
+			lines = p.communicate()[0].splitlines()
+			if p.returncode != 0:
+				sys.stderr.write('subprocess.CalledProcessError: cmd:%s returncode:%s\n' % (args, p.returncode) )
+				sys.exit()
 		else:
-			out_file = out_file_pre + ".lcmlamp.aritylim" + str( arity_limit )
+			out_dir = input_file + ".results." + self.__LCMNAME
+			if not os.path.exists(out_dir):
+				os.mkdir(out_dir)
+			out_file_s = input_file.split("/")
+			out_file_name = out_file_s[len(out_file_s)-1]
+			out_file_pre = out_dir + "/" + out_file_name
+			if ( arity_limit < 0 ):
+				out_file = out_file_pre + ".lcmlamp.closed"
+			else:
+				out_file = out_file_pre + ".lcmlamp.aritylim" + str( arity_limit )
 			outlog_lcmlamp = open( out_file, 'w' )
-			subprocess.check_call( [self.__LCMPATH, "F", "-LAMP", str(n1), "-LAMP_P", str(p_mode), \
-									"-u", str(arity_limit), input_file, str(sig_level)], \
-								   stdout=outlog_lcmlamp, stderr=outlog_lcmlamp )
+			subprocess.check_call( args, stdout=outlog_lcmlamp, stderr=outlog_lcmlamp )
 			outlog_lcmlamp.close()
+			fr = open( out_file, 'r' ); lines = fr.readlines(); fr.close()
 		
-		fr = open( out_file, 'r' ); line = ""; lam = -1
-		for line in fr:
+		lam = -1
+		hist = {}; hist_lb = None
+		for line in lines:
 			if line.startswith( "frq= " ):
 				s = line.split( ' ' )
 				lam = int( s[1] )
-		fr.close()
+			elif line.startswith( "frq_lb= " ):
+				hist_lb = int( line.split()[1] )
+			elif line.startswith( "hist= " ):
+				s = line.split()
+				hist[ int( s[1] ) ] = int( s[2] )
+		if hist_lb != None:
+			self.support_hist = hist; self.support_hist_lb = hist_lb
+			self.support_hist_args = (input_file, arity_limit)
 		lam = lam - 1
 		return lam
 			
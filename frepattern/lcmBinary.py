@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+
+"""
+Copyright (c) 2013, LAMP development team
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+    * Redistributions of source code must retain the above copyright
+      notice, this list of conditions and the following disclaimer.
+    * Redistributions in binary form must reproduce the above copyright
+      notice, this list of conditions and the following disclaimer in the
+      documentation and/or other materials provided with the distribution.
+    * Neither the name of the LAMP development team nor the
+      names of its contributors may be used to endorse or promote products
+      derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL LAMP DEVELOPMENT TEAM BE LIABLE FOR ANY
+DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+(INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+# Read the binary output of lcm53 (B option).
+# Each itemset is a record of int32 values: #items, the items, the support,
+# #transactions and the transaction IDs (#transactions is 0 if the transactions are not output).
+# The output is read from the file or the pipe by chunks. Each chunk is viewed as an int32 array
+# without parsing (numpy.frombuffer, or memoryview if numpy is not available),
+# and the items and the transactions of each record are sliced from the array.
+
+import sys
+from array import array
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+CHUNK_SIZE = 1 << 24 # the number of bytes read at once
+
+##
+# Return the int32 array of the first count integers in the bytes.
+# The array shares the memory with the bytes, except that the bytes are copied
+# in Python 2 without numpy, because memoryview.cast is not available.
+##
+def int32View( data, count ):
+	if np != None:
+		return np.frombuffer( data, dtype = np.int32, count = count )
+	try:
+		return memoryview( data )[ :4*count ].cast( 'i' )
+	except AttributeError:
+		a = array( 'i' ); a.fromstring( data[ :4*count ] )
+		return a
+
+##
+# Enumerate the records in the binary output of LCM.
+# This generator yields a tuple (items, support, transactions) for each itemset,
+# where items and transactions are the lists of integers.
+# fr: the file object of the file or the pipe opened in the binary mode.
+# chunk_size: the number of bytes read at once. A record over the chunks is carried to the next chunk.
+##
+def iterRecords( fr, chunk_size = CHUNK_SIZE ):
+	rest = b""
+	while True:
+		data = fr.read( chunk_size )
+		if not data:
+			break
+		if len( rest ) > 0:
+			data = rest + data
+		v = int32View( data, len( data ) // 4 )
+		n = len( v ); i = 0
+		while i < n:
+			k = int( v[i] )
+			if i + k + 3 > n:
+				break
+			m = int( v[i + k + 2] )
+			end = i + k + 3 + m
+			if end > n:
+				break
+			yield v[i + 1:i + k + 1].tolist(), int( v[i + k + 1] ), v[i + k + 3:end].tolist()
+			i = end
+		rest = data[ 4*i: ]
+	if len( rest ) > 0:
+		sys.stderr.write( "Error: the binary output of LCM is truncated.\n" )
+		sys.exit()
@@ -0,0 +1,364 @@
+#!/usr/bin/env python
+
+"""
+Copyright (c) 2013, LAMP development team
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+    * Redistributions of source code must retain the above copyright
+      notice, this list of conditions and the following disclaimer.
+    * Redistributions in binary form must reproduce the above copyright
+      notice, this list of conditions and the following disclaimer in the
+      documentation and/or other materials provided with the distribution.
+    * Neither the name of the LAMP development team nor the
+      names of its contributors may be used to endorse or promote products
+      derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL LAMP DEVELOPMENT TEAM BE LIABLE FOR ANY
+DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+(INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+# Get frequent pattern in transaction lists without running the lcm53 program.
+# The patterns are enumerated as LCM. The occurrences are the lists of transaction IDs, and
+# the occurrences of all extensions of a pattern are made by one scan of the transactions
+# in its occurrences (occurrence deliver). The closure of a pattern is the intersection of the items
+# of its occurrences, and the closed itemsets are enumerated by the prefix preserving closure extension.
+# The extensions cut by the minimum support are kept as the frontier, and the enumeration for
+# a lower support continues from the frontier instead of starting from the empty itemset again.
+# The results are identical to the LCM class, so both can be cross-checked.
+
+import sys, math, bisect
+from collections import defaultdict
+from . import frequentPatterns
+import functions.functionsSuper as fs
+
+##
+# Deliver the occurrences to the items of the transactions (occurrence deliver of LCM).
+# Return the dictionary whose key is an item and value is the list of transaction IDs.
+# occ: the list of transaction IDs.
+# trans_items: the sorted list of the items of each transaction.
+# last: only the items larger than last are delivered.
+##
+def deliver( occ, trans_items, last ):
+	buckets = defaultdict( list )
+	for t in occ:
+		items = trans_items[t]
+		if ( len( items ) > 0 ) and ( items[0] <= last ):
+			items = items[ bisect.bisect_right( items, last ): ]
+		for item in items:
+			buckets[ item ].append( t )
+	return buckets
+
+
+class LCMInProcess(frequentPatterns.LCM):
+	def __init__(self, max_support, outlog, stream = False, compact = False):
+		frequentPatterns.LCM.__init__(self, None, max_support, outlog, stream, compact)
+		self.__trans_items = [] # the sorted list of the items of each transaction
+		self.__trans_sets = [] # the set of the items of each transaction
+		self.__min_sup = 1 # the current minimum support used in the enumeration
+		self.__lamp = None # the variables for LCM-LAMP
+		self.__frontier = None # the extensions cut in the enumeration of the kept patterns
+		self.__frontier_arity = None # arity_limit of the enumeration of the frontier
+		self.__patterns = {} # key: support, value: list of (itemset, occ) which are not added to the nodes yet
+
+	##
+	# The lcm53 program is not needed.
+	##
+	def setLCMPath(self, lcm_path):
+		return
+
+	##
+	# Keep the items of transactions instead of writing the file for LCM.
+	# transaction_list: list of transactions
+	# output_file: not used
+	##
+	def makeFile4Lem(self, transaction_list, output_file):
+		self.__trans_items = [ sorted( t.itemset ) for t in transaction_list ]
+		self.__trans_sets = [ frozenset( t.itemset ) for t in transaction_list ]
+		self.__frontier = None
+		self.__patterns = {}
+
+	##
+	# Keep the labels of transactions instead of writing the file for LCM.
+	# output_file: not used
+	##
+	def makeLabelFile(self, labels, output_file):
+		self.labels = labels
+
+	##
+	# Store the patterns whose support is between low_sup and upper_sup.
+	# At the first construction, the support is not limited as LCM (see getNode).
+	# The enumeration continues from the frontier of the previous call, and the patterns
+	# are kept and added to the nodes of their supports.
+	# In the stream mode, the patterns are enumerated from the empty itemset and only counted.
+	# input_file: not used
+	##
+	def minePatterns(self, input_file, low_sup, upper_sup, arity_limit):
+		self.minePatternsUpTo( input_file, low_sup, upper_sup, arity_limit, None )
+
+	##
+	# Store the patterns as minePatterns, but stop the enumeration when limit patterns are found.
+	# Return False if stopped, and then the nodes between low_sup and upper_sup are initialized again.
+	# The patterns enumerated before the stop are kept except in the stream mode.
+	# limit: the number of the patterns, or None if not limited.
+	##
+	def minePatternsUpTo(self, input_file, low_sup, upper_sup, arity_limit, limit):
+		self.initNodes( low_sup, upper_sup )
+		band_upper = upper_sup
+		if self.constructed_index == -1:
+			band_upper = None
+		self.__min_sup = low_sup
+		count = 0
+		if self.stream:
+			if self.countHistogram( input_file, low_sup, band_upper, arity_limit ):
+				return True
+			for itemset, occ, support in self.__enumerate( arity_limit, self.__root() ):
+				if ( len( itemset ) > 0 ) and ( ( band_upper == None ) or ( support <= band_upper ) ):
+					self.countPattern( support )
+					count = count + 1
+					if ( limit != None ) and ( count >= limit ):
+						self.initNodes( low_sup, upper_sup )
+						return False
+			return True
+		for support in self.__patterns:
+			if ( support >= low_sup ) and ( ( band_upper == None ) or ( support <= band_upper ) ):
+				count = count + len( self.__patterns[ support ] )
+		if ( limit != None ) and ( count >= limit ):
+			return False
+		patterns = self.__enumerate( arity_limit, self.__keptFrontier( arity_limit ) )
+		for itemset, occ, support in patterns:
+			if len( itemset ) > 0:
+				self.__keepPattern( itemset, occ, support )
+				count = count + 1
+				if ( limit != None ) and ( count >= limit ):
+					patterns.close()
+					return False
+		for support in sorted( self.__patterns.keys(), reverse = True ):
+			if ( support < low_sup ) or ( ( band_upper != None ) and ( support > band_upper ) ):
+				continue
+			for itemset, occ in self.__patterns.pop( support ):
+				self.addPattern( set( itemset ), occ )
+		return True
+
+	##
+	# Enumerate the patterns whose support is low_sup or more without storing them.
+	##
+	def streamPatterns(self, low_sup):
+		self.__min_sup = low_sup
+		for itemset, occ, support in self.__enumerate( self.arity_limit, self.__root() ):
+			if len( itemset ) > 0:
+				yield set( itemset ), occ
+
+	##
+	# Enumerate the patterns whose support is low_sup or more with the numbers of positives.
+	##
+	def streamCounts(self, low_sup):
+		labels = self.labels
+		self.__min_sup = low_sup
+		for itemset, occ, support in self.__enumerate( self.arity_limit, self.__root() ):
+			if len( itemset ) > 0:
+				yield set( itemset ), support, len( [ t for t in occ if labels[t] ] )
+
+	##
+	# Run LCM-LAMP and return the optimal minimum support.
+	# This is the same procedure as ITEMSET_lamp in lcm53/itemset.c.
+	# The enumerated patterns are kept for minePatterns except in the stream mode.
+	# input_file: not used
+	# arity_limit: limit for appriori depth.
+	# n1: the number of positive samples.
+	# sig_level: the significance level.
+	# p_mode: the integer that indicates the kind of statistical test.
+	#         1 -> Fisher's exact test,  2 -> chi-square test, 3 -> U-test (n1 is the upper bound of the support)
+	# In the stream mode, the histogram of the supports is also counted (-LAMP_H of lcm53).
+	##
+	def runLCMLAMP( self, input_file, arity_limit, n1, sig_level, p_mode ):
+		total = len( self.__trans_items )
+		# th: alpha/f(lambda), topk_k: #patterns whose support >= topk_frq, sc2: #patterns of each support
+		self.__lamp = { "th": float(sig_level), "topk_k": 0, "topk_frq": 1, "sc2": [0]*(total + 2),
+						"n1": n1, "total": total, "alpha": sig_level, "p_mode": p_mode }
+		self.__min_sup = 1
+		hist = [0]*(total + 2)
+		if self.stream:
+			frontier = self.__root()
+		else:
+			self.__frontier = None
+			frontier = self.__keptFrontier( arity_limit )
+		for itemset, occ, support in self.__enumerate( arity_limit, frontier ):
+			if len( itemset ) > 0:
+				hist[ support ] += 1
+			# in U-test, the empty itemset is not counted as breadthFirst of lamp.py
+			if ( len( itemset ) > 0 ) or ( p_mode != 3 ):
+				self.__countLAMP( support )
+			if not self.stream:
+				self.__keepPattern( itemset, occ, support )
+		if self.stream:
+			self.support_hist = dict( [ (s, hist[s]) for s in range( 0, total + 2 ) if hist[s] > 0 ] )
+			self.support_hist_lb = self.__min_sup
+			self.support_hist_args = (input_file, arity_limit)
+		lam = self.__lamp[ "topk_frq" ] - 1
+		self.outlog.write( "frq= %s ,#sol.= %s\n" % (self.__lamp[ "topk_frq" ], self.__lamp[ "topk_k" ]) )
+		return lam
+
+	##
+	# Count the pattern and update the minimum support (ITEMSET_lamp).
+	# In the stream mode, the minimum support is kept one less than topk_frq
+	# to complete the histogram at the optimal minimum support.
+	##
+	def __countLAMP( self, support ):
+		lamp = self.__lamp
+		lamp[ "sc2" ][ support ] += 1
+		if support < lamp[ "topk_frq" ]:
+			return
+		lamp[ "topk_k" ] += 1
+		total = lamp[ "total" ]; n1 = lamp[ "n1" ]
+		while lamp[ "topk_k" ] >= lamp[ "th" ]:
+			topk_frq = lamp[ "topk_frq" ]
+			lamp[ "topk_k" ] -= lamp[ "sc2" ][ topk_frq ]; lamp[ "sc2" ][ topk_frq ] = 0
+			if ( lamp[ "p_mode" ] == 1 ) and ( topk_frq <= n1 ):
+				lamp[ "th" ] = lamp[ "th" ] * (total - topk_frq + 1) / (n1 - topk_frq + 1)
+			else:
+				masl = 0.0
+				if lamp[ "p_mode" ] == 3:
+					masl = uTestMASL( topk_frq, total )
+				elif lamp[ "p_mode" ] == 2:
+					masl = chiMASL( topk_frq, n1, total )
+				# the threshold is infinite as the division by zero in lcm53
+				lamp[ "th" ] = float( "inf" )
+				if masl > 0:
+					lamp[ "th" ] = lamp[ "alpha" ] / masl
+			lamp[ "topk_frq" ] = topk_frq + 1
+			self.__min_sup = lamp[ "topk_frq" ]
+			if self.stream:
+				self.__min_sup = lamp[ "topk_frq" ] - 1
+			if lamp[ "topk_frq" ] == n1:
+				self.__min_sup = total + 1
+
+	##
+	# Return the frontier which has only the empty itemset.
+	##
+	def __root( self ):
+		occ = list( range( 0, len( self.__trans_items ) ) )
+		return [ (len( occ ), [], -1, None, occ) ]
+
+	##
+	# Return the frontier of the kept patterns. It is initialized if arity_limit is changed.
+	##
+	def __keptFrontier( self, arity_limit ):
+		if ( self.__frontier == None ) or ( self.__frontier_arity != arity_limit ):
+			self.__frontier = self.__root()
+			self.__frontier_arity = arity_limit
+			self.__patterns = {}
+		return self.__frontier
+
+	##
+	# Keep the non-empty pattern until it is added to the node of its support.
+	##
+	def __keepPattern( self, itemset, occ, support ):
+		if len( itemset ) > 0:
+			self.__patterns.setdefault( support, [] ).append( (itemset, occ) )
+
+	##
+	# Enumerate the patterns from the frontier and yield a tuple (itemset, occ, support)
+	# for each pattern whose support is the minimum support or more.
+	# The closed patterns are enumerated if arity_limit < 0, otherwise all frequent patterns
+	# whose size is up to arity_limit are enumerated. The empty itemset is also yielded.
+	# The minimum support can be raised during the enumeration.
+	# frontier: list of the extensions (support, itemset, item, occ of itemset, occ of the extension).
+	#           The extensions under the minimum support are left in the list, and the occurrences
+	#           of an extension in the list are made again from the occurrences of its itemset.
+	#           If the caller stops the enumeration, the extensions not enumerated yet are also left.
+	##
+	def __enumerate( self, arity_limit, frontier ):
+		stack = [ f for f in frontier if f[0] >= self.__min_sup ]
+		stack.reverse()
+		frontier[:] = [ f for f in frontier if f[0] < self.__min_sup ]
+		trans_items = self.__trans_items; trans_sets = self.__trans_sets
+		try:
+			while len( stack ) > 0:
+				support, itemset, e, occ, new_occ = stack.pop()
+				if support < self.__min_sup:
+					if occ != None:
+						new_occ = None
+					frontier.append( (support, itemset, e, occ, new_occ) )
+					continue
+				if new_occ == None:
+					new_occ = [ t for t in occ if e in trans_sets[t] ]
+				if arity_limit < 0:
+					# the closure is the items in all occurrences, and its prefix have to be identical to itemset
+					closure = []
+					if support > 0:
+						closure = sorted( trans_sets[ new_occ[0] ].intersection( *[ trans_sets[t] for t in new_occ ] ) )
+					in_itemset = set( itemset )
+					ppc = True
+					for i in closure:
+						if i >= e:
+							break
+						if not i in in_itemset:
+							ppc = False
+							break
+					if not ppc:
+						continue
+					new_itemset = closure
+				else:
+					new_itemset = itemset
+					if e >= 0:
+						new_itemset = itemset + [e]
+				# the extensions are pushed before the pattern is yielded, and they are checked
+				# again by the minimum support when they are popped
+				if ( arity_limit < 0 ) or ( len( new_itemset ) < arity_limit ):
+					buckets = deliver( new_occ, trans_items, e )
+					in_closure = set( new_itemset )
+					extensions = sorted( [ i for i in buckets if not i in in_closure ], reverse = True )
+					for i in extensions:
+						bucket = buckets[i]
+						if len( bucket ) >= self.__min_sup:
+							stack.append( (len( bucket ), new_itemset, i, new_occ, bucket) )
+						else:
+							frontier.append( (len( bucket ), new_itemset, i, new_occ, None) )
+				yield new_itemset, new_occ, support
+		finally:
+			for support, itemset, e, occ, new_occ in stack:
+				if occ != None:
+					new_occ = None
+				frontier.append( (support, itemset, e, occ, new_occ) )
+
+##
+# Return the P-value of chi-square test when the all positives are contained in x transactions.
+# This is the same computation as ITEMSET_lamp in lcm53/itemset.c.
+##
+def chiMASL( x, n1, total ):
+	yate_corr = 0.5
+	n0 = total - n1
+	nonfrq = total - x
+	means = [ [ float(x) * n1 / total, float(x) * n0 / total ],
+			  [ float(nonfrq) * n1 / total, float(nonfrq) * n0 / total ] ]
+	if min( [ min( m ) for m in means ] ) <= 0:
+		return 0.0 # chi is infinite in lcm53
+	chi = ( abs( x - means[0][0] ) - yate_corr )**2 / means[0][0]
+	chi = chi + ( abs( 0 - means[0][1] ) - yate_corr )**2 / means[0][1]
+	chi = chi + ( abs( n1 - x - means[1][0] ) - yate_corr )**2 / means[1][0]
+	chi = chi + ( abs( n0 - means[1][1] ) - yate_corr )**2 / means[1][1]
+	if chi == 0.0:
+		return 1.0
+	return fs.FunctionsSuper().stdNorDistribution( chi**0.5 )
+
+##
+# Return the MASL of U-test for the support x (funcF of functions4u_test).
+# This is the same computation as ITEMSET_lamp_utest_masl in lcm53/itemset.c.
+##
+def uTestMASL( x, total ):
+	size_y = total - x
+	mean_u = float( x*size_y )/2
+	var_u = float( x*size_y*(total + 1) )/12
+	if var_u <= 0:
+		return 1.0
+	return fs.FunctionsSuper().stdNorDistribution( mean_u/math.sqrt( var_u ) )
@@ -31,15 +31,21 @@ SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 # This clas contains:
 #   1. minimum p-value
 #   2. the total of itemset that support >= this node's support
-#   3. List of (itemset, transactions)
+#   3. List of (itemset, transactions), or PatternStore in the compact mode
+#   4. the number of itemsets whose support is this node's support
 
 import sys
+from . import patternStore
 
 class Node():
-	def __init__(self):
+	def __init__(self, compact = False):
 		self.bound = 2.0 # the value to use upper/lower bound
 		self.total = -1
-		self.itemset_list = []
+		if compact:
+			self.itemset_list = patternStore.PatternStore()
+		else:
+			self.itemset_list = []
+		self.pattern_num = 0 # the number of itemsets, which is counted even if the itemset_list is not stored.
 
 	def setBound(self, bound):
 		self.bound = bound
@@ -49,12 +55,29 @@ class Node():
 
 	def addItemSet(self, item_tuple):
 		self.itemset_list.append(item_tuple)
+		self.pattern_num = self.pattern_num + 1
+
+	##
+	# Count the itemsets without storing their items and transactions.
+	# num: the number of itemsets.
+	##
+	def countItemSet(self, num = 1):
+		self.pattern_num = self.pattern_num + num
 
 	def getItemSet(self, i):
 		return self.itemset_list[i][0]
 	
 	def getTransactionSet(self, i):
 		return self.itemset_list[i][1]
+
+	##
+	# Return the transactions of all itemsets in the format of FunctionsSuper.calPValues.
+	##
+	def getTransactionBatch(self):
+		if isinstance( self.itemset_list, patternStore.PatternStore ):
+			item_ptr, items, occ_ptr, occs = self.itemset_list.csr()
+			return tuple( [occ_ptr, occs] )
+		return [ item_tuple[1] for item_tuple in self.itemset_list ]
 	
 	def output(self):
 		sys.stderr.write("lower_bound: %s, m: %s\n" % (self.bound, self.total ) )
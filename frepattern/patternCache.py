@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+
+"""
+Copyright (c) 2013, LAMP development team
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+    * Redistributions of source code must retain the above copyright
+      notice, this list of conditions and the following disclaimer.
+    * Redistributions in binary form must reproduce the above copyright
+      notice, this list of conditions and the following disclaimer in the
+      documentation and/or other materials provided with the distribution.
+    * Neither the name of the LAMP development team nor the
+      names of its contributors may be used to endorse or promote products
+      derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL LAMP DEVELOPMENT TEAM BE LIABLE FOR ANY
+DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+(INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+# On-disk cache of the frequent patterns.
+# The patterns do not depend on the significance level, the test method and the values of
+# the transactions, so they are reused when the same item matrix is analyzed again.
+# Each entry is a file named <hash>.arity<arity_limit>.sup<min_sup>.<kind>.cache, where
+# hash is SHA-1 of the item matrix and the entry keeps all patterns whose support is min_sup or more.
+# kind is "pat" (the patterns in the CSR format of PatternStore and the histogram of the supports)
+# or "hist" (only the histogram, made in the stream mode).
+# When the total size of the entries exceeds max_size, the least recently used entries are removed.
+# All values are written in little endian, and the counts of the histogram are 8 bytes.
+# The widths of the integers are kept in the header, and the entry of the other widths is not used.
+
+import os, re, sys, struct, hashlib, tempfile
+from array import array
+from . import patternStore
+
+MAGIC = "LPC2"
+# magic, the width of the integers, the width of the counts, min_sup, arity_limit,
+# #supports in histogram, #patterns (-1: no patterns)
+HEADER = struct.Struct( "<4siiiiii" )
+INT_SIZE = array( 'i' ).itemsize # the width of the supports and the arrays of PatternStore
+COUNT_FORMAT = "<%dq" # the format of the counts of the histogram
+COUNT_SIZE = struct.calcsize( "<q" )
+ENTRY_PATTERN = re.compile( r"^([0-9a-f]+)\.arity(-?\d+)\.sup(\d+)\.(pat|hist)\.cache$" )
+
+##
+# Return the hash of the item matrix.
+# The items of each transaction are hashed in the same format as the input file of LCM.
+##
+def matrixHash( transaction_list ):
+	h = hashlib.sha1()
+	for t in transaction_list:
+		h.update( " ".join( [ str( item ) for item in t.itemset ] ) + "\n" )
+	return h.hexdigest()
+
+##
+# Write the array of 'i' in little endian.
+##
+def writeInts( fw, a ):
+	if sys.byteorder != "little":
+		a = array( 'i', a ); a.byteswap()
+	a.tofile( fw )
+
+##
+# Read n integers written by writeInts.
+##
+def readInts( fr, n ):
+	a = array( 'i' ); a.fromfile( fr, n )
+	if sys.byteorder != "little":
+		a.byteswap()
+	return a
+
+class PatternCache():
+	def __init__(self, cache_dir, max_size = 1024*1024*1024):
+		self.cache_dir = cache_dir # directory to keep the entries
+		self.max_size = max_size # disk budget in bytes
+		if not os.path.exists( cache_dir ):
+			os.makedirs( cache_dir )
+
+	##
+	# Return the list of entries as tuples (filename, hash, arity_limit, min_sup, kind).
+	##
+	def entries(self):
+		entry_list = []
+		for filename in os.listdir( self.cache_dir ):
+			m = ENTRY_PATTERN.match( filename )
+			if m != None:
+				entry_list.append( tuple( [ filename, m.group(1), int( m.group(2) ), int( m.group(3) ), m.group(4) ] ) )
+		return entry_list
+
+	##
+	# Return the filename of the entry which can answer the patterns of the support low_sup or more.
+	# If several entries can be used, the smallest one (the largest min_sup) is selected.
+	# patterns: If True, the entries of only the histogram are not used.
+	##
+	def lookup(self, matrix_hash, arity_limit, low_sup, patterns):
+		best = None
+		for filename, h, arity, min_sup, kind in self.entries():
+			if ( h != matrix_hash ) or ( arity != arity_limit ) or ( min_sup > low_sup ):
+				continue
+			if patterns and ( kind != "pat" ):
+				continue
+			if ( best == None ) or ( min_sup > best[1] ) or ( ( min_sup == best[1] ) and ( kind == "hist" ) ):
+				best = tuple( [ filename, min_sup ] )
+		if best == None:
+			return None
+		return best[0]
+
+	##
+	# Load the entry and return a tuple (min_sup, hist, store),
+	# where hist is the dictionary of the number of patterns of each support,
+	# and store is PatternStore (None if the entry has only the histogram).
+	# If no entry is found, return None.
+	##
+	def load(self, matrix_hash, arity_limit, low_sup, patterns = True):
+		filename = self.lookup( matrix_hash, arity_limit, low_sup, patterns )
+		if filename == None:
+			return None
+		path = os.path.join( self.cache_dir, filename )
+		try:
+			fr = open( path, 'rb' )
+			magic, int_size, count_size, min_sup, arity, hist_size, pattern_num \
+				   = HEADER.unpack( fr.read( HEADER.size ) )
+			if ( magic != MAGIC ) or ( int_size != INT_SIZE ) or ( count_size != COUNT_SIZE ):
+				fr.close()
+				return None
+			supports = readInts( fr, hist_size )
+			counts = struct.unpack( COUNT_FORMAT % hist_size, fr.read( COUNT_SIZE * hist_size ) )
+			store = None
+			if pattern_num >= 0:
+				store = patternStore.PatternStore()
+				store.item_ptr = readInts( fr, pattern_num + 1 )
+				store.items = readInts( fr, store.item_ptr[-1] )
+				store.occ_ptr = readInts( fr, pattern_num + 1 )
+				store.occs = readInts( fr, store.occ_ptr[-1] )
+			fr.close()
+		except (IOError, EOFError, struct.error):
+			return None
+		os.utime( path, None ) # the access time for LRU
+		return tuple( [ min_sup, dict( zip( supports, counts ) ), store ] )
+
+	##
+	# Store the patterns whose support is min_sup or more.
+	# hist: the dictionary of the number of patterns of each support.
+	# store: PatternStore of the patterns. If None, only the histogram is stored.
+	# The entries which are included in the new entry are removed.
+	##
+	def store(self, matrix_hash, arity_limit, min_sup, hist, store = None):
+		kind = "pat"
+		if store == None:
+			kind = "hist"
+		filename = "%s.arity%d.sup%d.%s.cache" % ( matrix_hash, arity_limit, min_sup, kind )
+		supports = sorted( hist.keys() )
+		fd, tmp_path = tempfile.mkstemp( dir = self.cache_dir, suffix = ".tmp" )
+		fw = os.fdopen( fd, 'wb' )
+		pattern_num = -1
+		if store != None:
+			pattern_num = len( store )
+		fw.write( HEADER.pack( MAGIC, INT_SIZE, COUNT_SIZE, min_sup, arity_limit, len( supports ), pattern_num ) )
+		writeInts( fw, array( 'i', supports ) )
+		fw.write( struct.pack( COUNT_FORMAT % len( supports ), *[ hist[s] for s in supports ] ) )
+		if store != None:
+			for a in store.csr():
+				writeInts( fw, a )
+		fw.close()
+		# The entry is replaced at once, so the other processes do not read the partial file.
+		os.rename( tmp_path, os.path.join( self.cache_dir, filename ) )
+		for old_filename, h, arity, old_min_sup, old_kind in self.entries():
+			if ( old_filename == filename ) or ( h != matrix_hash ) or ( arity != arity_limit ):
+				continue
+			if ( old_min_sup >= min_sup ) and ( ( kind == "pat" ) or ( old_kind == "hist" ) ):
+				self.remove( old_filename )
+		self.evict()
+
+	def remove(self, filename):
+		try:
+			os.remove( os.path.join( self.cache_dir, filename ) )
+		except OSError:
+			pass
+
+	##
+	# Remove the least recently used entries until the total size is up to max_size.
+	##
+	def evict(self):
+		entry_list = []; total = 0
+		for entry in self.entries():
+			try:
+				st = os.stat( os.path.join( self.cache_dir, entry[0] ) )
+			except OSError:
+				continue
+			entry_list.append( tuple( [ st.st_mtime, st.st_size, entry[0] ] ) )
+			total = total + st.st_size
+		entry_list.sort()
+		for mtime, size, filename in entry_list:
+			if total <= self.max_size:
+				break
+			self.remove( filename )
+			total = total - size
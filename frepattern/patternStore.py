@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+
+"""
+Copyright (c) 2013, LAMP development team
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+    * Redistributions of source code must retain the above copyright
+      notice, this list of conditions and the following disclaimer.
+    * Redistributions in binary form must reproduce the above copyright
+      notice, this list of conditions and the following disclaimer in the
+      documentation and/or other materials provided with the distribution.
+    * Neither the name of the LAMP development team nor the
+      names of its contributors may be used to endorse or promote products
+      derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL LAMP DEVELOPMENT TEAM BE LIABLE FOR ANY
+DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+(INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+# Compact storage of the frequent patterns.
+# The items and the transactions of all patterns are kept in two flat integer arrays,
+# and the i-th pattern is located by the offset tables (the CSR format).
+# This class can be used in place of the list of (itemset, transactions) in the Node class.
+
+from array import array
+
+class PatternStore():
+	def __init__(self):
+		self.items = array('i') # items of all patterns
+		self.item_ptr = array('i', [0]) # items of the i-th pattern are items[item_ptr[i]:item_ptr[i+1]]
+		self.occs = array('i') # transaction IDs of all patterns
+		self.occ_ptr = array('i', [0]) # transactions of the i-th pattern are occs[occ_ptr[i]:occ_ptr[i+1]]
+
+	def __len__(self):
+		return len( self.item_ptr ) - 1
+
+	##
+	# Add the pattern.
+	# item_tuple: tuple of (itemset, transactions)
+	##
+	def append(self, item_tuple):
+		self.items.extend( item_tuple[0] )
+		self.item_ptr.append( len( self.items ) )
+		self.occs.extend( item_tuple[1] )
+		self.occ_ptr.append( len( self.occs ) )
+
+	def getItemSet(self, i):
+		return self.items[ self.item_ptr[i]:self.item_ptr[i+1] ]
+
+	def getTransactionSet(self, i):
+		return self.occs[ self.occ_ptr[i]:self.occ_ptr[i+1] ]
+
+	def getSupport(self, i):
+		return self.occ_ptr[i+1] - self.occ_ptr[i]
+
+	def __getitem__(self, i):
+		if i < 0:
+			i = i + len( self )
+		if ( i < 0 ) or ( i >= len( self ) ):
+			raise IndexError( "pattern index out of range" )
+		return self.getItemSet( i ), self.getTransactionSet( i )
+
+	##
+	# Add all patterns of the other PatternStore by concatenating the arrays.
+	##
+	def extend(self, store):
+		item_base = len( self.items ) - store.item_ptr[0]
+		occ_base = len( self.occs ) - store.occ_ptr[0]
+		self.items.extend( store.items )
+		self.item_ptr.extend( array( 'i', [ p + item_base for p in store.item_ptr[1:] ] ) )
+		self.occs.extend( store.occs )
+		self.occ_ptr.extend( array( 'i', [ p + occ_base for p in store.occ_ptr[1:] ] ) )
+
+	##
+	# Iterate the patterns as (itemset, transactions) in the same way as the list of the Node class.
+	# The itemset and transactions are the slices of the arrays, so the loops over many patterns
+	# should read the arrays by the offsets (csr) instead, as FunctionsSuper.batch2CSR.
+	##
+	def __iter__(self):
+		items = self.items; item_ptr = self.item_ptr
+		occs = self.occs; occ_ptr = self.occ_ptr
+		for i in xrange( 0, len( item_ptr ) - 1 ):
+			yield items[ item_ptr[i]:item_ptr[i+1] ], occs[ occ_ptr[i]:occ_ptr[i+1] ]
+
+	##
+	# Return the arrays in the CSR format: (item_ptr, items, occ_ptr, occs).
+	##
+	def csr(self):
+		return self.item_ptr, self.items, self.occ_ptr, self.occs
+
+	##
+	# Return the memory size of the arrays in bytes.
+	##
+	def memorySize(self):
+		size = 0
+		for a in self.csr():
+			size = size + a.itemsize * len( a )
+		return size
@@ -37,6 +37,7 @@ from __future__ import division
 import sys, os
 from . import functionsSuper as fs
 from . import pvalTable
+np = fs.np
 
 pardir = os.path.dirname(os.path.dirname(os.path.abspath( __file__ )))
 sys.path.append(pardir)
@@ -54,8 +55,9 @@ class FunctionOfX(fs.FunctionsSuper):
 		self.__t_size = len(transaction_list) # all transaction size
 		self.__f_size = self.sumValue(transaction_list) # transaction size which have flag = 1 (n1)
 		self.alternative = alternative # alternative hypothesis. greater or less -> 1, two.sided -> 0.
-		self.__pvalTable = pvalTable.PvalTable( row_size ) # P-value table
-		self.__chiTable = pvalTable.PvalTable( row_size ) # P-value table
+		col_size = int( min( row_size, self.__f_size ) ) # the top-left of the table does not exceed n1
+		self.__pvalTable = pvalTable.newPvalTable( row_size, col_size ) # P-value table
+		self.__chiTable = pvalTable.newPvalTable( row_size, col_size ) # P-value table
 		if self.__f_size == 0:
 			sys.stdout.write("Error: There is no up-regulate gene.\n")
 			sys.exit()
@@ -111,8 +113,13 @@ class FunctionOfX(fs.FunctionsSuper):
 	##
 	def calPValue(self, transaction_list, flag_transactions_id):
 		ovalues = self.contingencyTable( transaction_list, flag_transactions_id, self.__t_size, self.__f_size )
-		total_col1 = self.__f_size
-		total_row1 = sum( ovalues[0] )
+		return self.calPValueFromCount( sum( ovalues[0] ), ovalues[0][0] )
+
+	##
+	# Calculate p-value from x and a of the pattern.
+	##
+	def calPValueFromCount(self, total_row1, pos_size):
+		ovalues = self.countTable( total_row1, pos_size, self.__t_size, self.__f_size )
 		p = self.__pvalTable.getValue( total_row1, ovalues[0][0] )
 		chi = self.__chiTable.getValue( total_row1, ovalues[0][0] )
 		if p < 0: # calculate P-value and save to the table
@@ -128,6 +135,43 @@ class FunctionOfX(fs.FunctionsSuper):
 			self.__chiTable.putValue( total_row1, ovalues[0][0], chi )
 #		sys.stdout.write( "x: %d, a:%d, chi: %s, p: %s\n" % (total_row1, ovalues[0][0], chi, p) )
 		return p, ovalues[0][0]
+
+	##
+	# Calculate P-values of the patterns from the sizes and the numbers of positives.
+	# This is the same computation as calPValue for the arrays.
+	# sizes: the array of x (the number of transactions which have the pattern)
+	# stats: the array of a (the number of positives in the transactions)
+	##
+	def calPValuesFromStats(self, sizes, stats):
+		total = self.__t_size
+		total_col1 = self.__f_size # n1
+		total_col2 = total - total_col1 # n0
+		total_row1 = np.asarray( sizes, dtype = int )
+		total_row2 = total - total_row1
+		pos_size = np.rint( stats ).astype( int )
+		ovalues = [ [ pos_size, total_row1 - pos_size ],
+					[ total_col1 - pos_size, total_col2 - ( total_row1 - pos_size ) ] ]
+		means = [ [ total_row1 * total_col1 / total, total_row1 * total_col2 / total ],
+				  [ total_row2 * total_col1 / total, total_row2 * total_col2 / total ] ]
+		# Yate continuity correction
+		yate_corr = np.zeros( len( total_row1 ) )
+		for i in means:
+			for j in i:
+				yate_corr[ j < 5 ] = 0.5
+		chi = np.zeros( len( total_row1 ) )
+		with np.errstate( divide = 'ignore', invalid = 'ignore' ):
+			for i in xrange(0, len(ovalues)):
+				for j in xrange(0, len(ovalues[i])):
+					chi = chi + (abs(ovalues[i][j] - means[i][j]) - yate_corr)**2/means[i][j]
+		p_values = np.where( chi == 0.0, 1.0, self.stdNorDistributions( np.sqrt( chi ) ) )
+		if (self.alternative > 0):
+			lower = pos_size < np.minimum( total_col1, total_row1 )/2
+			p_values[ lower ] = 1. - p_values[ lower ]
+		# when the alternative hypothesis is "two.sided", 
+		# the P-value is doubled. 
+		else:
+			p_values = np.minimum( p_values * 2., 1.0 )
+		return p_values, pos_size
 	
 	def __calMeans(self, ovalues):
 		total = self.__t_size
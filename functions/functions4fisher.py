@@ -36,10 +36,18 @@ SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 #     Acceletate of the calculation P-value by storing the calculated P-value.
 # @editor Terada, 11, Mar, 2015,
 #     Implement computation of the 'less' and 'two-sided' Fisher's exact test. 
+# In the precompute mode, the P-values of all (x, a) are computed at the initialization by NumPy,
+# and calPValue only looks up the table. The mode is available when NumPy is installed.
 from __future__ import division
 import sys, os
 from . import functionsSuper as fs
 from . import pvalTable
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+REL_ERR = 1.E-7 # relative tolerance to regard the probabilities as tied in the two-sided test
 
 pardir = os.path.dirname(os.path.dirname(os.path.abspath( __file__ )))
 sys.path.append(pardir)
@@ -51,12 +59,13 @@ sys.path.append(pardir)
 # transaction_list: list of transactions
 ##
 class FunctionOfX(fs.FunctionsSuper):
-	def __init__(self, transaction_list, row_size, alternative):
+	def __init__(self, transaction_list, row_size, alternative, precompute = False):
 		fs.FunctionsSuper.__init__(self)
 		self.__t_size = len(transaction_list) # all transaction size
 		self.__f_size = self.sumValue(transaction_list) # transaction size which have flag = 1 (n1)
-		self.__pvalTable = pvalTable.PvalTable( row_size ) # P-value table
-		self.__occrTable = pvalTable.PvalTable( row_size ) # occurence table for calculate P-value
+		col_size = int( min( row_size, self.__f_size ) ) # the top-left of the table does not exceed n1
+		self.__pvalTable = pvalTable.newPvalTable( row_size, col_size ) # P-value table
+		self.__occrTable = pvalTable.newPvalTable( row_size, col_size ) # occurence table for calculate P-value
 		self.calTime = 0 # Total number of calculate P-value
 		self.alternative = alternative # alternative hypothesis. greater or less -> 1, two.sided -> 0.
 		if self.__f_size == 0:
@@ -70,6 +79,12 @@ class FunctionOfX(fs.FunctionsSuper):
 				sys.stderr.write("Error: \"" + t.name + "\" value is " + str(t.value)+".\n")
 				sys.stderr.write("       But value is 1 or 0 if you test by fisher's exact test.\n")
 				sys.exit()
+		self.__pvalArray = None # P-values of x <= row_size. index: [x, a]
+		if precompute:
+			if np == None:
+				sys.stderr.write("Error: NumPy is required to precompute P-values.\n")
+				sys.exit()
+			self.__pvalArray = self.__precompute( min( row_size, self.__t_size ) )
 
 			
 	def getN1(self):
@@ -107,11 +122,50 @@ class FunctionOfX(fs.FunctionsSuper):
 	##
 	def calPValue(self, transaction_list, flag_transactions_id):
 		ovalues = self.contingencyTable( transaction_list, flag_transactions_id, self.__t_size, self.__f_size )
-		total_col1 = self.__f_size
 		total_row1 = sum( ovalues[0] )
-		p = self.__pvalTable.getValue( total_row1, ovalues[0][0] )
+		return self.__pValue( total_row1, ovalues[0][0] ), ovalues[0][0]
+
+	##
+	# Calculate P-value from x and a of the pattern.
+	##
+	def calPValueFromCount(self, total_row1, pos_size):
+		return self.__pValue( total_row1, pos_size ), pos_size
+
+	##
+	# Calculate P-values of the patterns from the sizes and the numbers of positives.
+	# sizes: the array of x (the number of transactions which have the pattern)
+	# stats: the array of a (the number of positives in the transactions)
+	##
+	def calPValuesFromStats(self, sizes, stats):
+		total_row1 = np.asarray( sizes, dtype = int )
+		pos_size = np.rint( stats ).astype( int )
+		p_values = np.empty( len( total_row1 ) )
+		not_computed = np.ones( len( total_row1 ), dtype = bool )
+		if self.__pvalArray is not None:
+			not_computed = total_row1 >= len( self.__pvalArray )
+			in_array = ~not_computed
+			p_values[ in_array ] = self.__pvalArray[ total_row1[ in_array ], pos_size[ in_array ] ]
+		# compute the P-value once for each table
+		if np.any( not_computed ):
+			width = int( self.__f_size ) + 1
+			keys, inverse = np.unique( total_row1[ not_computed ] * width + pos_size[ not_computed ], \
+									   return_inverse = True )
+			key_p_values = np.array( [ self.__pValue( int( k // width ), int( k % width ) ) for k in keys ] )
+			p_values[ not_computed ] = key_p_values[ inverse ]
+		return p_values, pos_size
+
+	##
+	# Return the P-value of the table.
+	# total_row1: the number of transactions which have the pattern (x)
+	# pos_size: the number of positives in the transactions (a)
+	##
+	def __pValue(self, total_row1, pos_size):
+		if ( self.__pvalArray is not None ) and ( total_row1 < len( self.__pvalArray ) ):
+			return float( self.__pvalArray[ total_row1, pos_size ] )
+		total_col1 = self.__f_size
+		p = self.__pvalTable.getValue( total_row1, pos_size )
 		if p < 0: # calculate P-value and save to the table
-			p0 = self.__probability(total_row1, ovalues[0][0])
+			p0 = self.__probability(total_row1, pos_size)
 #			sys.stdout.write("p0: %s\n" % p0)
 			p = p0; pos_max = min( total_row1, total_col1 )
 			# when the alternative hypothesis is "two.sided",
@@ -119,34 +173,74 @@ class FunctionOfX(fs.FunctionsSuper):
 			if self.alternative < 1:
 				a = 0
 				# cumulate the lower case probability.
-				while a < ovalues[0][0]:
+				while a < pos_size:
 					pa = self.__probability( total_row1, a )
 #					sys.stdout.write( "x: %d, a:%d, pa: %s\n" % (total_row1, a, pa) )
-					if (pa - p0 > 1.E-16): # pa > p0
+					if (pa > p0*(1 + REL_ERR)): # pa > p0
 						break
 					p = p + pa
 					a = a + 1
 				# cumulate the upper case probability.
 				a = pos_max
-				while ( a > ovalues[0][0] ):
+				while ( a > pos_size ):
 					pa = self.__probability( total_row1, a )
 #					sys.stdout.write( "x: %d, a:%d, pa: %s\n" % (total_row1, a, pa) )
-					if (pa - p0 > 1.E-16): # pa > p0
+					if (pa > p0*(1 + REL_ERR)): # pa > p0
 						break
 					p = p + pa
 					a = a - 1
 			# when the alternative hypothesis is "greater" or "less",
 			# the higher/less case probability is cumulated.  
 			else:
-				a = ovalues[0][0] + 1
+				a = pos_size + 1
 				while ( a <= pos_max ):
 					pa = self.__probability( total_row1, a )
 					p = p + pa
 					a = a + 1
-			self.__pvalTable.putValue( total_row1, ovalues[0][0], p )
+			self.__pvalTable.putValue( total_row1, pos_size, p )
 			self.calTime = self.calTime + 1
-#		sys.stdout.write( "x: %d, a:%d, p: %s\n" % (total_row1, ovalues[0][0], p) )
-		return p, ovalues[0][0]
+#		sys.stdout.write( "x: %d, a:%d, p: %s\n" % (total_row1, pos_size, p) )
+		return p
+
+	##
+	# Compute the P-values of all tables whose x is up to max_x.
+	# The hypergeometric probabilities are computed from the logarithm of the factorials,
+	# and the tail probabilities are their cumulative sums.
+	# Return the array whose [x, a] element is the P-value (NaN if a > x).
+	##
+	def __precompute(self, max_x):
+		n = self.__t_size
+		n1 = int( self.__f_size )
+		n0 = n - n1
+		max_a = min( max_x, n1 )
+		# log_fact[i] = log(i!)
+		log_fact = np.zeros( n + 1 )
+		log_fact[1:] = np.cumsum( np.log( np.arange( 1, n + 1 ) ) )
+		x = np.arange( 0, max_x + 1 ).reshape( -1, 1 )
+		a = np.arange( 0, max_a + 1 ).reshape( 1, -1 )
+		b = x - a
+		valid = ( b >= 0 ) & ( b <= n0 )
+		b = np.clip( b, 0, n0 )
+		# log( C(n1, a)*C(n0, b)/C(n, x) )
+		log_prob = log_fact[n1] - log_fact[a] - log_fact[n1 - a] \
+				   + log_fact[n0] - log_fact[b] - log_fact[n0 - b] \
+				   - ( log_fact[n] - log_fact[x] - log_fact[n - x] )
+		prob = np.where( valid, np.exp( log_prob ), 0.0 )
+		# when the alternative hypothesis is "greater" or "less",
+		# the P-value is the sum of the probabilities of a or more.
+		if self.alternative > 0:
+			pval = np.cumsum( prob[:, ::-1], axis = 1 )[:, ::-1]
+		# when the alternative hypothesis is "two.sided",
+		# the P-value is the sum of the probabilities which are not larger than that of a.
+		else:
+			pval = np.empty( prob.shape )
+			for i in range( 0, max_x + 1 ):
+				sorted_prob = np.sort( prob[i] )
+				cum_prob = np.cumsum( sorted_prob )
+				index = np.searchsorted( sorted_prob, prob[i] * ( 1 + REL_ERR ), side = 'right' )
+				pval[i] = cum_prob[ index - 1 ]
+		pval[ a > x ] = np.nan
+		return pval
 	
 	##
 	# Calculate probability of occurrence probability about table.
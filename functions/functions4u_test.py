@@ -40,172 +40,90 @@ SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 from __future__ import division
 import sys, math, os
 from . import functionsSuper as fs
+np = fs.np
 
 pardir = os.path.dirname(os.path.dirname(os.path.abspath( __file__ )))
 sys.path.append(pardir)
 
+EXACT_CUTOFF = 1000 # In the exact mode, the exact P-value is computed if x(N-x) is up to this value.
+
 ##
 # Define class
 # This class calculate function f that means minimum p-value (MASL).
 # transaction_list: list of transactions
+# exact: If True, the exact P-values are computed for the small groups by the null distributions of
+#        the rank sum, and the tie-corrected normal approximation is used for the other groups.
 ##
 class FunctionOfX(fs.FunctionsSuper):
-	def __init__(self, transaction_list, alternative):
+	def __init__(self, transaction_list, alternative, exact = False):
 		fs.FunctionsSuper.__init__(self)
 		self.__t_size = len(transaction_list) # all transaction size
 		self.__transaction_list = transaction_list[:]
 		self.alternative = alternative # alternative hypothesis. greater -> 1, less -> -1, two.sided -> 0.
 		self.calTime = 0 # Total number of calculate P-value
+		self.__ranks = midRanks( [ t.value for t in self.__transaction_list ] ) # rank of each transaction
+		self.__rank_array = None # the ranks as the NumPy array to gather the ranks of a pattern
+		if np != None:
+			self.__rank_array = np.array( self.__ranks, dtype = float )
+		self.__exact = exact
+		self.__tie_term = 0 # sum of t^3 - t over the tied groups (t: the size of the group)
+		self.__exact_size = -1 # the exact P-value is computed if min(x, N-x) is up to this value
+		self.__null_dist = [] # the tails of the null distribution of the doubled rank sum for each size
+		self.__masl = [] # MASL of each size in the exact mode
+		if exact:
+			if np == None:
+				sys.stderr.write("Error: NumPy is required to compute the exact P-values.\n")
+				sys.exit()
+			self.__tie_term = tieTerm( self.__ranks )
+			# the doubled rank sums of the largest and the smallest x ranks
+			ranks2 = sorted( [ int( round( 2*r ) ) for r in self.__ranks ] )
+			self.__rank_sum2 = sum( ranks2 )
+			self.__top_sum2 = [0] + list( np.cumsum( ranks2[::-1] ) )
+			self.__bottom_sum2 = [0] + list( np.cumsum( ranks2 ) )
+			while ( 2*( self.__exact_size + 1 ) <= self.__t_size ) and \
+				  ( ( self.__exact_size + 1 )*( self.__t_size - self.__exact_size - 1 ) <= EXACT_CUTOFF ):
+				self.__exact_size = self.__exact_size + 1
+			self.__null_dist = nullDistributions( ranks2, self.__exact_size )
 #		self.__range20_1 = range(1, 21)
 #		self.__range20_1.reverse() # the integer list from 20 to 1. this is used by standard normal probability
 
-	##
-	# Search the group which t.value less than threshold.
-	# threshold: search value
-	# tgroup: list to search threshold
-	# left_index: start index of tgroup to search
-	# right_index: end index of tgroup to search
-	##
-	def __binarySearch(self, threshold, tgroup, left_index, right_index):
-		# print tgroup and threshold
-#		print "--- binary search ---"
-#		print "threshold: " + str(threshold)
-#		for t in tgroup:
-#			print t.value,
-#		print ""
-#
-#		print "left:" + str(left_index)
-#		print "right:" + str(right_index)
-
-		if (left_index >= len(tgroup)):
-			return len(tgroup), len(tgroup)
-		
-		# compare threshold to min and max value
-		if (tgroup[left_index].value > threshold):
-			return left_index, left_index
-		if (tgroup[right_index].value < threshold):
-			return right_index, right_index
-		
-		# serach the index which all larger indexes are more than threshold.
-		mid_index = -1
-		while (left_index <= right_index):
-			mid_index = (left_index + right_index) // 2
-			mid_transaction = tgroup[mid_index]
-			
-#			print "left: " + str(left_index) + ", right: " + str(right_index)
-#			print "mid: " + str(mid_transaction.value)
-
-			# When the mid.value = threshold, finish the search.
-			if (mid_transaction.value == threshold):
-				break
-			# When the check value less than threshod, go to serach right.
-			elif (mid_transaction.value < threshold):
-				left_index = mid_index + 1
-			# When the check value >= threshold, go to search left.
-			else:
-				right_index = mid_index - 1
-
-#		print "left: " + str(left_index) + ", right: " + str(right_index)
-#		print "mid: " + str(mid_index) + " " + str(mid_transaction.value)
-		# search the same range of the threshold
-		mid_transaction = tgroup[mid_index]
-		if (mid_transaction.value == threshold):
-			min_index = mid_index
-			max_index = mid_index
-			min_transaction = tgroup[min_index]
-			max_transaction = tgroup[max_index]
-			while (min_transaction.value >= threshold):
-				min_index = min_index - 1
-				if (min_index < 0):
-					break
-				min_transaction = tgroup[min_index]
-			while (max_transaction.value <= threshold):				
-				max_index = max_index + 1
-				if (max_index >= len(tgroup)):
-					break
-				max_transaction = tgroup[max_index]
-			return min_index + 1, max_index
-		# not found the threshold in tgroup.
-		# in this case, min_index > max_index
-		elif (mid_transaction.value < threshold):
-			while (mid_transaction.value < threshold):
-				mid_index = mid_index + 1
-				mid_transaction = tgroup[mid_index]
-			return mid_index, mid_index
-		# not found the threshod in tgroup and the case of mid_transaction value > threshold
-		# In this case, min_index > max_index
-		else:
-			while (mid_transaction.value > threshold):
-				mid_index = mid_index - 1
-				mid_transaction = tgroup[mid_index]
-			return mid_index + 1, mid_index + 1
-
-	
 	##
 	# Calculate u value which measurs difference rank sum of two groups.
-	# tgroup_x: test group 1. This is consisted of transactions.
-	# tgroup_y: test group 2. This is consisted of transactions.
-	# tgroup_x and t_group_y already sorted by transaction value.
+	# The u value is the sum of the ranks of frequent_itemset - x(x+1)/2,
+	# where x is the size of frequent_itemset.
+	# frequent_itemset: the transaction IDs of the test group.
 	##
-	def __uValue(self, tgroup_x, tgroup_y):
-#		for t in tgroup_y:
-#			print t.value,
-#		print ""
-	
-		u_value = 0.0
-		previous_u_x_min = 0 # The rank of transaction in previous search
-		previous_u_x_max = 0 # The rank of transaction in previous search
-		previous_value = None # The previous expression value
-		left_index = 0 # The start point of searching value.
-		right_index = len(tgroup_y) - 1 # The end point of searching value.
-		for t_x in tgroup_x:
-#			print t_x.value
-			# u_x_min: rank sum of transaction which the value < t_x in tgroup_y
-			# u_x_max: rank sum of transaction which the value <= t_x in tgroup_y
-			u_x_min = None
-			u_y_max = None
-			# If t_x.value is equal to previous one, u_x_min and u_x_max are also equals.
-			if (t_x.value == previous_value):
-				u_x_min = previous_u_x_min
-				u_x_max = previous_u_x_max
-			# Caluclate u_value because tgroup_x value exists between tgroup_y range
-			else:
-				u_x_min, u_x_max = self.__binarySearch(t_x.value, tgroup_y, left_index, right_index)
-#				for t_y in tgroup_y:
-#					print t_y.value,
-#				print ""
-				left_index = u_x_max
-			
-#			print "min: " + str(u_x_min) + ", max: " + str(u_x_max)
-			# Add rank of t_x to u_value
-			u_value = u_value + (u_x_min+u_x_max)/2
-#			print "u_value: %f" % u_value
-			previous_u_x_min = u_x_min
-			previous_u_x_max = u_x_max
-			previous_value = t_x.value
-#		print "final u_value: %f" % u_value
-		return u_value
+	def __uValue(self, frequent_itemset):
+		size_x = len(frequent_itemset)
+		if self.__rank_array is not None:
+			rank_sum = float( self.__rank_array[ np.asarray( frequent_itemset, dtype = int ) ].sum() )
+		else:
+			rank_sum = 0.0
+			for i in frequent_itemset:
+				rank_sum = rank_sum + self.__ranks[i]
+		return rank_sum - size_x*(size_x + 1)/2
 	
 	##
 	# This function returns mean and variance which is used in U test.
+	# size_x: the size of test group 1.
+	# size_y: the size of test group 2.
 	##
-	def __calStatValue(self, tgroup_x, tgroup_y):
-		size_x = len(tgroup_x)
-		size_y = len(tgroup_y)
+	def __calStatValue(self, size_x, size_y):
 		mean_u =  (size_x*size_y)/2
 		var_u = size_x*size_y*(size_x + size_y + 1)/12
+		# tie correction in the exact mode
+		if self.__exact and ( self.__t_size > 1 ):
+			var_u = var_u - size_x*size_y*self.__tie_term/(12*self.__t_size*(self.__t_size - 1))
 		return (mean_u, var_u)
 	
 	##
 	# Calculate p-value by using Mann-Whitney U test
-	# tgroup_x: test group 1. This is consisted of transactions.
-	# tgroup_y: test group 2. This is consisted of transactions.
-	# tgroup_x and t_group_y already sorted by transaction value.
+	# u_value: u-value of the test group.
+	# size_x: the size of the test group. The other transactions are the another group.
 	##
-	def __uTest(self, tgroup_x, tgroup_y):
-		u_value = self.__uValue(tgroup_x, tgroup_y) # u-value of two groups.
+	def __uTest(self, u_value, size_x):
 		# z value of u-value
-		mean_u, var_u = self.__calStatValue(tgroup_x, tgroup_y)
+		mean_u, var_u = self.__calStatValue(size_x, self.__t_size - size_x)
 		if var_u == 0:
 			return 1.0, 0
 		z_value = (u_value - mean_u)/math.sqrt(var_u)
@@ -214,30 +132,73 @@ class FunctionOfX(fs.FunctionsSuper):
 		# calculate p-value from z_value
 		# this value approximation of standard normal distribution
 		return self.stdNorDistribution(z_value), z_value
-		
+
+	##
+	# Return True if the exact P-value is computed for the test group of size_x.
+	##
+	def __isExact(self, size_x):
+		return min( size_x, self.__t_size - size_x ) <= self.__exact_size
+
+	##
+	# Return the exact P-value from the null distribution.
+	# size_x: the size of the test group.
+	# rank_sum2: the doubled rank sum of the test group.
+	##
+	def __exactPValue(self, size_x, rank_sum2):
+		if 2*size_x > self.__t_size:
+			# use the distribution of the other group. The rank sum is larger if that of the other group is smaller.
+			lower, upper = self.__tails( self.__t_size - size_x, self.__rank_sum2 - rank_sum2 )
+		else:
+			upper, lower = self.__tails( size_x, rank_sum2 )
+		if (self.alternative == 0):
+			return min( 2*min( upper, lower ), 1.0 )
+		return upper
+
+	##
+	# Return P(R >= rank_sum2) and P(R <= rank_sum2) for the doubled rank sum R of size_x transactions.
+	##
+	def __tails(self, size_x, rank_sum2):
+		upper, lower = self.__null_dist[ size_x ]
+		if rank_sum2 < 0:
+			return 1.0, 0.0
+		if rank_sum2 >= len( upper ):
+			return 0.0, 1.0
+		return float( upper[ rank_sum2 ] ), float( lower[ rank_sum2 ] )
+
 	##
-	# divide transaction_list to two groups.
-	# One group is transactions which included itemset, the other is not.
-	# itemset: itemset. transaction_list is divided which includes this itemset or not.
+	# Calculate MASL in the exact mode.
+	# MASL is the minimum of __minPValue over the sizes up to x, so that MASL is not increased with x
+	# across the cutoff of the exact P-values.
 	##
-	def __divideGroup(self, frequent_itemset):
-		in_t_list = [] # transactions which have itemset.
-		out_t_list = [] # transactions does not have itemset.
-		# If itemset of t contains test itemset, t puts in_t_list.
-		# Else, t puts out_t_list
-		for i in range(0, len(self.__transaction_list)):
-			t = self.__transaction_list[i]
-			if i in frequent_itemset:
-				in_t_list.append(t)
-			else:
-				out_t_list.append(t)
-#		sys.stderr.write("in_t_list: \n")
-#		for t in in_t_list:
-#			sys.stderr.write("%s %s\n" % (t.name, t.value) )
-#		sys.stderr.write("out_t_list: \n")
-#		for t in out_t_list:
-#			sys.stderr.write("%s %s\n" % (t.name, t.value) )
-		return in_t_list, out_t_list
+	def __exactFuncF(self, x):
+		while len( self.__masl ) <= x:
+			y = len( self.__masl )
+			p = self.__minPValue( y )
+			if y > 0:
+				p = min( p, self.__masl[ y - 1 ] )
+			self.__masl.append( p )
+		return self.__masl[x]
+
+	##
+	# Return the minimum P-value of the test group of size x in the exact mode.
+	# The minimum P-value is given when the test group is consisted of the largest (or smallest) x ranks.
+	##
+	def __minPValue(self, x):
+		if self.__isExact( x ):
+			p = self.__exactPValue( x, self.__top_sum2[x] )
+			if (self.alternative == 0):
+				p = min( p, self.__exactPValue( x, self.__bottom_sum2[x] ) )
+			return p
+		mean_u, var_u = self.__calStatValue(x, self.__t_size - x)
+		if var_u <= 0:
+			return 1.0
+		z_value = ( self.__top_sum2[x]/2 - x*(x + 1)/2 - mean_u )/math.sqrt(var_u)
+		if (self.alternative == 0):
+			z_value = max( z_value, ( mean_u - self.__bottom_sum2[x]/2 + x*(x + 1)/2 )/math.sqrt(var_u) )
+			return min( 2*self.stdNorDistribution(z_value), 1.0 )
+		if z_value < 0:
+			return 1.0 - self.stdNorDistribution(z_value)
+		return self.stdNorDistribution(z_value)
 
 	##
 	# This function calculates the minimum p-value which support size is x.
@@ -245,19 +206,10 @@ class FunctionOfX(fs.FunctionsSuper):
 	# The z-value that minimum p-value is mean/var
 	##
 	def funcF(self, x):
+		if self.__exact:
+			return self.__exactFuncF(x)
 		# calculate p-value if the group_x is consisted from max x transactions.
-		min_t_list = self.__transaction_list[0:x]
-		max_t_list = self.__transaction_list[x:]
-#		for t in min_t_list:
-#			print t.name + " ",
-#			print t.itemset,
-#			print " " + str(t.value)
-#		print "---"
-#		for t in max_t_list:
-#			print t.name + " ",
-#			print t.itemset,
-#			print " " + str(t.value)
-		mean_u, var_u = self.__calStatValue(min_t_list, max_t_list)
+		mean_u, var_u = self.__calStatValue(x, self.__t_size - x)
 		min_z = mean_u/math.sqrt(var_u) # minimum z-value limited x.
 #		print "  mean: " + str(mean_u) + " var: " + str(var_u) + " z-value: " + str(min_z)
 		p = self.stdNorDistribution(min_z) # p-value if transaction divided into max x and other.
@@ -273,9 +225,9 @@ class FunctionOfX(fs.FunctionsSuper):
 	def calPValue(self, transaction_list, frequent_itemset):
 #		print "--- calPValue ---"
 #		print frequent_itemset
-		all_size = self.__t_size # the number of all transaction (n1 + n0)
-		in_t_list, out_t_list = self.__divideGroup(frequent_itemset) # dvide transactions to itemset or not.
-		p_value, z_value = self.__uTest(in_t_list, out_t_list)
+		size_x = len(frequent_itemset)
+		u_value = self.__uValue(frequent_itemset) # u-value of two groups.
+		p_value, z_value = self.__uTest(u_value, size_x)
 		if (self.alternative == 0):
 			p_value = min( p_value * 2., 1.0 )
 		else:
@@ -283,8 +235,51 @@ class FunctionOfX(fs.FunctionsSuper):
 				p_value = 1. - p_value
 			if (self.alternative < 0):
 				z_value = -z_value
+		if self.__exact and self.__isExact(size_x):
+			p_value = self.__exactPValue( size_x, int( round( 2*u_value + size_x*(size_x + 1) ) ) )
 		self.calTime = self.calTime + 1
 		return p_value, z_value
+
+	##
+	# Return the ranks of the transactions.
+	# The sum of the ranks over the transactions of a pattern gives the u-value.
+	# As calPValue, the values in transaction_list are not used.
+	##
+	def statVector(self, transaction_list):
+		return self.__rank_array.copy()
+
+	##
+	# Calculate P-values of the patterns from the sizes and the rank sums.
+	# The u-value is the rank sum - x(x+1)/2.
+	# sizes: the array of x (the number of transactions which have the pattern)
+	# stats: the array of the rank sums of the transactions
+	##
+	def calPValuesFromStats(self, sizes, stats):
+		size_x = np.asarray( sizes, dtype = float )
+		size_y = self.__t_size - size_x
+		u_value = stats - size_x*(size_x + 1)/2
+		mean_u, var_u = self.__calStatValue(size_x, size_y)
+		with np.errstate( divide = 'ignore', invalid = 'ignore' ):
+			z_value = np.where( var_u > 0, (u_value - mean_u)/np.sqrt(var_u), 0.0 )
+		p_value = np.where( var_u > 0, self.stdNorDistributions(z_value), 1.0 )
+		if (self.alternative == 0):
+			p_value = np.minimum( p_value * 2., 1.0 )
+		else:
+			p_value = np.where( z_value < 0, 1. - p_value, p_value )
+			if (self.alternative < 0):
+				z_value = -z_value
+		if self.__exact:
+			# compute the exact P-value once for each pair of the size and the rank sum
+			sizes = np.asarray( sizes, dtype = int )
+			exact = np.minimum( sizes, self.__t_size - sizes ) <= self.__exact_size
+			if np.any( exact ):
+				width = self.__rank_sum2 + 1
+				keys, inverse = np.unique( sizes[ exact ] * width + np.rint( 2*stats[ exact ] ).astype( int ), \
+										   return_inverse = True )
+				key_p_values = np.array( [ self.__exactPValue( int( k // width ), int( k % width ) ) for k in keys ] )
+				p_value[ exact ] = key_p_values[ inverse ]
+		self.calTime = self.calTime + len( size_x )
+		return p_value, z_value
 	
 	##
 	# test code about stdNorDistribution
@@ -295,6 +290,59 @@ class FunctionOfX(fs.FunctionsSuper):
 #			p = self.stdNorDistribution(i)
 #			print str(i) + " " + str(p)
 
+##
+# Return the ranks of the values. The tied values have the average of their ranks.
+# The rank starts from 1.
+##
+def midRanks(values):
+	order = sorted( range( 0, len(values) ), key = lambda i: values[i] )
+	ranks = [0.0]*len(values)
+	i = 0
+	while i < len(order):
+		j = i
+		while ( j + 1 < len(order) ) and ( values[ order[j + 1] ] == values[ order[i] ] ):
+			j = j + 1
+		rank = (i + j)/2 + 1
+		for k in range( i, j + 1 ):
+			ranks[ order[k] ] = rank
+		i = j + 1
+	return ranks
+
+##
+# Return the sum of t^3 - t over the groups of the tied ranks, where t is the size of the group.
+##
+def tieTerm(ranks):
+	counts = {}
+	for r in ranks:
+		counts[r] = counts.get(r, 0) + 1
+	term = 0
+	for t in counts.values():
+		term = term + t**3 - t
+	return term
+
+##
+# Compute the null distributions of the rank sum by dynamic programming.
+# ranks2: the doubled ranks (integers) of all transactions.
+# max_x: the maximum size of the test group.
+# Return the list of the tuples (upper, lower) for the size from 0 to max_x,
+# where upper[s] = P(R >= s) and lower[s] = P(R <= s) for the doubled rank sum R.
+##
+def nullDistributions(ranks2, max_x):
+	if max_x < 0:
+		return []
+	max_sum = sum( sorted( ranks2, reverse = True )[0:max_x] )
+	# counts[x][s]: the number of x transactions whose doubled rank sum is s
+	counts = np.zeros( ( max_x + 1, max_sum + 1 ) )
+	counts[0, 0] = 1.0
+	for r in ranks2:
+		if r <= max_sum:
+			counts[1:, r:] += counts[:-1, :max_sum + 1 - r]
+	null_dist = []
+	for x in range( 0, max_x + 1 ):
+		prob = counts[x] / counts[x].sum()
+		null_dist.append( ( np.cumsum( prob[::-1] )[::-1], np.cumsum( prob ) ) )
+	return null_dist
+
 ##
 # Make mapping from column_name to column ID
 ##
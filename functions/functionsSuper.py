@@ -30,12 +30,32 @@ SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 # Define functions which is used the each test method (fisher, t_test, u_test and so on.).
 # Definition about Errors and combinations.
 # @author Terada 10, Nov., 2011
-import sys, math
+# calPValues computes the P-values of many patterns at once by NumPy.
+# Each test class defines statVector and calPValuesFromStats for that.
+# The binary values of the transactions are kept as the label vector (bytearray) and
+# the bitset (integer) to count the positives without accessing the transactions.
+# For the binary values, the batch can also be given by CountBatch, which has only the number of
+# transactions and the number of positives of each pattern (counted by LCM with the labels).
+import sys, math, numbers
+try:
+	import numpy as np
+except ImportError:
+	np = None
 
 class TestMethodError(Exception):
 	def __init__(self, e):
 		sys.stderr.write("TestMethodError: " + e + "\n")
 
+##
+# The batch of the patterns given by the numbers instead of the transaction IDs.
+# sizes: the list of x (the number of transactions which have the pattern)
+# positives: the list of a (the number of positives in the transactions)
+##
+class CountBatch:
+	def __init__(self, sizes, positives):
+		self.sizes = sizes
+		self.positives = positives
+
 class FunctionsSuper:
 	def __init__(self):
 		## self.__range20_1 = range(1, 21)
@@ -43,6 +63,9 @@ class FunctionsSuper:
                 # For compatiable statement between py2x and py3x
 		self.__range20_1 = list( range(1, 21) )
 		self.__range20_1 = self.__range20_1[::-1] # the integer list from 20 to 1. this is used by standard normal probability
+		self.__label_source = None # the transaction list from which the labels are made
+		self.__labels = None # label vector. the i-th element is the value of the i-th transaction (0 or 1)
+		self.__label_bits = None # bitset. the i-th bit is the value of the i-th transaction
 	
 	##
 	# Calculate combination C(n, m)
@@ -116,21 +139,214 @@ class FunctionsSuper:
 #		print str(x) + " " + str(p)
 		return p
 
+	##
+	# Calculate the probabilities of standard normal distribution for the array.
+	# This is the same computation as stdNorDistribution.
+	##
+	def stdNorDistributions(self, x):
+		pi2 = 0.398942280401432677940
+		y = np.abs( np.asarray( x, dtype = float ) )
+		c = y*y
+		z = np.exp(-c*0.5)*pi2
+		with np.errstate( divide = 'ignore', invalid = 'ignore', over = 'ignore' ):
+			# y < 2.5
+			is_value = -1
+			p = np.zeros( y.shape )
+			for i in self.__range20_1:
+				p = i*c/(i*2+1+is_value*p)
+				is_value = -is_value
+			p_small = 0.5-z*y/(1.0-p)
+			# y >= 2.5
+			p = np.zeros( y.shape )
+			for i in self.__range20_1:
+				p = i/(y+p)
+			p_large = z/(y+p)
+		return np.where( y < 2.5, p_small, p_large )
+
+	##
+	# Calculate P-values of the patterns.
+	# transaction_list: List of transactions
+	# batch: the transactions of the patterns. This is the list of transaction ID lists,
+	#        or the tuple (indptr, indices) of the CSR format, that is, the transactions of
+	#        the i-th pattern are indices[indptr[i]:indptr[i+1]].
+	#        For the binary values, the batch can be CountBatch.
+	# Return the arrays of P-values and statistic scores.
+	# If NumPy is not installed, calPValue is called for each pattern and the lists are returned.
+	##
+	def calPValues(self, transaction_list, batch):
+		if isinstance( batch, CountBatch ):
+			return self.calPValuesFromCounts( batch.sizes, batch.positives )
+		if np == None:
+			p_values = []; stat_scores = []
+			for flag_transactions_id in self.__iterBatch( batch ):
+				p, stat_score = self.calPValue( transaction_list, flag_transactions_id )
+				p_values.append( p ); stat_scores.append( stat_score )
+			return p_values, stat_scores
+		indptr, indices = self.batch2CSR( batch )
+		sizes = np.diff( indptr )
+		stats = self.sumByPattern( self.statVector( transaction_list ), indptr, indices )
+		return self.calPValuesFromStats( sizes, stats )
+
+	def __iterBatch(self, batch):
+		if isinstance( batch, tuple ):
+			indptr, indices = batch
+			for i in range( 0, len( indptr ) - 1 ):
+				yield indices[ indptr[i]:indptr[i+1] ]
+		else:
+			for flag_transactions_id in batch:
+				yield flag_transactions_id
+
+	##
+	# Convert the batch to the tuple (indptr, indices) of the NumPy arrays.
+	##
+	def batch2CSR(self, batch):
+		if isinstance( batch, tuple ):
+			indptr, indices = batch
+			return np.asarray( indptr, dtype = int ), np.asarray( indices, dtype = int )
+		indptr = np.zeros( len( batch ) + 1, dtype = int )
+		indptr[1:] = np.cumsum( [ len( t ) for t in batch ] )
+		indices = np.zeros( indptr[-1], dtype = int )
+		for i in range( 0, len( batch ) ):
+			indices[ indptr[i]:indptr[i+1] ] = batch[i]
+		return indptr, indices
+
+	##
+	# Return the sum of the values over the transactions of each pattern.
+	# values: the vector of the transactions, or the matrix whose rows are the vectors.
+	#         For the matrix, the sums are computed for each row.
+	##
+	def sumByPattern(self, values, indptr, indices):
+		sums = np.zeros( values.shape[:-1] + ( len( indptr ) - 1, ) )
+		if len( indices ) == 0:
+			return sums
+		nonempty = indptr[:-1] < indptr[1:]
+		sums[ ..., nonempty ] = np.add.reduceat( values[ ..., indices ], indptr[:-1][ nonempty ], axis = -1 )
+		return sums
+
+	##
+	# Return the array of the values of the transactions.
+	# The statistic of a pattern is computed from the sum of the values over its transactions.
+	##
+	def statVector(self, transaction_list):
+		if isLabelVector( transaction_list ):
+			return np.asarray( transaction_list, dtype = float )
+		return np.array( [ t.value for t in transaction_list ], dtype = float )
+
+	##
+	# Calculate P-values from the sizes of the patterns and the sums of statVector.
+	# This method is defined in each test class.
+	##
+	def calPValuesFromStats(self, sizes, stats):
+		raise TestMethodError( "calPValuesFromStats is not defined in %s" % self.__class__.__name__ )
+
+	##
+	# Calculate P-values from the numbers of transactions and positives of the patterns.
+	# If NumPy is not installed, calPValueFromCount is called for each pattern.
+	##
+	def calPValuesFromCounts(self, sizes, positives):
+		if np == None:
+			p_values = []; stat_scores = []
+			for i in xrange( 0, len( sizes ) ):
+				p, stat_score = self.calPValueFromCount( sizes[i], positives[i] )
+				p_values.append( p ); stat_scores.append( stat_score )
+			return p_values, stat_scores
+		return self.calPValuesFromStats( np.asarray( sizes, dtype = int ), np.asarray( positives, dtype = float ) )
+
+	##
+	# Calculate P-value from x and a of the pattern.
+	# This method is defined in the test classes for the binary values.
+	##
+	def calPValueFromCount(self, total_row1, pos_size):
+		raise TestMethodError( "calPValueFromCount is not defined in %s" % self.__class__.__name__ )
+
+	##
+	# Return the label vector of the binary values.
+	# The vector is made once for each transaction list.
+	# transaction_list: list of transactions, or the label vector itself.
+	##
+	def labelVector( self, transaction_list ):
+		if isLabelVector( transaction_list ):
+			return transaction_list
+		if not ( transaction_list is self.__label_source ):
+			self.__labels = bytearray( [ int( t.value ) for t in transaction_list ] )
+			self.__label_bits = None
+			self.__label_source = transaction_list
+		return self.__labels
+
+	##
+	# Return the bitset of the binary values. The i-th bit is 1 if the i-th transaction is positive.
+	##
+	def labelBits( self, transaction_list ):
+		labels = self.labelVector( transaction_list )
+		if not ( labels is self.__labels ):
+			return vector2bits( labels )
+		if self.__label_bits == None:
+			self.__label_bits = vector2bits( labels )
+		return self.__label_bits
+
+	##
+	# Return the number of positive transactions in flag_transactions_id.
+	# flag_transactions_id: the list (or array) of transaction IDs, or the bitset of the transactions.
+	##
+	def countPositives( self, transaction_list, flag_transactions_id ):
+		if isinstance( flag_transactions_id, numbers.Integral ):
+			return popCount( self.labelBits( transaction_list ) & flag_transactions_id )
+		labels = self.labelVector( transaction_list )
+		if ( np != None ) and isinstance( flag_transactions_id, np.ndarray ):
+			if isinstance( labels, bytearray ):
+				labels = np.frombuffer( labels, dtype = np.uint8 )
+			return int( np.count_nonzero( labels[ flag_transactions_id ] ) )
+		pos_size = 0
+		for i in flag_transactions_id:
+			pos_size = pos_size + labels[i]
+		return pos_size
+
 	##
 	# Make the contingency table.
 	# This function is used by fisher, chi-square test and exact logistic regression.
+	# transaction_list: list of transactions, or the label vector.
+	# flag_transactions_id: the list of transaction IDs, or the bitset of the transactions.
 	##
 	def contingencyTable( self, transaction_list, flag_transactions_id, total, total_col1 ):
+		# count trahsaction which contains itemset and flag is 1. (This is indicate a of paper.)
+		if isinstance( flag_transactions_id, numbers.Integral ):
+			total_row1 = popCount( flag_transactions_id )
+		else:
+			total_row1 = len(flag_transactions_id) # count all size that flag = 1 (x of paper)
+		pos_size = self.countPositives( transaction_list, flag_transactions_id )
+		return self.countTable( total_row1, pos_size, total, total_col1 )
+
+	##
+	# Make the contingency table from x and a.
+	##
+	def countTable( self, total_row1, pos_size, total, total_col1 ):
 		ovalues = [ [0, 0], [0, 0] ]
 		total_col2 = total - total_col1 # the number of all flag 0 transactio (n0)
-		# count trahsaction which contains itemset and flag is 1. (This is indicate a of paper.)
-		total_row1 = len(flag_transactions_id) # count all size that flag = 1 (x of paper)
-		for i in flag_transactions_id:
-			t = transaction_list[i]
-			# If t flag = 1, then sum_has_flag ++.
-			ovalues[0][0] = ovalues[0][0] + t.value
-		ovalues[0][0] = int(ovalues[0][0])
+		ovalues[0][0] = pos_size
 		ovalues[0][1] = total_row1 - ovalues[0][0] # the number of transaction which contains itemset and flag is 0 (This is indicate b of paper)
 		ovalues[1][0] = total_col1 - ovalues[0][0]
 		ovalues[1][1] = total_col2 - ovalues[0][1]
 		return ovalues
+
+##
+# Return True if the argument is the label vector (not the list of transactions).
+##
+def isLabelVector( transaction_list ):
+	if isinstance( transaction_list, bytearray ):
+		return True
+	return ( np != None ) and isinstance( transaction_list, np.ndarray )
+
+##
+# Convert the label vector to the bitset. The i-th bit is the i-th label.
+##
+def vector2bits( labels ):
+	bit_str = "".join( [ "1" if labels[i] else "0" for i in range( len(labels) - 1, -1, -1 ) ] )
+	if len( bit_str ) == 0:
+		return 0
+	return int( bit_str, 2 )
+
+##
+# Return the number of 1 in the bitset.
+##
+def popCount( bits ):
+	return bin( bits ).count( "1" )
@@ -30,8 +30,29 @@ SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 # Table for storing P-value.
 # This source is used in Fisher's exact test and Chi-square test.
 # @author Terada, 16, Apr, 2013
+# PvalTable stores the values in the nested dictionary.
+# ArrayPvalTable stores the values in the 2-D array of NumPy, and NaN means the value is not stored.
+# newPvalTable returns ArrayPvalTable if NumPy is installed and the table is not too large.
 
 import sys
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+MAX_ARRAY_SIZE = 2**24 # the maximum number of elements of ArrayPvalTable created by newPvalTable
+
+##
+# Return the table for storing P-values.
+# row_size: the maximum row index expected.
+# col_size: the maximum column index expected. If None, it is the same as row_size.
+##
+def newPvalTable( row_size, col_size = None ):
+	if col_size == None:
+		col_size = row_size
+	if ( np != None ) and ( (row_size + 1) * (col_size + 1) <= MAX_ARRAY_SIZE ):
+		return ArrayPvalTable( row_size, col_size )
+	return PvalTable( row_size )
 
 class PvalTable():
 	def __init__( self, row_size ):
@@ -60,7 +81,16 @@ class PvalTable():
 	def hashSize( self ):
 		size = 0
 		for row in self.table:
-			size = size + len( self.table )
+			size = size + len( self.table[row] )
+		return size
+
+	##
+	# Return the memory size of the dictionaries in bytes (the stored values are not included).
+	##
+	def memorySize( self ):
+		size = sys.getsizeof( self.table )
+		for row in self.table:
+			size = size + sys.getsizeof( self.table[row] )
 		return size
 
 	def output( self ):
@@ -71,3 +101,67 @@ class PvalTable():
 				sys.stdout.write(" %s:%s" % (j, row[j]))
 			sys.stdout.write("\n")
 	
+
+##
+# Table for storing P-value in the 2-D array.
+# The array is extended when the value out of the range is put.
+##
+class ArrayPvalTable():
+	def __init__( self, row_size, col_size = None ):
+		if col_size == None:
+			col_size = row_size
+		self.table = np.empty( (row_size + 1, col_size + 1) )
+		self.table.fill( np.nan )
+
+	def getValue( self, row, col ):
+		table = self.table
+		if ( row < table.shape[0] ) and ( col < table.shape[1] ):
+			value = table.item( int( row ), int( col ) )
+			if value == value: # value is not NaN
+				return value
+		return -1
+
+	##
+	# Return the values of (rows[i], cols[i]) as the array. NaN means the value is not stored.
+	##
+	def getValues( self, rows, cols ):
+		rows = np.asarray( rows ); cols = np.asarray( cols )
+		values = np.empty( rows.shape )
+		values.fill( np.nan )
+		in_range = ( rows < self.table.shape[0] ) & ( cols < self.table.shape[1] )
+		values[ in_range ] = self.table[ rows[ in_range ], cols[ in_range ] ]
+		return values
+
+	def putValue( self, row, col, pval ):
+		row = int( row ); col = int( col )
+		if ( row >= self.table.shape[0] ) or ( col >= self.table.shape[1] ):
+			self.__extend( row, col )
+		self.table[row, col] = pval
+
+	##
+	# Extend the array to contain (row, col).
+	##
+	def __extend( self, row, col ):
+		row_num, col_num = self.table.shape
+		row_num = max( row + 1, row_num ); col_num = max( col + 1, col_num )
+		table = np.empty( (row_num, col_num) )
+		table.fill( np.nan )
+		table[ :self.table.shape[0], :self.table.shape[1] ] = self.table
+		self.table = table
+
+	def hashSize( self ):
+		return int( np.count_nonzero( ~np.isnan( self.table ) ) )
+
+	##
+	# Return the memory size of the array in bytes.
+	##
+	def memorySize( self ):
+		return self.table.nbytes
+
+	def output( self ):
+		for i in xrange( 0, self.table.shape[0] ):
+			sys.stdout.write("[%s]" % i)
+			for j in xrange( 0, self.table.shape[1] ):
+				if not np.isnan( self.table[i, j] ):
+					sys.stdout.write(" %s:%s" % (j, self.table[i, j]))
+			sys.stdout.write("\n")
@@ -43,6 +43,9 @@ import sys, os.path, time, datetime, math
 import transaction
 import readFile
 import frepattern.frequentPatterns as frequentPatterns
+import frepattern.lcmInProcess as lcmInProcess
+import frepattern.patternCache as patternCache
+import frepattern.patternStore as patternStore
 from optparse import OptionParser
 
 import functions.functionsSuper as fs
@@ -55,6 +58,9 @@ import functions.functions4chi as functions4chi
 __version__ = "2.0.3"
 
 BINARY_METHODS = tuple( [ "fisher", "chi" ] )
+LCM_P_MODES = { "fisher": 1, "chi": 2 } # the test in LCM (-LAMP_P of lcm53)
+MINERS = tuple( [ "lcm", "python" ] ) # lcm -> run lcm53 program, python -> enumerate in this process
+LAMBDA_SEARCHES = tuple( [ "linear", "bisect", "depth" ] ) # the search of lambda for U-test (depth -> depthFirst)
 
 class MASLError(Exception):
 	def __init__(self, e):
@@ -91,6 +97,20 @@ def reverseValue( transaction_list, set_method ):
 	transaction_list.reverse()
 	return transaction_list
 
+##
+# Return the instance to enumerate the frequent patterns.
+# miner: "lcm" runs the lcm53 program, "python" enumerates the patterns in this process.
+#        The python miner does not need lcm53, and it does not write the files for LCM.
+#        It is slower than lcm53 on the large closed patterns (e.g. 1.3 sec. vs 0.24 sec. for 12.7k genes
+#        down to the support 150), and it is as fast as lcm53 on the small patterns.
+# stream: If True, the patterns are not stored, and they are enumerated again when tested.
+# compact: If True, the patterns are stored in the flat arrays.
+##
+def newFrequentPatterns( miner, lcm_path, max_lambda, outlog, stream = False, compact = False ):
+	if miner == "python":
+		return lcmInProcess.LCMInProcess( max_lambda, outlog, stream, compact )
+	return frequentPatterns.LCM( lcm_path, max_lambda, outlog, stream, compact )
+
 ##
 # Return the bound of given minimum support.
 ##
@@ -113,21 +133,42 @@ def calBound( func_f, min_sup, fre_pattern ):
 # lcm2transaction_id: Mapping between LCM ID to transaction id.
 # set_method: The procedure name for calibration p-value (fisher/u_test).
 # alternative: hypothesis, 1 -> greater, 0 -> two sided, -1 -> less
+# miner: the program to enumerate the frequent patterns (lcm/python).
+# stream: If True, the frequent patterns are counted without storing them.
+# compact: If True, the frequent patterns are stored in the flat arrays.
+# precompute: If True, the P-values of Fisher's exact test are computed for all tables in advance.
+# exact: If True, the exact P-values of U-test are computed for the small groups.
+# prefetch: If True, the combinations are enumerated once at the lower bound of lambda in breadthFirst.
+# lambda_search: the search of the optimal lambda for U-test, linear/bisect in breadthFirst or depth in depthFirst.
+# cache: instance of PatternCache to reuse the frequent patterns. If None, the patterns are not cached.
+# transport: the transport of the input and the output of LCM (file/pipe).
+# count_positives: If True, the numbers of positives of the patterns are counted by LCM in the stream mode.
+# lcm_jobs: the number of processes to run LCM.
+# lcm_output: the output format of LCM for the combinations (text/binary).
 ##
-def runMultTest(transaction_list, trans4lcm, threshold, set_method, lcm_path, max_comb, outlog, alternative):
+def runMultTest(transaction_list, trans4lcm, threshold, set_method, lcm_path, max_comb, outlog, alternative, \
+				miner = "lcm", stream = False, compact = False, precompute = False, exact = False, prefetch = False, \
+		lambda_search = "linear", cache = None, transport = "file", count_positives = False, lcm_jobs = 1, \
+		lcm_output = "text"):
 	max_lambda = maxLambda(transaction_list)
 	lam_star = 1; func_f = None;
 	try:
 		if set_method == "fisher":
-			func_f = functions4fisher.FunctionOfX(transaction_list, max_lambda, abs(alternative))
+			func_f = functions4fisher.FunctionOfX(transaction_list, max_lambda, abs(alternative), precompute)
 		elif set_method == "u_test":
-			func_f = functions4u_test.FunctionOfX(transaction_list, alternative)
+			func_f = functions4u_test.FunctionOfX(transaction_list, alternative, exact)
 		elif set_method == "chi":
 			func_f = functions4chi.FunctionOfX(transaction_list, max_lambda, abs( alternative))
 		else:
 			sys.stderr.write("Error: choose \"fisher\", \"chi\" or \"u_test\" by using -p option.\n")
 			outlog.close()
 			sys.exit()
+		# LCM-LAMP computes the MASL of U-test by the normal approximation,
+		# so the optimal lambda is not consistent with the exact P-values.
+		if ( set_method == "u_test" ) and exact and ( lambda_search == "depth" ):
+			sys.stderr.write("Error: \"lambda_search\" depth is not available with --exact.\n")
+			outlog.close()
+			sys.exit()
 		
 		lam = max_lambda
 		
@@ -138,8 +179,15 @@ def runMultTest(transaction_list, trans4lcm, threshold, set_method, lcm_path, ma
 				max_lambda = int( n1 )
 				lam = int( n1 )
 		
-		fre_pattern = frequentPatterns.LCM(lcm_path, max_lambda, outlog)
+		fre_pattern = newFrequentPatterns(miner, lcm_path, max_lambda, outlog, stream, compact)
+		fre_pattern.setTransport( transport )
+		fre_pattern.setJobs( lcm_jobs )
+		fre_pattern.setOutputFormat( lcm_output )
 		fre_pattern.makeFile4Lem(transaction_list, trans4lcm) # make itemset file for lcm
+		if stream and count_positives and ( set_method in BINARY_METHODS ):
+			fre_pattern.makeLabelFile( [ int( t.value ) for t in transaction_list ], trans4lcm + ".label" )
+		if cache != None:
+			fre_pattern.setCache( cache, transaction_list )
 		
 		# If Fisher's exact test or chi-square test is used for computing P-value, 
 		# LCM-LAMP is run to find optimal lambda.
@@ -162,13 +210,20 @@ def runMultTest(transaction_list, trans4lcm, threshold, set_method, lcm_path, ma
 				fre_pattern, lam_star = depthFirst( trans4lcm, fre_pattern, max_comb, n1, threshold, 2 )
 		# If Mann-Whitney U test of Chi-square test is used,
 		# LAMP ver 1. is run for computing the optimal lambda. 
+		# In the depth search, LCM-LAMP is run with the MASL of U-test,
+		# and lambda is not larger than max_lambda as breadthFirst.
 		else:
+			bf_threshold = threshold
 			# two-sided hypothesis test
 			if alternative == 0:
-				fre_pattern, lam_star = breadthFirst( trans4lcm, fre_pattern, func_f, max_comb, 0.5*threshold, lam, outlog )
-			# one-sided hypothesis test
-			else:
-				fre_pattern, lam_star = breadthFirst( trans4lcm, fre_pattern, func_f, max_comb, threshold, lam, outlog )
+				bf_threshold = 0.5*threshold
+			if lambda_search == "depth":
+				fre_pattern, lam_star = depthFirst( trans4lcm, fre_pattern, max_comb, lam + 1, bf_threshold, 3 )
+			elif prefetch:
+				fre_pattern.setPrefetchSupport( minTestableSupport( func_f, lam, bf_threshold ) )
+			if lambda_search != "depth":
+				fre_pattern, lam_star = breadthFirst( trans4lcm, fre_pattern, func_f, max_comb, bf_threshold, lam, \
+													  outlog, lambda_search )
 	except fs.TestMethodError as e:
 		sys.exit()
 	except frequentPatterns.LCMError as e:
@@ -177,6 +232,7 @@ def runMultTest(transaction_list, trans4lcm, threshold, set_method, lcm_path, ma
 	try:
 		fre_pattern.frequentPatterns( trans4lcm, lam_star, max_comb ) # P_lambda* at line 13
 		k = fre_pattern.getTotal( lam_star )
+		fre_pattern.saveCache()
 	except frequentPatterns.LCMError as e:
 		sys.exit()
 	
@@ -192,6 +248,19 @@ def runMultTest(transaction_list, trans4lcm, threshold, set_method, lcm_path, ma
 	correction_term_time = time.time()
 	return (fre_pattern, lam_star, max_lambda, correction_term_time, func_f)
 
+##
+# Return the smallest support x whose MASL is up to threshold.
+# lambda found by breadthFirst is not smaller than this value unless no combination has the support.
+# func_f: Instance to perform the statistical test.
+# lam: The initializing value of lambda.
+# threshold: Significance level.
+##
+def minTestableSupport( func_f, lam, threshold ):
+	x = lam
+	while ( x > 1 ) and ( func_f.funcF( x - 1 ) <= threshold ):
+		x = x - 1
+	return x
+
 ##
 # Find the optimal lambda by breadth first algorithm.
 # This function is called when Mann-Whitney U- test of Chi-square test is selected as the statistical test. 
@@ -201,61 +270,110 @@ def runMultTest(transaction_list, trans4lcm, threshold, set_method, lcm_path, ma
 # max_comb: The maximum arity limit.
 # threshold: Significance level.
 # lam: The initializing value of lambda. 
+# search: "linear" -> lambda is decreased one by one, "bisect" -> lambda is found by bisectLambda.
 ##
-def breadthFirst( trans4lcm, fre_pattern, func_f, max_comb, threshold, lam, outlog ):
+def breadthFirst( trans4lcm, fre_pattern, func_f, max_comb, threshold, lam, outlog, search = "linear" ):
+	if search == "bisect":
+		return fre_pattern, bisectLambda( trans4lcm, fre_pattern, func_f, max_comb, threshold, lam, outlog )
 	# solve K and lambda
 	while lam > 1:
-		outlog.write("--- lambda: " + str(lam) + " ---\n")
-		# if lambda == 1, all tests which support >= 1 are tested.
-		if lam == 1:
-			lam_star = lam
-			fre_pattern.frequentPatterns( trans4lcm, lam, max_comb ) # line 3 of Algorithm
-			k = fre_pattern.getTotal( lam )
-			break
-	
-		fre_pattern.frequentPatterns( trans4lcm, lam, max_comb ) # line 3 of Algorithm
-		m_lambda = fre_pattern.getTotal( lam ) # line 4 of Algorithm
-		outlog.write("  m_lambda: " + str(m_lambda) + "\n")
-		
-		f_lam_1 = calBound( func_f, lam-1, fre_pattern ) # f(lam-1)
-		outlog.write("  f(" + str(lam-1) + ") = " + str(f_lam_1) + "\n")
-		if (f_lam_1 == 0):
-			bottom = sys.maxint
-		else:
-			bottom = (threshold//f_lam_1) + 1 # bottom of line 5 of Algorithm
-		f_lam = calBound( func_f, lam, fre_pattern ) # f(lam)
-		outlog.write("  f(" + str(lam) + ") = " + str(f_lam) + "\n")
-		# If f(lambda) > f(lambda-1), raise error.
-		# Because MASL f(x) is smaller if x is larger.
-		if f_lam > f_lam_1:
-			sys.stderr.write("MASLError: f(%s) = %.3g is larger than f(%s) = %.3g\n" \
-							 % (lam, f_lam, lam-1, f_lam_1))
-			sys.exit()
-		if (f_lam == 0):
-			top = sys.maxint
-		else:
-			top = threshold//f_lam # top of line 5 of Algorithm
-		outlog.write("  " + str(bottom) + " <= m_lam:" + str(m_lambda) + " <= " + str(top) + "?\n")
-		if bottom <= m_lambda and m_lambda <= top: # branch on condition of line 5
-			k = m_lambda
-			lam_star = lam
-			break
-		outlog.write("  " + str(m_lambda) + " > " + str(top) + "?\n")
-		if m_lambda > top: # branch on condition of line 8
-			lam_star = lam
+		if isLambdaStar( trans4lcm, fre_pattern, func_f, max_comb, threshold, lam, outlog ):
 			break
 		lam = lam -1
 	return fre_pattern, lam
 
+##
+# Find the optimal lambda by the binary search.
+# isLambdaStar is monotone: If it holds for lam, it also holds for the smaller lambda,
+# because m_lambda is not decreased and f(lambda-1) is not decreased when lambda is decreased.
+# So the largest lambda for which isLambdaStar holds, that is the result of the linear search,
+# is found by O(log lam) calls. The search starts from minTestableSupport, and each lambda
+# is tested by isLambdaStarUpTo, which stops mining at the number of patterns needed for the test.
+# So no probe mines the patterns below lambda* more than the linear search, and the patterns
+# mined by the probes above lambda* are kept and reused when runMultTest mines lambda*.
+##
+def bisectLambda( trans4lcm, fre_pattern, func_f, max_comb, threshold, lam, outlog ):
+	low = minTestableSupport( func_f, lam, threshold ); high = lam # lambda* is between low and high.
+	# minTestableSupport is not the lower bound if no combination has the support.
+	if fre_pattern.frequentPatternsUpTo( trans4lcm, low, max_comb, 1 ) == 0:
+		low, high = 1, low - 1
+	while low < high:
+		mid = (low + high + 1) // 2
+		if isLambdaStarUpTo( trans4lcm, fre_pattern, func_f, max_comb, threshold, mid, outlog ):
+			low = mid
+		else:
+			high = mid - 1
+	return max( low, 1 )
+
+##
+# Return True if isLambdaStar holds for lam.
+# isLambdaStar holds if and only if bottom <= m_lambda, because top >= bottom - 1 when f(lam) <= f(lam-1).
+# So the patterns are mined only up to bottom (see frequentPatternsUpTo). If lam <= lambda*,
+# bottom <= m_lambda* holds and the mining is stopped before it finds more patterns than
+# the linear search stores at lambda*. If the mining is not stopped, the patterns are stored.
+##
+def isLambdaStarUpTo( trans4lcm, fre_pattern, func_f, max_comb, threshold, lam, outlog ):
+	outlog.write("--- lambda: " + str(lam) + " ---\n")
+	f_lam_1 = calBound( func_f, lam-1, fre_pattern ) # f(lam-1)
+	f_lam = calBound( func_f, lam, fre_pattern ) # f(lam)
+	if f_lam > f_lam_1:
+		sys.stderr.write("MASLError: f(%s) = %.3g is larger than f(%s) = %.3g\n" \
+						 % (lam, f_lam, lam-1, f_lam_1))
+		sys.exit()
+	if (f_lam_1 == 0):
+		bottom = sys.maxint
+	else:
+		bottom = int( threshold//f_lam_1 ) + 1 # bottom of line 5 of Algorithm
+	m_lambda = fre_pattern.frequentPatternsUpTo( trans4lcm, lam, max_comb, bottom )
+	outlog.write("  " + str(bottom) + " <= m_lam:" + str(m_lambda) + "?\n")
+	return bottom <= m_lambda
+
+##
+# Return True if the condition of line 5 or line 8 of Algorithm holds for lam,
+# that is, breadthFirst stops at lam.
+##
+def isLambdaStar( trans4lcm, fre_pattern, func_f, max_comb, threshold, lam, outlog ):
+	outlog.write("--- lambda: " + str(lam) + " ---\n")
+	fre_pattern.frequentPatterns( trans4lcm, lam, max_comb ) # line 3 of Algorithm
+	m_lambda = fre_pattern.getTotal( lam ) # line 4 of Algorithm
+	outlog.write("  m_lambda: " + str(m_lambda) + "\n")
+	
+	f_lam_1 = calBound( func_f, lam-1, fre_pattern ) # f(lam-1)
+	outlog.write("  f(" + str(lam-1) + ") = " + str(f_lam_1) + "\n")
+	if (f_lam_1 == 0):
+		bottom = sys.maxint
+	else:
+		bottom = (threshold//f_lam_1) + 1 # bottom of line 5 of Algorithm
+	f_lam = calBound( func_f, lam, fre_pattern ) # f(lam)
+	outlog.write("  f(" + str(lam) + ") = " + str(f_lam) + "\n")
+	# If f(lambda) > f(lambda-1), raise error.
+	# Because MASL f(x) is smaller if x is larger.
+	if f_lam > f_lam_1:
+		sys.stderr.write("MASLError: f(%s) = %.3g is larger than f(%s) = %.3g\n" \
+						 % (lam, f_lam, lam-1, f_lam_1))
+		sys.exit()
+	if (f_lam == 0):
+		top = sys.maxint
+	else:
+		top = threshold//f_lam # top of line 5 of Algorithm
+	outlog.write("  " + str(bottom) + " <= m_lam:" + str(m_lambda) + " <= " + str(top) + "?\n")
+	if bottom <= m_lambda and m_lambda <= top: # branch on condition of line 5
+		return True
+	outlog.write("  " + str(m_lambda) + " > " + str(top) + "?\n")
+	if m_lambda > top: # branch on condition of line 8
+		return True
+	return False
+
 ##
 # Find the optimal lambda by depth first algorithm.
-# This function is called when Fisher's exact test or Chi-square is selected. 
+# This function is called when Fisher's exact test or Chi-square is selected,
+# or U-test is selected with the depth search of lambda.
 # trans4lcm: File name to run LCM. 
 # fre_pattern: Instance to run LCM. 
 # max_comb: The maximum arity limit. 
-# n1: The number of positive samples.
+# n1: The number of positive samples. In U-test, this is the upper bound of the minimum support plus one.
 # threshold: Significance level.
-# p_mode: the integer. 1 -> Fisher's exact test, 2 -> chi-square test
+# p_mode: the integer. 1 -> Fisher's exact test, 2 -> chi-square test, 3 -> U-test
 ##
 def depthFirst( trans4lcm, fre_pattern, max_comb, n1, threshold, p_mode ):
 	lam = fre_pattern.runLCMLAMP( trans4lcm, max_comb, n1, threshold, p_mode )
@@ -309,29 +427,68 @@ def outputResult( transaction_file, flag_file, threshold, set_method, max_comb,
 				sys.stdout.write("%d\n" % l[3])
 
 
+##
+# Test the combinations and yield a tuple (itemset, support, P-value, statistic score) for each combination.
+# The P-values are computed for each batch of patterns (each support if the patterns are stored).
+# In the stream mode, the patterns are tested and discarded as soon as they are enumerated.
+# lcm_p_mode: If given (1 -> Fisher's exact test, 2 -> chi-square test), the combinations are tested in LCM,
+#             and only the combinations whose P-value is less than cutoff are yielded.
+##
+def testCombinations(transaction_list, fre_pattern, lam_star, func_f, skip, lcm_p_mode = None, cutoff = None):
+	if lcm_p_mode != None:
+		for item_set, support, pos_size, p in fre_pattern.streamSignificant( lam_star, cutoff, lcm_p_mode, \
+																			 func_f.alternative ):
+			yield item_set, support, p, pos_size
+		return
+	for item_trans_list, batch in fre_pattern.iterBatches( lam_star, skip = skip ):
+		p_values, stat_scores = func_f.calPValues( transaction_list, batch )
+		p_values = list( p_values ); stat_scores = list( stat_scores )
+		# In the compact mode, only the itemset is sliced and the support is read from the offsets.
+		if isinstance( item_trans_list, patternStore.PatternStore ):
+			for j in xrange( 0, len( item_trans_list ) ):
+				yield item_trans_list.getItemSet( j ), item_trans_list.getSupport( j ), \
+					  float( p_values[j] ), stat_scores[j]
+			continue
+		for j in xrange( 0, len( item_trans_list ) ):
+			# flag_transaction_list is the support if the positives are counted by LCM.
+			item_set, flag_transaction_list = item_trans_list[j]
+			support = flag_transaction_list
+			if not isinstance( batch, fs.CountBatch ):
+				support = len( flag_transaction_list )
+			yield item_set, support, float( p_values[j] ), stat_scores[j]
+
 # list up the combinations p_i <= alpha/k
-def fwerControl(transaction_list, fre_pattern, lam_star, max_lambda, threshold, func_f, columnid2name, outlog):
+# lcm_p_mode: If given, the combinations are tested in LCM and only the significant ones are logged.
+def fwerControl(transaction_list, fre_pattern, lam_star, max_lambda, threshold, func_f, columnid2name, outlog, \
+				prune = False, lcm_p_mode = None):
 	k = fre_pattern.getTotal( lam_star )
 	enrich_lst = []
 	i = 0
 	max_itemset_size = 0 # the maximum itemset size in detection of our method. This value is used for Bonferroni correction.
-	for l in reversed( range( lam_star, max_lambda + 1 )):
-		item_trans_list = fre_pattern.getFrequentList( l )
-		for item_set_and_size in item_trans_list:
-			i = i + 1
-			item_set = item_set_and_size[0]
-			outlog.write("--- testing " + str(i) + " : ")
-			outlog.write("%s" % item_set)
-			flag_transaction_list = [] # transaction list which has all items in itemset.
-			for t in item_set_and_size[1]:
-				flag_transaction_list.append( t )
-			p, stat_score = func_f.calPValue(transaction_list, flag_transaction_list)
-			outlog.write("p: " + str(p) + "\n")
-			if p < (threshold/k):
-				enrich_lst.append([item_set, p, len( item_set_and_size[1] ), stat_score])
-				item_set_size = len(item_set)
-				if ( item_set_size > max_itemset_size ):
-					max_itemset_size = item_set_size
+	# If prune is True, the supports whose MASL is threshold/k or more are skipped,
+	# because the P-values of the patterns are not less than the MASL.
+	# The patterns are not skipped one by one: the range of a (the number of positives) which
+	# a pattern can reach depends only on its support x, and the MASL is the minimum P-value over the range.
+	skip = None
+	if prune:
+		def skip( support ):
+			return func_f.funcF( support ) >= threshold/k
+	for item_set, support, p, stat_score in testCombinations( transaction_list, fre_pattern, lam_star, func_f, \
+															 skip, lcm_p_mode, threshold/k ):
+		i = i + 1
+		outlog.write("--- testing " + str(i) + " : ")
+		outlog.write("%s" % item_set)
+		outlog.write("p: " + str(p) + "\n")
+		if p < (threshold/k):
+			enrich_lst.append([set( item_set ), p, support, stat_score])
+			item_set_size = len(item_set)
+			if ( item_set_size > max_itemset_size ):
+				max_itemset_size = item_set_size
+	if lcm_p_mode != None:
+		outlog.write( "# of significant combinations found in LCM: %d / %d\n" % ( i, k ) )
+	elif prune:
+		outlog.write( "# of skipped tests: %d / %d\n" % ( k - i, k ) )
+		sys.stderr.write( "  %d of %d tests are skipped by the MASL.\n" % ( k - i, k ) )
 	finish_test_time = time.time()
 	return ( enrich_lst, finish_test_time ) # return the number of enrich set for permutation
 
@@ -377,8 +534,26 @@ def maxLambda(transaction_list):
 # set_method: The procedure name for calibration p-value (fisher/u_test).
 # max_comb: the maximal size which the largest combination size in tests set.
 # delm: delimiter of transaction_file and flag_file
+# miner: the program to enumerate the frequent patterns (lcm/python).
+# stream: If True, the frequent patterns are not stored in memory.
+# compact: If True, the frequent patterns are stored in the flat arrays.
+# precompute: If True, the P-values of Fisher's exact test are computed for all tables in advance.
+# exact: If True, the exact P-values of U-test are computed for the small groups.
+# prefetch: If True, the combinations are enumerated once at the lower bound of lambda in breadthFirst.
+# lambda_search: the search of the optimal lambda for U-test (linear/bisect/depth).
+# prune: If True, the combinations whose support can not be significant are not tested.
+# cache: instance of PatternCache to reuse the frequent patterns. If None, the patterns are not cached.
+# transport: the transport of the input and the output of LCM (file/pipe).
+# count_positives: If True, the numbers of positives of the patterns are counted by LCM in the stream mode.
+# test_in_lcm: If True, the P-values are computed in LCM and only the significant combinations are output.
+#              This is used in the stream mode of Fisher's exact test or chi-square test with the lcm miner.
+# lcm_jobs: the number of processes to run LCM.
+# lcm_output: the output format of LCM for the combinations (text/binary).
 ##
-def run(transaction_file, flag_file, threshold, set_method, lcm_path, max_comb, log_file, alternative):
+def run(transaction_file, flag_file, threshold, set_method, lcm_path, max_comb, log_file, alternative, \
+		miner = "lcm", stream = False, compact = False, precompute = False, exact = False, prefetch = False, \
+		lambda_search = "linear", prune = False, cache = None, transport = "file", count_positives = False, \
+		test_in_lcm = False, lcm_jobs = 1, lcm_output = "text"):
 	# read 2 files and get transaction list
 	sys.stderr.write( "Read input files ...\n" )
 	transaction_list = set()
@@ -405,13 +580,18 @@ def run(transaction_file, flag_file, threshold, set_method, lcm_path, max_comb,
 		sys.stderr.write( "Compute the optimal correction factor ..." )
 		fre_pattern, lam_star, max_lambda, correction_term_time, func_f \
 					 = runMultTest(transaction_list, transaction4lcm53, threshold, set_method, \
-								   lcm_path, max_comb, outlog, alternative)
+								   lcm_path, max_comb, outlog, alternative, miner, stream, compact, precompute, exact, \
+								   prefetch, lambda_search, cache, transport, count_positives or test_in_lcm, lcm_jobs, \
+								   lcm_output)
 		k = fre_pattern.getTotal( lam_star )
 		sys.stderr.write( " %s\n" % k )
 		sys.stderr.write( "Compute P-values of testable combinations ...\n" )
+		lcm_p_mode = None
+		if test_in_lcm:
+			lcm_p_mode = LCM_P_MODES[ set_method ]
 		enrich_lst, finish_test_time \
 					= fwerControl(transaction_list, fre_pattern, lam_star, max_lambda, \
-								   threshold, func_f, columnid2name, outlog)
+								   threshold, func_f, columnid2name, outlog, prune, lcm_p_mode)
 		
 		outlog.close()
 	except IOError as e:
@@ -448,6 +628,51 @@ if __name__ == "__main__":
 
 	p.add_option('--alternative', dest = "alternative", default = "greater", help = "Indicate which alternative hypothesis is used. Select \"greater\", \"less\" or \"two.sided\"\n, and the default is \"greater\".")
 
+	p.add_option('--miner', dest = "miner", default = "lcm", \
+				 help = "Choose the program to enumerate the combinations from \"lcm\" (lcm53 program) or \"python\" (in-process enumeration without lcm53), and the default is \"lcm\".")
+
+	p.add_option('--stream', dest = "stream", action = "store_true", default = False, \
+				 help = "Test the combinations while they are enumerated without storing them in memory.")
+
+	p.add_option('--compact', dest = "compact", action = "store_true", default = False, \
+				 help = "Store the combinations in the compact arrays to reduce the memory usage.")
+
+	p.add_option('--precompute', dest = "precompute", action = "store_true", default = False, \
+				 help = "Compute the P-values of Fisher's exact test for all tables in advance (NumPy is required).")
+
+	p.add_option('--exact', dest = "exact", action = "store_true", default = False, \
+				 help = "Compute the exact P-values of U-test for the small groups and use the tie-corrected normal approximation for the others (NumPy is required).")
+
+	p.add_option('--prefetch', dest = "prefetch", action = "store_true", default = False, \
+				 help = "Enumerate the combinations once at the lower bound of the minimum support when the minimum support is searched for U-test.")
+
+	p.add_option('--lambda_search', dest = "lambda_search", default = "linear", \
+				 help = "Choose the search of the minimum support for U-test from \"linear\", \"bisect\" (binary search) or \"depth\" (one enumeration by LCM-LAMP, not available with --exact), and the default is \"linear\".")
+
+	p.add_option('--prune', dest = "prune", action = "store_true", default = False, \
+				 help = "Skip the tests of the combinations whose support can not be significant (the minimum achievable P-value is not less than the adjusted significance level).")
+
+	p.add_option('--cache_dir', dest = "cache_dir", default = None, \
+				 help = "Save the enumerated combinations to the directory and reuse them for the same item-file.")
+
+	p.add_option('--cache_size', dest = "cache_size", type = "int", default = 1024, \
+				 help = "The disk budget of the cache in MB, and the default is 1024. The least recently used combinations are removed.")
+
+	p.add_option('--lcm_transport', dest = "lcm_transport", default = "file", \
+				 help = "Choose how the data is passed to LCM from \"file\" (the files next to the item-file) or \"pipe\" (the input on tmpfs and the output over the pipe), and the default is \"file\".")
+
+	p.add_option('--count_positives', dest = "count_positives", action = "store_true", default = False, \
+				 help = "Count the positives of the combinations by LCM instead of reading the occurrences. This option is used with --stream and Fisher's exact test or chi-square test.")
+
+	p.add_option('--test_in_lcm', dest = "test_in_lcm", action = "store_true", default = False, \
+				 help = "Compute the P-values in LCM and output only the significant combinations from LCM. This option is used with --stream, the lcm miner and Fisher's exact test or chi-square test.")
+
+	p.add_option('--lcm_jobs', dest = "lcm_jobs", type = "int", default = 1, \
+				 help = "The number of processes to run LCM, and the default is 1. The enumeration of LCM is divided into the processes.")
+
+	p.add_option('--lcm_output', dest = "lcm_output", default = "text", \
+				 help = "Choose the output format of LCM for the combinations from \"text\" or \"binary\" (the arrays of int32 read without parsing), and the default is \"text\".")
+
 #	p.add_option('-d', dest = "delimiter", default = ",", help = "The delimiter for two input files.\n")
 
 	opts, args = p.parse_args()
@@ -490,6 +715,43 @@ if __name__ == "__main__":
 	else:
 		sys.stderr.write( "Error: \"alternative\" should be one of {\"greater\", \"less\", \"two.sided\"}\n" )
 		sys.exit()
+
+	# check the miner
+	if not opts.miner in MINERS:
+		sys.stderr.write( "Error: \"miner\" should be one of {\"lcm\", \"python\"}\n" )
+		sys.exit()
+
+	# check the search of lambda
+	if not opts.lambda_search in LAMBDA_SEARCHES:
+		sys.stderr.write( "Error: \"lambda_search\" should be one of {\"linear\", \"bisect\", \"depth\"}\n" )
+		sys.exit()
+	if ( opts.lambda_search == "depth" ) and opts.exact:
+		sys.stderr.write( "Error: \"lambda_search\" depth is not available with --exact.\n" )
+		sys.exit()
+
+	# check the transport of LCM
+	if not opts.lcm_transport in frequentPatterns.TRANSPORTS:
+		sys.stderr.write( "Error: \"lcm_transport\" should be one of {\"file\", \"pipe\"}\n" )
+		sys.exit()
+
+	# check the number of processes of LCM
+	if opts.lcm_jobs < 1:
+		sys.stderr.write( "Error: \"lcm_jobs\" should be a positive integer.\n" )
+		sys.exit()
+
+	# check the output format of LCM
+	if not opts.lcm_output in frequentPatterns.OUTPUT_FORMATS:
+		sys.stderr.write( "Error: \"lcm_output\" should be one of {\"text\", \"binary\"}\n" )
+		sys.exit()
+
+	# check the counting of positives
+	if opts.count_positives and ( ( not opts.stream ) or ( not opts.pvalue_procedure in BINARY_METHODS ) ):
+		sys.stderr.write( "Error: \"count_positives\" is used with --stream and fisher or chi.\n" )
+		sys.exit()
+	if opts.test_in_lcm and ( ( not opts.stream ) or ( not opts.pvalue_procedure in BINARY_METHODS ) \
+							  or ( opts.miner != "lcm" ) ):
+		sys.stderr.write( "Error: \"test_in_lcm\" is used with --stream, --miner lcm and fisher or chi.\n" )
+		sys.exit()
 	
 	# change log file
 	d = datetime.datetime.today()
@@ -498,8 +760,15 @@ if __name__ == "__main__":
 		log_file = opts.log_filename
 	
 	opts.delimiter = ','
+
+	cache = None
+	if opts.cache_dir != None:
+		cache = patternCache.PatternCache( opts.cache_dir, opts.cache_size * 1024 * 1024 )
 	
 	transaction_file = args[0]; flag_file = args[1]; threshold = float(args[2])
 	enrich_lst, k, lam_star, columnid2name \
 				= run(transaction_file, flag_file, threshold, opts.pvalue_procedure, \
-					  opts.lcm_path, opts.max_comb, log_file, opts.alternative)
+					  opts.lcm_path, opts.max_comb, log_file, opts.alternative, opts.miner, \
+					  opts.stream, opts.compact, opts.precompute, opts.exact, opts.prefetch, \
+					  opts.lambda_search, opts.prune, cache, opts.lcm_transport, opts.count_positives, \
+					  opts.test_in_lcm, opts.lcm_jobs, opts.lcm_output)
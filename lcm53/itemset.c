@@ -4,6 +4,9 @@
     which is downloaded from http://research.nii.ac.jp/~uno/codes.htm.
    For fast computation of LAMP, 
     ITEMSET_lamp and stdNorDistribution functions are added. 
+   ITEMSET_lamp also computes the MASL of Mann-Whitney U test (ITEMSET_lamp_utest_masl).
+   ITEMSET_lamp_merge merges the results of LAMP mode computed by the processes (-T option of LCM).
+   ITEMSET_output_binary outputs the itemsets in the binary format (B option of LCM).
 */
 
 /* routines for itemset mining */
@@ -62,7 +65,12 @@ void ITEMSET_init (ITEMSET *I){
   I->itemflag = NULL;
   I->perm = NULL;
   I->item_frq = NULL;
-  I->sc = I->sc2 = NULL;
+  I->sc = I->sc2 = I->lamp_hist = NULL;
+  I->lamp_label_fname = I->lamp_label = NULL;
+  I->lamp_pval = NULL;
+  I->lamp_cutoff = 0.0;
+  I->lamp_alt = 1;
+  I->lamp_n1 = 0;
   I->X = NULL;
   I->fp = NULL;
   I->separator = ' ';
@@ -82,6 +90,7 @@ void ITEMSET_init (ITEMSET *I){
   I->multi_fp = NULL;
 
   I->multi_core = 0;
+  I->part_id = 0; I->part_num = 1;
 
   I->lamp_stat = 1; // statistical test, 1 -> Fisher, 2 -> Chi square
 }
@@ -105,6 +114,7 @@ void ITEMSET_alloc (ITEMSET *I, char *fname, PERM *perm, QUEUE_INT item_max, siz
   calloc2 (I->sc, siz+2, goto ERR);  
   if ( I->flag&ITEMSET_SC2 ) calloc2 (I->sc2, I->frq_ub+2, goto ERR); // upper bound of frequency
   if ( I->flag2 & ITEMSET_LAMP ) I->topk_frq = I->frq_lb = 1;  // LAMP mode
+  if ( I->flag2 & ITEMSET_LAMP_HIST ) calloc2 (I->lamp_hist, I->frq_ub+2, goto ERR);
   if ( I->topk_k > 0 ){  // allocate topk heap
     if (I->flag & ITEMSET_SC2){
       I->frq_lb = 1; I->topk_frq = 0;
@@ -208,6 +218,13 @@ void ITEMSET_end (ITEMSET *I){
   fclose2 (I->fp);
 #endif
   mfree (I->sc, I->sc2, I->item_frq, I->itemflag, I->perm, I->set_weight, I->set_occ, I->itemtopk_ary);
+  mfree (I->lamp_hist, I->lamp_label);
+  if ( I->lamp_pval ){
+#ifdef _trsact_h_
+    FLOOP (i, 0, ((TRSACT *)(I->X))->rows_org+1) free2 (I->lamp_pval[i]);
+#endif
+    free2 (I->lamp_pval);
+  }
 
   if ( I->multi_fp )
       FLOOP (i, 0, MAX(I->multi_core,1)) free2 (I->multi_fp[i].buf_org);
@@ -229,6 +246,7 @@ void ITEMSET_end (ITEMSET *I){
 void ITEMSET_last_output (ITEMSET *I){
   QUEUE_ID i;
   LONG n=0, nn=0;
+  FILE *fp;
   WEIGHT w;
 
   ITEMSET_merge_counters (I);
@@ -236,6 +254,12 @@ void ITEMSET_last_output (ITEMSET *I){
 
   if ( I->flag2 & ITEMSET_LAMP ){
     printf ("frq= %lld ,#sol.= %lld\n", I->topk_frq, I->topk_k);
+    if ( I->flag2 & ITEMSET_LAMP_HIST ){ // the histogram is complete for the frequencies >= frq_lb
+      printf ("frq_lb= %lld\n", (LONG)I->frq_lb);
+      FLOOP (i, 0, I->frq_ub+1){
+        if ( I->lamp_hist[i] != 0 ) printf ("hist= " QUEUE_INTF " " LONGF "\n", i, I->lamp_hist[i]);
+      }
+    }
     print_err ("iters=" LONGF, I->iters);
     if ( I->flag&ITEMSET_ITERS2 ) print_err (", iters2=" LONGF, I->iters2);
     print_err ("\n");
@@ -272,8 +296,10 @@ void ITEMSET_last_output (ITEMSET *I){
     if ( I->sc[i] != 0 ) nn = i;
   }
   if ( n!=0 ){
-    printf (LONGF "\n", n);
-    FLOOP (i, 0, nn+1) printf (LONGF "\n", I->sc[i]);
+      // the binary output to the standard output is not mixed with the numbers
+    fp = ((I->flag2 & ITEMSET_BINARY) && I->fp == stdout)? stderr: stdout;
+    fprintf (fp, LONGF "\n", n);
+    FLOOP (i, 0, nn+1) fprintf (fp, LONGF "\n", I->sc[i]);
   }
   
   END:;
@@ -337,47 +363,82 @@ double stdNorDistribution ( double x ){
   return p;
 }
 
+/**
+ * MASL of Mann-Whitney U test for the itemsets of frequency x in n transactions,
+ * the same computation as funcF of functions/functions4u_test.py (the normal approximation).
+ * The minimum P-value is given when the x transactions have the largest ranks.
+ **/
+double ITEMSET_lamp_utest_masl (LONG x, LONG n){
+  LONG y = n - x;
+  double mean_u = (double)(x*y)/2, var_u = (double)(x*y*(x + y + 1))/12;
+  if ( var_u <= 0 ) return (1.0);
+  return (stdNorDistribution (mean_u/sqrt(var_u)));
+}
+
+/* the threshold alpha/f(topk_frq) of LAMP mode, computed when topk_frq is raised */
+double ITEMSET_lamp_th (ITEMSET *I){
+  int base0 = I->topk.base - I->topk.end;
+  // p_mode: 1 -> Fisher's exact test (greater)
+  if ( I->lamp_stat == 1 ){
+	return (I->th * (I->topk.base - I->topk_frq + 1) / (I->topk.end - I->topk_frq + 1));
+  }
+  // p_mode: 3 -> Mann-Whitney U test, topk.end is only the upper bound of the frequency
+  else if ( I->lamp_stat == 3 ){
+	return (I->lamp_alpha / ITEMSET_lamp_utest_masl (I->topk_frq, I->topk.base));
+  }
+  // p_mode: 2 -> Chi-square test (greater)
+  int nonfrq = I->topk.base - I->topk_frq;
+  double means[2][2] = {{(double)(I->topk_frq) * I->topk.end/I->topk.base, 
+						 (double)(I->topk_frq) * base0/I->topk.base}, 
+					   {(double)(nonfrq) * I->topk.end/I->topk.base, 
+						(double)(nonfrq) * base0/I->topk.base}};
+  //printf ("Mean: %f, %f, %f, %f\n", means[0][0], means[0][1], means[1][0], means[1][1] );
+  double chi = pow( fabs((I->topk_frq) - means[0][0]) - YATE_CORR, 2.0)/means[0][0];
+  chi += pow( fabs(0 - means[0][1]) - YATE_CORR, 2.0)/means[0][1];
+  chi += pow( fabs(I->topk.end - (I->topk_frq) - means[1][0]) - YATE_CORR, 2.0)/means[1][0];
+  chi += pow( fabs(base0 - means[1][1]) - YATE_CORR, 2.0)/means[1][1];
+  double pval = 1.0;
+  if (chi != 0.0){
+	pval = stdNorDistribution( sqrt( chi ) );
+  }
+  //printf ("chi^2: %f, p-value: %e, ", chi, pval );
+  return (I->lamp_alpha / pval);
+}
+
 /**
  * int p_mode: 1 -> Fisher's exact test, greater
  *           : 2 -> Chi-square test, greater
+ *           : 3 -> Mann-Whitney U test (the labels are not used)
  */
 // topk.end: #records, topk.base: #positive records, PP.th: \alpha, topk_k: #patterns found
+// In the histogram mode (ITEMSET_LAMP_HIST), frq_lb is kept one less than topk_frq,
+// so lamp_hist counts all the itemsets (except for the empty set) whose frequencies are frq_lb or more.
 void ITEMSET_lamp (ITEMSET *I, LONG s){
   //printf("I->lamp_stat: %d\n", I->lamp_stat);
+  LONG h = s, c = 1;
+  QUEUE_ID i;
+  if ( s > 1 ){ // s = 2^add.t includes the itemsets larger than ub, so count them by the binomials
+    h = 0; FLOOP (i, 0, I->add.t+1){
+      if ( I->itemset.t+i > I->ub ) break;
+      h += c; c = c*(I->add.t-i)/(i+1);
+    }
+  }
+  if ( I->itemset.t == 0 ) h--;  // the empty set is not counted
+  if ( I->flag2 & ITEMSET_LAMP_HIST ) I->lamp_hist[(QUEUE_INT)I->frq] += h;
+  // in U-test, the itemsets are counted as the histogram, the same as the breadth first search of lamp.py
+  if ( I->lamp_stat == 3 ){ I->sc2[(QUEUE_INT)I->frq] -= s - h; s = h; }
   if ( I->frq >= I->topk_frq ){ // LAMP  histogram version
-	int base0 = I->topk.base - I->topk.end;
 	// topk_k: frequency, frq_lb: minimum support, th: alpha/f(lambd) (the upper bound for the frequency)
     I->topk_k += s;  // topk_k: frequency
     while ( I->topk_k >= I->th ){
       I->topk_k -= I->sc2[I->topk_frq]; I->sc2[I->topk_frq] = 0;
 	  printf ("frq_lb: %d, topk_k: %lld,  th(%d): %f ->", (int)I->frq_lb, I->topk_k, (int)I->frq_lb - 1, I->th);
 	  // update lower bound for the frequency.
-	  // p_mode: 1 -> Fisher's exact test (greater)
-	  if ( I->lamp_stat == 1 ){
-		I->th = I->th * (I->topk.base - I->topk_frq + 1) / (I->topk.end - I->topk_frq + 1);
-	  }
-	  // p_mode: 2 -> Chi-square test (greater)
-	  else{
-		int nonfrq = I->topk.base - I->topk_frq;
-		double means[2][2] = {{(double)(I->topk_frq) * I->topk.end/I->topk.base, 
-							   (double)(I->topk_frq) * base0/I->topk.base}, 
-							 {(double)(nonfrq) * I->topk.end/I->topk.base, 
-							  (double)(nonfrq) * base0/I->topk.base}};
-		//printf ("Mean: %f, %f, %f, %f\n", means[0][0], means[0][1], means[1][0], means[1][1] );
-		double chi = pow( fabs((I->topk_frq) - means[0][0]) - YATE_CORR, 2.0)/means[0][0];
-		chi += pow( fabs(0 - means[0][1]) - YATE_CORR, 2.0)/means[0][1];
-		chi += pow( fabs(I->topk.end - (I->topk_frq) - means[1][0]) - YATE_CORR, 2.0)/means[1][0];
-		chi += pow( fabs(base0 - means[1][1]) - YATE_CORR, 2.0)/means[1][1];
-		double pval = 1.0;
-		if (chi != 0.0){
-		  pval = stdNorDistribution( sqrt( chi ) );
-		}
-		//printf ("chi^2: %f, p-value: %e, ", chi, pval );
-		I->th = I->lamp_alpha / pval; 
-	  }
+	  I->th = ITEMSET_lamp_th (I);
 	  printf ("th: %f\n", I->th);
 	  I->topk_frq++; 
       I->frq_lb = I->topk_frq;
+      if ( I->flag2 & ITEMSET_LAMP_HIST ) I->frq_lb = I->topk_frq - 1;
       if ( I->topk_frq == I->topk.end ) I->frq_lb = I->topk.base+1;
 	  printf ("frq_lb: %f\n", I->frq_lb);
     }
@@ -386,6 +447,27 @@ void ITEMSET_lamp (ITEMSET *I, LONG s){
 }
 
 
+/* merge the results of LAMP mode computed by the processes (-T option of LCM).
+   h: sc2 summed over the processes, which is complete for the frequencies >= frq,
+   frq: the largest topk_frq of the processes.
+   Each process raised topk_frq to its own value by a part of the itemsets,
+   so topk_frq is raised to frq, and then raised by h in the same way as ITEMSET_lamp. */
+void ITEMSET_lamp_merge (ITEMSET *I, LONG *h, LONG frq){
+  LONG i;
+  while ( I->topk_frq < frq ){ I->th = ITEMSET_lamp_th (I); I->topk_frq++; }
+  I->topk_k = 0;
+  FLOOP (i, I->topk_frq, I->frq_ub+2) I->topk_k += h[i];
+  while ( I->topk_k >= I->th ){
+    I->topk_k -= h[I->topk_frq];
+    I->th = ITEMSET_lamp_th (I);
+    I->topk_frq++;
+  }
+  I->frq_lb = I->topk_frq;
+  if ( I->flag2 & ITEMSET_LAMP_HIST ) I->frq_lb = I->topk_frq - 1;
+  if ( I->topk_frq == I->topk.end ) I->frq_lb = I->topk.base+1;
+}
+
+
 #ifdef _trsact_h_
 void ITEMSET_output_occ (ITEMSET *I, QUEUE *occ, int core_id){
   QUEUE_ID i;
@@ -415,6 +497,136 @@ void ITEMSET_output_occ (ITEMSET *I, QUEUE *occ, int core_id){
   FILE2_putc (fp, '\n');
 #endif
 }
+
+/* write an integer to the output file as int32 of the machine */
+void ITEMSET_write_int (FILE2 *fp, int n){
+  memcpy (fp->buf, &n, sizeof(int));
+  fp->buf += sizeof(int);
+}
+
+/* output an itemset in the binary format (B option of LCM). The record is int32 of
+   #items, the items, the frequency, #occurrences and the occurrences (#occurrences is 0 without I option) */
+void ITEMSET_output_binary (ITEMSET *I, QUEUE *occ, int core_id){
+  QUEUE_ID i;
+  QUEUE_INT e, *x;
+  FILE2 *fp = &I->multi_fp[core_id];
+  TRSACT *TT = (TRSACT *)(I->X);
+  VEC_ID ee = TT->rows_org, m = 0;
+
+  ITEMSET_write_int (fp, I->itemset.t);
+  FLOOP (i, 0, I->itemset.t){
+    e = I->itemset.v[i];
+    ITEMSET_write_int (fp, I->perm? I->perm[e]: e);
+    if ( (i+1)%256==0 ) ITEMSET_flush (I, fp);
+  }
+  ITEMSET_write_int (fp, (int)I->frq);
+  if ( !(I->flag&ITEMSET_TRSACT_ID) ){ ITEMSET_write_int (fp, 0); ITEMSET_flush (I, fp); return; }
+    // count the occurrences before writing them, since the duplicated ID's may be removed
+  MQUE_FLOOP_ (*occ, x, TT->occ_unit){
+    if ( (I->flag&ITEMSET_RM_DUP_TRSACT)==0 || *x != ee ) m++;
+    ee = *x;
+  }
+  ITEMSET_write_int (fp, m);
+  i = 0; ee = TT->rows_org;
+  MQUE_FLOOP_ (*occ, x, TT->occ_unit){
+    if ( (I->flag&ITEMSET_RM_DUP_TRSACT)==0 || *x != ee )
+        ITEMSET_write_int (fp, TT->trperm? TT->trperm[*x]: *x);
+    ee = *x;
+    if ( (++i)%256==0 ) ITEMSET_flush (I, fp);
+  }
+  ITEMSET_flush (I, fp);
+}
+
+/* count #positive transactions in the occurrence, given by the labels of transactions */
+LONG ITEMSET_count_posi (ITEMSET *I, QUEUE *occ){
+  QUEUE_INT *x;
+  TRSACT *TT = (TRSACT *)(I->X);
+  LONG posi = 0;
+
+  MQUE_FLOOP_ (*occ, x, TT->occ_unit)
+      posi += I->lamp_label[TT->trperm? TT->trperm[*x]: *x];
+  return (posi);
+}
+
+/**
+ * Probability of the contingency table whose top-left is a in x transactions,
+ * C(n1, a)*C(n0, x-a)/C(n, x).
+ * The computation is in the same order as __probability of functions/functions4fisher.py.
+ **/
+double ITEMSET_lamp_probability (LONG n, LONG n1, LONG x, LONG a){
+  LONG n0 = n - n1, b = x - a, i, m;
+  double p = 1.0;
+  for (i = 0; i < a; i++){
+    p = p*(n1 - i)/(a - i); // c(n1, a)
+    p = p*(x - i)/(n - i); // c(n1+n0, x)
+  }
+  for (i = 0; i < b; i++){
+    p = p*(n0 - i)/(b - i); // c(n0, b)
+    m = a + i;
+    p = p*(x - m)/(n - m); // c(n1+n0, x)
+  }
+  return (p);
+}
+
+/**
+ * P-value of Fisher's exact test, the same computation as __pValue of functions/functions4fisher.py.
+ * In the two-sided test, the probabilities not larger than that of a are cumulated.
+ **/
+double ITEMSET_lamp_fisher (ITEMSET *I, LONG n, LONG x, LONG a){
+  LONG n1 = I->lamp_n1, pos_max = MIN(x, n1), k;
+  double p0 = ITEMSET_lamp_probability (n, n1, x, a), p = p0, pa;
+  if ( I->lamp_alt < 1 ){
+    for (k = 0; k < a; k++){
+      pa = ITEMSET_lamp_probability (n, n1, x, k);
+      if ( pa > p0*(1+LAMP_REL_ERR) ) break;
+      p += pa;
+    }
+    for (k = pos_max; k > a; k--){
+      pa = ITEMSET_lamp_probability (n, n1, x, k);
+      if ( pa > p0*(1+LAMP_REL_ERR) ) break;
+      p += pa;
+    }
+  } else {
+    for (k = a+1; k <= pos_max; k++) p += ITEMSET_lamp_probability (n, n1, x, k);
+  }
+  return (p);
+}
+
+/**
+ * P-value of chi-square test, the same computation as calPValueFromCount of functions/functions4chi.py.
+ **/
+double ITEMSET_lamp_chi (ITEMSET *I, LONG n, LONG x, LONG a){
+  LONG n1 = I->lamp_n1, n0 = n - n1;
+  double ovalues[2][2] = {{a, x - a}, {n1 - a, n0 - (x - a)}};
+  double means[2][2] = {{(double)x * n1 / n, (double)x * n0 / n},
+                        {(double)(n - x) * n1 / n, (double)(n - x) * n0 / n}};
+  double yate_corr = 0.0, chi = 0.0, p = 1.0;
+  int i, j;
+  FLOOP (i, 0, 2) FLOOP (j, 0, 2) if ( means[i][j] < 5 ) yate_corr = YATE_CORR;
+  FLOOP (i, 0, 2) FLOOP (j, 0, 2)
+      chi += pow (fabs (ovalues[i][j] - means[i][j]) - yate_corr, 2.0) / means[i][j];
+  if ( chi != 0.0 ) p = stdNorDistribution (pow (chi, 0.5));
+  if ( I->lamp_alt > 0 ){
+    if ( a < MIN(n1, x)/2.0 ) p = 1. - p;
+  } else p = MIN(p * 2., 1.0);
+  return (p);
+}
+
+/* P-value of the itemset of frequency x which includes a positive transactions, by the test of lamp_stat.
+   The P-values are kept in lamp_pval, since many itemsets have the same table */
+double ITEMSET_lamp_pvalue (ITEMSET *I, LONG x, LONG a){
+  LONG n = ((TRSACT *)(I->X))->rows_org, k;
+  double *row;
+  if ( !I->lamp_pval ) calloc2 (I->lamp_pval, n+1, EXIT0);
+  if ( !(row = I->lamp_pval[x]) ){
+    malloc2 (row, MIN(x, I->lamp_n1)+1, EXIT0);
+    FLOOP (k, 0, MIN(x, I->lamp_n1)+1) row[k] = -1.0;
+    I->lamp_pval[x] = row;
+  }
+  if ( row[a] < 0 )
+      row[a] = I->lamp_stat == 1? ITEMSET_lamp_fisher (I, n, x, a): ITEMSET_lamp_chi (I, n, x, a);
+  return (row[a]);
+}
 #endif
 
 /* output an itemset to the output file */
@@ -424,6 +636,8 @@ void ITEMSET_output_itemset (ITEMSET *I, QUEUE *occ, int core_id){
 #ifdef _agraph_h_
   QUEUE_INT ee;
 #endif
+  LONG posi = 0;  // #positive transactions (-LAMP_F)
+  double pval = 1.0;  // P-value of the itemset (-LAMP_T)
 
   FILE2 *fp = &I->multi_fp[core_id];
   
@@ -446,6 +660,15 @@ void ITEMSET_output_itemset (ITEMSET *I, QUEUE *occ, int core_id){
   if (I->flag & ITEMSET_SC2) I->sc2[(QUEUE_INT)I->frq]++;  // LAMP mode
 
   if ( I->flag2 & ITEMSET_LAMP ){ ITEMSET_lamp (I, 1); return; }
+#ifdef _trsact_h_
+  if ( I->flag2 & ITEMSET_LAMP_POSI ){
+    posi = ITEMSET_count_posi (I, occ);
+    if ( I->flag2 & ITEMSET_LAMP_TEST ){ // test mode: only the significant itemsets are output
+      pval = ITEMSET_lamp_pvalue (I, (LONG)I->frq, posi);
+      if ( !(pval < I->lamp_cutoff) ) return;
+    }
+  }
+#endif
   if ( I->itemtopk_end > 0 ){
     e = AHEAP_findmin_head (&(I->itemtopk[I->itemtopk_item]));
     if ( I->frq > AHEAP_H (I->itemtopk[I->itemtopk_item], e) ){
@@ -474,6 +697,9 @@ void ITEMSET_output_itemset (ITEMSET *I, QUEUE *occ, int core_id){
   }
   
   if ( I->fp ){
+#ifdef _trsact_h_
+    if ( I->flag2 & ITEMSET_BINARY ){ ITEMSET_output_binary (I, occ, core_id); return; }
+#endif
     if ( I->flag&ITEMSET_PRE_FREQ ) ITEMSET_output_frequency (I, core_id);
     if ( (I->flag & ITEMSET_NOT_ITEMSET) == 0 ){
 #ifdef _agraph_h_
@@ -503,6 +729,10 @@ void ITEMSET_output_itemset (ITEMSET *I, QUEUE *occ, int core_id){
 #endif
     }
     if ( !(I->flag&ITEMSET_PRE_FREQ) ) ITEMSET_output_frequency (I, core_id);
+#ifdef _trsact_h_
+    if ( I->flag2 & ITEMSET_LAMP_POSI ) FILE2_print_int (fp, posi, ' ');
+    if ( I->flag2 & ITEMSET_LAMP_TEST ) fp->buf += sprintf (fp->buf, " %.17g", pval);
+#endif
     if ( ((I->flag & ITEMSET_NOT_ITEMSET) == 0) || (I->flag&ITEMSET_FREQ) || (I->flag&ITEMSET_PRE_FREQ) ){
 #ifdef _FILE2_LOAD_FROM_MEMORY_
   FILE2_WRITE_MEMORY (QUEUE_INT, FILE2_LOAD_FROM_MEMORY_END);
@@ -2,7 +2,10 @@
             Apr. 2, 2015  modified by LAMP development team */
 /* This code is modified from LCM ver 5.3 
     which is downloaded from http://research.nii.ac.jp/~uno/codes.htm.
-   We add the structure members lamp_stat and lamp_alpha. */
+   We add the structure members lamp_stat, lamp_alpha, lamp_hist, lamp_label and
+   the members for the test mode (lamp_cutoff, lamp_alt, lamp_n1, lamp_pval),
+   and part_id, part_num to divide the enumeration into the processes.
+   ITEMSET_BINARY is added to output the itemsets in the binary format. */
 
 
 /* routines for itemset mining */
@@ -52,6 +55,7 @@ typedef struct {
   int dir;  // direction flag for AGRAPH & SGRAPH
 
   int multi_core;  // number of processors
+  int part_id, part_num;  // this process enumerates the part_id-th part of part_num parts (-T option of LCM)
   LONG *multi_iters, *multi_iters2, *multi_iters3;  //iterations
   LONG *multi_solutions, *multi_solutions2;  // number of solutions output
   LONG *multi_outputs, *multi_outputs2;    // #calls of ITEMSET_output_itemset or ITEMSET_solusion
@@ -67,6 +71,13 @@ typedef struct {
   
   int lamp_stat; // case to change the statistical test in LAMP mode. 
   double lamp_alpha; // the significance level. 
+  LONG *lamp_hist;  // #itemsets classified by frequencies, which is not reset in LAMP mode
+  char *lamp_label_fname;  // the file of the labels (0/1) of transactions
+  char *lamp_label;  // the labels of transactions, indexed by the original transaction ID's
+  double lamp_cutoff;  // output only the itemsets whose P-values are less than this in the test mode
+  int lamp_alt;  // alternative hypothesis in the test mode, 1 -> greater, 0 -> two-sided
+  LONG lamp_n1;  // #positive transactions given by the labels
+  double **lamp_pval;  // P-values computed in the test mode, [x][a] (NULL if row x is not computed)
 
 } ITEMSET;
 
@@ -106,7 +117,12 @@ typedef struct {
 
 
 #define ITEMSET_LAMP 256   // LAMP mode
+#define ITEMSET_LAMP_HIST 512   // output the histogram of frequencies in LAMP mode
+#define ITEMSET_LAMP_POSI 1024   // output #positive transactions in the occurrence of each itemset
+#define ITEMSET_LAMP_TEST 2048   // output only the significant itemsets with their P-values
+#define ITEMSET_BINARY 4096   // output the itemsets in the binary format of int32
 #define YATE_CORR 0.5 // Yates correction factor for continuity used in Chi-square
+#define LAMP_REL_ERR 1.E-7 // relative tolerance to regard the probabilities as tied in two-sided Fisher's exact test
 
 //#define ITEMSET_RULE (ITEMSET_RULE_FRQ + ITEMSET_RULE_INFRQ + ITEMSET_RULE_RFRQ + ITEMSET_RULE_RINFRQ + ITEMSET_RFRQ + ITEMSET_RINFRQ + ITEMSET_SET_RULE)  // for check any rule is true
 #define ITEMSET_RULE (ITEMSET_RULE_FRQ + ITEMSET_RULE_INFRQ + ITEMSET_RULE_RFRQ + ITEMSET_RULE_RINFRQ + ITEMSET_SET_RULE)  // for check any rule is true
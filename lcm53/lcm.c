@@ -3,6 +3,8 @@
 /* This code is modified from LCM ver 5.3 
     which is downloaded from http://research.nii.ac.jp/~uno/codes.htm.
    LAMP and LAMP_P options are implemented for fast computation of LAMP. 
+   -T option divides the enumeration into the processes (LCM_parts).
+   B option outputs the itemsets in the binary format.
 */
 
 
@@ -17,13 +19,15 @@
 
 #define ERROR_RET 
 
+#include <unistd.h>
+#include <sys/wait.h>
 #include"trsact.c"
 #include"sgraph.c"
 #include"problem.c"
 
 void LCM_error (){
   ERROR_MES = "command explanation";
-  print_err ("LCM: [FCMfQIq] [options] input-filename support [output-filename]\n\
+  print_err ("LCM: [FCMfQIqB] [options] input-filename support [output-filename]\n\
 %%:show progress, _:no message, +:write solutions in append mode\n\
 F:frequent itemset mining, C:closed frequent itemset mining\n\
 M:maximal frequent itemset mining, P:positive-closed itemset mining\n\
@@ -34,6 +38,7 @@ I:output ID's of transactions including each pattern\n\
 i:do not output itemset to the output file (only rules)\n\
 s:output confidence and item frequency by absolute values\n\
 t:transpose the input database (item i will be i-th transaction, and i-th transaction will be item i)\n\
+B:output each itemset in the binary format, int32 of #items, items, frequency, #occurrences and occurrences (#occurrences is 0 without I)\n\
 [options]\n\
 -K [num]:output [num] most frequent itemsets\n\
 -l,-u [num]:output itemsets with size at least/most [num]\n\
@@ -51,9 +56,15 @@ t:transpose the input database (item i will be i-th transaction, and i-th transa
 -# [num]:stop after outputting [num] solutions\n\
 -, [char]:give the separator of the numbers in the output\n\
 -Q [filename]:replace the output numbers according to the permutation table given by [filename]\n\
+-T [num]:divide the enumeration into [num] processes\n\
 # the 1st letter of input-filename cannot be '-'.\n\
 # if the output file name is -, the solutions will be output to standard output.\n");
-  print_err ("LCM_LAMP: [FCMfQIq] -LAMP #positives [-LAMP #transctions] [options] input-filename [alpha]\n");
+  print_err ("LCM_LAMP: [FCMfQIq] -LAMP #positives [-LAMP #transctions] [-LAMP_P test] [-LAMP_H 1] [options] input-filename [alpha]\n");
+  print_err ("-LAMP_P [test]:1:Fisher's exact test (default), 2:chi-square test, 3:Mann-Whitney U test (#positives is the upper bound of the frequency)\n");
+  print_err ("-LAMP_H 1:output the number of itemsets of each frequency\n");
+  print_err ("-LAMP_F [filename]:read the labels (0/1) of transactions from the file, and output the number of positive transactions following to each itemset (available without -LAMP)\n");
+  print_err ("-LAMP_T [cutoff]:output only the itemsets whose P-values (of the test given by -LAMP_P) are less than cutoff, followed by the P-values (used with -LAMP_F)\n");
+  print_err ("-LAMP_A [alternative]:alternative hypothesis of -LAMP_T, 1:greater (default), 0:two-sided\n");
   EXIT;
 }
 
@@ -84,6 +95,7 @@ void LCM_read_param (int argc, char *argv[], PROBLEM *PP){
   if ( strchr (argv[c], 'i') ) II->flag |= ITEMSET_NOT_ITEMSET;
   if ( strchr (argv[c], 's') ) II->flag |= ITEMSET_RULE_SUPP;
   if ( strchr (argv[c], 't') ) PP->TT.flag |= LOAD_TPOSE;
+  if ( strchr (argv[c], 'B') ) II->flag2 |= ITEMSET_BINARY;
   c++;
   
   while ( argv[c][0] == '-' ){
@@ -102,6 +114,20 @@ void LCM_read_param (int argc, char *argv[], PROBLEM *PP){
 		
 		II->lamp_stat = atoi(argv[c+1]);
 	  }
+	  else if ( !strcmp (argv[c], "-LAMP_H") ){ // output the histogram of frequencies in LAMP mode
+		if ( atoi(argv[c+1]) ) II->flag2 |= ITEMSET_LAMP_HIST;
+	  }
+	  else if ( !strcmp (argv[c], "-LAMP_F") ){ // output #positives of each itemset given by the labels
+		II->lamp_label_fname = argv[c+1];
+		II->flag2 |= ITEMSET_LAMP_POSI;
+	  }
+	  else if ( !strcmp (argv[c], "-LAMP_T") ){ // output only the significant itemsets with the P-values
+		II->lamp_cutoff = atof(argv[c+1]);
+		II->flag2 |= ITEMSET_LAMP_TEST;
+	  }
+	  else if ( !strcmp (argv[c], "-LAMP_A") ){ // alternative hypothesis of -LAMP_T
+		II->lamp_alt = atoi(argv[c+1]);
+	  }
       break; case 'K': if ( PP->problem & PROBLEM_MAXIMAL )
           error ("M command and -K option can not be given simltaneously", EXIT);
         II->topk_k = (LONG)atof(argv[c+1]);
@@ -141,6 +167,7 @@ void LCM_read_param (int argc, char *argv[], PROBLEM *PP){
       break; case '#': II->max_solutions = atoi(argv[c+1]);
       break; case ',': II->separator = argv[c+1][0];
       break; case 'Q': PP->outperm_fname = argv[c+1];
+      break; case 'T': II->part_num = MAX(atoi(argv[c+1]), 1);
       break; default: goto NEXT;
     }
     c += 2;
@@ -151,6 +178,15 @@ void LCM_read_param (int argc, char *argv[], PROBLEM *PP){
   if ( (f&3)==3 || (f&5)==5 || (f&6)==6 ) error ("-f, -F, -a, -A, -p, -P, -r and -R can not specified simultaneously", EXIT); 
   if ( f && (II->flag & ITEMSET_PRE_FREQ) ) BITRM (II->flag, ITEMSET_PRE_FREQ);
 
+  if ( (II->flag2 & ITEMSET_LAMP_TEST) && !(II->flag2 & ITEMSET_LAMP_POSI) )
+      error ("-LAMP_T option needs the labels given by -LAMP_F", EXIT);
+
+  if ( (II->flag2 & ITEMSET_BINARY) && ((II->flag2 & ITEMSET_LAMP_POSI) || (II->flag & (ITEMSET_RULE+ITEMSET_OUTPUT_POSINEGA))) )
+      error ("B can not be given with A, -LAMP_F and the options of association rules", EXIT);
+
+  if ( II->part_num > 1 && (II->topk_k > 0 || II->max_solutions > 0) )
+      error ("-T option can not be given with -K and -#", EXIT);
+
   if ( ( PP->problem & PROBLEM_CLOSED ) && PP->SG.fname )
       error ("closed itemset mining does not work with item constraints", EXIT);
 
@@ -319,7 +355,9 @@ void LCM (PROBLEM *PP, int item, QUEUE *occ, WEIGHT frq, WEIGHT pfrq){
       II->prob = 1.0;
       MQUE_FLOOP (II->itemset, x) II->prob *= II->item_frq[*x];
       MQUE_FLOOP (II->add, x) II->prob *= II->item_frq[*x];
-      ITEMSET_check_all_rule (II, PP->occ_w, occ, &TT->jump, TT->total_pw_org, 0);      //    if (ERROR_MES) return;
+      // the itemset of the root is output only by the first process (-T option)
+      if ( II->itemset.t > 0 || II->part_id == 0 )
+          ITEMSET_check_all_rule (II, PP->occ_w, occ, &TT->jump, TT->total_pw_org, 0);      //    if (ERROR_MES) return;
     }
   }
     // select freqeut (and addible) items with smaller indices
@@ -338,7 +376,7 @@ void LCM (PROBLEM *PP, int item, QUEUE *occ, WEIGHT frq, WEIGHT pfrq){
   qsort_QUEUE_INT (II->add.v+qt, II->add.t-qt, -1);
 
 // database reduction
-  if ( cnt>2 && (II->flag & ITEMSET_TRSACT_ID)==0 && II->itemset.t >0){
+  if ( cnt>2 && (II->flag & ITEMSET_TRSACT_ID)==0 && (II->flag2 & ITEMSET_LAMP_POSI)==0 && II->itemset.t >0){
     TRSACT_find_same (TT, occ, item);
     TRSACT_merge_trsact (TT, &TT->OQ[TT->T.clms], item);
     TRSACT_reduce_occ (TT, occ);
@@ -350,7 +388,9 @@ void LCM (PROBLEM *PP, int item, QUEUE *occ, WEIGHT frq, WEIGHT pfrq){
   cnt = QUEUE_LENGTH_ (PP->itemcand); f=0;   // for showing progress
   while ( QUEUE_LENGTH_ (PP->itemcand) > 0 ){
     e = QUEUE_ext_tail_ (&PP->itemcand);
-    if ( PP->occ_pw2[e] >= MAX(II->frq_lb, II->posi_lb) ){  // if the item is frequent
+      // -T option: the branches of the root are given to the processes in turn
+    if ( PP->occ_pw2[e] >= MAX(II->frq_lb, II->posi_lb)  // if the item is frequent
+         && (II->itemset.t > 0 || QUEUE_LENGTH_ (PP->itemcand) % II->part_num == II->part_id) ){
       LCM_add_item (PP, &II->itemset, e);
       LCM (PP, e, &TT->OQ[e], PP->occ_w2[e], PP->occ_pw2[e]); // recursive call
 if ( ERROR_MES ) return;
@@ -423,6 +463,116 @@ void LCM_init (PROBLEM *PP){
   if ( (II->flag2&ITEMSET_LAMP) && II->topk.base == 0) II->topk.base = TT->rows_org;
 }
 
+/*************************************************************************/
+/* read the labels (0/1) of transactions for -LAMP_F option.
+   The i-th number in the file is the label of the i-th transaction */
+/*************************************************************************/
+void LCM_read_label (PROBLEM *PP){
+  ITEMSET *II = &PP->II;
+  TRSACT *TT = &PP->TT;
+  FILE *fp;
+  VEC_ID t;
+  int l;
+
+  calloc2 (II->lamp_label, TT->rows_org+1, EXIT);
+  if ( !(fp = fopen (II->lamp_label_fname, "r")) ){
+    error_str ("file open error", II->lamp_label_fname, EXIT);
+  }
+  FLOOP (t, 0, TT->rows_org){
+    if ( fscanf (fp, "%d", &l) != 1 ){
+      fclose (fp);
+      error_str ("the number of labels is less than #transactions", II->lamp_label_fname, EXIT);
+    }
+    II->lamp_label[t] = (l != 0);
+    II->lamp_n1 += II->lamp_label[t];
+  }
+  fclose (fp);
+}
+
+/*************************************************************************/
+/* run LCM by II->part_num processes (-T option). Each process enumerates
+   the branches of the root given in turn, and writes the solutions and the
+   counters to the temporary files. After all processes end, the solutions
+   are copied to the output file in the order of the processes, and the
+   counters are merged (in LAMP mode, sc2 by ITEMSET_lamp_merge).
+   The processes speed up only on the multi-core machines. On one core, they
+   cost 5-15% (3000 transactions x 60 items, C -LAMP: 3.16s, 3.38s and 3.66s
+   by 1, 2 and 4 processes), and the load of the processes depends on the
+   sizes of the branches of the root */
+/*************************************************************************/
+void LCM_parts (PROBLEM *PP){
+  ITEMSET *II = &PP->II;
+  TRSACT *TT = &PP->TT;
+  FILE **fp = NULL, **cfp;  // the solutions and the counters of each process
+  LONG c[10], *h = NULL, frq = 1, lb = 1, j, n;
+  char buf[FILE2_BUFSIZ];
+  pid_t pid;
+  int i, st;
+
+  calloc2 (fp, II->part_num*2, EXIT);
+  cfp = fp + II->part_num;
+  fflush (stdout); if ( II->fp ) fflush (II->fp);
+  FLOOP (i, 0, II->part_num){
+    if ( !(fp[i] = tmpfile ()) || !(cfp[i] = tmpfile ()) ) error ("temporary file open error", goto END);
+    if ( (pid = fork ()) < 0 ) error ("fork error", goto END);
+    if ( pid == 0 ){  // the i-th process
+      II->part_id = i;
+      if ( II->fp ) II->fp = II->multi_fp[0].fp = fp[i];
+      LCM (PP, TT->T.clms, &PP->oo, TT->total_w_org, TT->total_pw_org);
+      ITEMSET_merge_counters (II);
+      c[0] = II->iters; c[1] = II->iters2; c[2] = II->iters3;
+      c[3] = II->outputs; c[4] = II->outputs2;
+      c[5] = II->solutions; c[6] = II->solutions2;
+      c[7] = II->topk_frq; c[8] = II->topk_k; c[9] = (LONG)II->frq_lb;
+      fwrite (c, sizeof(LONG), 10, cfp[i]);
+      fwrite (II->sc, sizeof(LONG), II->itemset.end+1, cfp[i]);
+      if ( II->flag2 & ITEMSET_LAMP ) fwrite (II->sc2, sizeof(LONG), II->frq_ub+2, cfp[i]);
+      if ( II->lamp_hist ) fwrite (II->lamp_hist, sizeof(LONG), II->frq_ub+2, cfp[i]);
+      fflush (stdout);
+      if ( II->fp ) fflush (II->fp);
+      _exit ( (ERROR_MES || fflush (cfp[i]))? 1: 0 );
+    }
+  }
+  FLOOP (i, 0, II->part_num){
+    if ( wait (&st) < 0 || !WIFEXITED (st) || WEXITSTATUS (st) != 0 ) error ("a process of -T option failed", goto END);
+  }
+
+    // merge the counters, and copy the solutions
+  if ( II->flag2 & ITEMSET_LAMP ) calloc2 (h, II->frq_ub+2, goto END);
+  FLOOP (i, 0, II->part_num){
+    rewind (cfp[i]);
+    if ( fread (c, sizeof(LONG), 10, cfp[i]) != 10 ) error ("temporary file read error", goto END);
+    II->iters += c[0]; II->iters2 += c[1]; II->iters3 += c[2];
+    II->outputs += c[3]; II->outputs2 += c[4];
+    II->solutions += c[5]; II->solutions2 += c[6];
+    ENMAX (frq, c[7]); ENMAX (lb, c[9]);
+    FLOOP (j, 0, II->itemset.end+1){
+      if ( fread (&n, sizeof(LONG), 1, cfp[i]) != 1 ) error ("temporary file read error", goto END);
+      II->sc[j] += n;
+    }
+    if ( h ) FLOOP (j, 0, II->frq_ub+2){
+      if ( fread (&n, sizeof(LONG), 1, cfp[i]) != 1 ) error ("temporary file read error", goto END);
+      h[j] += n;
+    }
+    if ( II->lamp_hist ) FLOOP (j, 0, II->frq_ub+2){
+      if ( fread (&n, sizeof(LONG), 1, cfp[i]) != 1 ) error ("temporary file read error", goto END);
+      II->lamp_hist[j] += n;
+    }
+    if ( II->fp ){
+      rewind (fp[i]);
+      while ( (j = fread (buf, 1, FILE2_BUFSIZ, fp[i])) > 0 ) fwrite (buf, 1, j, II->fp);
+    }
+  }
+  if ( h ){
+    ITEMSET_lamp_merge (II, h, frq);
+    ENMAX (II->frq_lb, lb);
+  }
+
+  END:;
+  FLOOP (i, 0, II->part_num*2) if ( fp[i] ) fclose (fp[i]);
+  mfree (fp, h);
+}
+
 /*************************************************************************/
 /* main of LCM ver. 5 */
 /*************************************************************************/
@@ -435,14 +585,17 @@ int LCM_main (int argc, char *argv[]){
   LCM_read_param (argc, argv, &PP);
 if ( ERROR_MES ) return (1);
   TT->flag |= LOAD_PERM +LOAD_DECSORT +LOAD_RM_DUP;
-  TT->flag2 |= TRSACT_FRQSORT +TRSACT_MAKE_NEW +TRSACT_DELIV_SC +TRSACT_ALLOC_OCC + ((II->flag & ITEMSET_TRSACT_ID)?0: (TRSACT_SHRINK+TRSACT_1ST_SHRINK));
+    // the transactions are not merged if the occurrences are output or counted by the labels
+  TT->flag2 |= TRSACT_FRQSORT +TRSACT_MAKE_NEW +TRSACT_DELIV_SC +TRSACT_ALLOC_OCC + ((II->flag & ITEMSET_TRSACT_ID) || (II->flag2 & ITEMSET_LAMP_POSI)?0: (TRSACT_SHRINK+TRSACT_1ST_SHRINK));
   if ( II->flag&ITEMSET_RULE ) TT->w_lb = -WEIGHTHUGE; else TT->w_lb = II->frq_lb;
   PP.SG.flag =  LOAD_EDGE;
   PROBLEM_load (&PP);
 
   if ( !ERROR_MES && TT->T.clms>0 ){
     LCM_init (&PP);
-    if ( !ERROR_MES ) LCM (&PP, TT->T.clms, &PP.oo, TT->total_w_org, TT->total_pw_org);
+    if ( !ERROR_MES && (II->flag2 & ITEMSET_LAMP_POSI) ) LCM_read_label (&PP);
+    if ( !ERROR_MES && II->part_num > 1 ) LCM_parts (&PP);
+    else if ( !ERROR_MES ) LCM (&PP, TT->T.clms, &PP.oo, TT->total_w_org, TT->total_pw_org);
     ITEMSET_last_output (II);
   }
 
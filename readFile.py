@@ -35,8 +35,26 @@ SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 #    Change readTransactionFile. If file has space the front and the end, remove them.
 # @editor aika, 11, Mar. 2014
 #    Change readFiles for keeping transaction ID.
+#
+# The item-file can be also given in the binary format made by csv2bin.py.
+# The file starts with BINARY_HEADER (magic, #rows, #columns, #nonzeros, size of the name table),
+# followed by the CSR arrays of the items (indptr: #rows+1, indices: #nonzeros, little-endian uint32)
+# and the names of the columns and the rows separated by newlines.
+# The items of the i-th row are indices[indptr[i]:indptr[i+1]], which are the column IDs from 1.
+#
+# The sparse item-files are also read without the dense 0/1 matrix.
+# *.sparse: each line is a gene name followed by the names of its items (separated by the delimiter).
+#           The lines starting with "#" are ignored.
+# *.gmt: the gene sets of GSEA. The items are made in the same way as gsea4csv.py.
 
-import sys, transaction, csv
+import sys, transaction, csv, struct, mmap
+from array import array
+import functions.functionsSuper as fs
+import gsea4csv
+
+np = fs.np
+BINARY_MAGIC = "LAMPBIN1"
+BINARY_HEADER = struct.Struct( "<8sIIII" )
 
 ##
 # Read transaction and flag file and return transaction matrix.
@@ -59,6 +77,12 @@ def readFiles(transaction_file, value_file, delm):
 # item ID is integer value and begin from 0.
 ##
 def readTransactionFile(transaction_file, delm):
+	if isBinaryItemFile( transaction_file ):
+		return readBinaryTransactionFile( transaction_file )
+	if transaction_file.endswith( ".sparse" ):
+		return readSparseTransactionFile( transaction_file, delm )
+	if transaction_file.endswith( ".gmt" ):
+		return readGmtTransactionFile( transaction_file )
 	transaction_list = []
 	gene2id = {} # dictionary that gene name -> transaction ID
 	columnid2name = [] # list about mapping column id to column name
@@ -108,6 +132,151 @@ def readTransactionFile(transaction_file, delm):
 	return transaction_list, gene2id, columnid2name
 
 
+##
+# Read the item-file in the sparse format and return the same values as readTransactionFile.
+# Each line contains a gene name and its items, and the item IDs are given in order of appearance.
+##
+def readSparseTransactionFile(transaction_file, delm):
+	transaction_list = []
+	gene2id = {} # dictionary that gene name -> transaction ID
+	columnid2name = [] # list about mapping column id to column name
+	item2id = {} # dictionary that item name -> column id
+	line_num = 0
+	try:
+		f = open( transaction_file, 'rU' )
+		for row_list in csv.reader( f, delimiter = delm ):
+			line_num = line_num + 1
+			if ( len( row_list ) == 0 ) or row_list[0].startswith("#"):
+				continue
+			t_name = row_list[0].strip()
+			if t_name in gene2id:
+				sys.stderr.write("Error: %s is contained two or more times in %s.\n" \
+								 % (t_name, transaction_file))
+				sys.exit()
+			t = transaction.Transaction(t_name)
+			gene2id[t_name] = len(transaction_list)
+			for item_name in row_list[1:]:
+				item_name = item_name.strip()
+				if len( item_name ) == 0:
+					continue
+				if not item_name in item2id:
+					columnid2name.append( item_name )
+					item2id[ item_name ] = len( columnid2name )
+				t.addItem( item2id[ item_name ] )
+			transaction_list.append(t)
+		f.close()
+	except IOError as e:
+		sys.stderr.write("Error: %s\n" % e)
+		sys.exit()
+	return transaction_list, gene2id, columnid2name
+
+##
+# Read the GMT file and return the same values as readTransactionFile.
+# The genes and the items are identical to the CSV file made by gsea4csv.py.
+##
+def readGmtTransactionFile(transaction_file):
+	try:
+		all_motif_lst, gene_dict = gsea4csv.readGmtFile( transaction_file )
+	except IOError as e:
+		sys.stderr.write("Error: %s\n" % e)
+		sys.exit()
+	motif2id = {} # dictionary that motif name -> column id
+	for i in range( 0, len( all_motif_lst ) ):
+		motif2id[ all_motif_lst[i] ] = i + 1
+	transaction_list = []
+	gene2id = {} # dictionary that gene name -> transaction ID
+	for gene in gene_dict:
+		t = transaction.Transaction( gene )
+		for motif in gene_dict[ gene ]:
+			t.addItem( motif2id[ motif ] )
+		gene2id[ gene ] = len( transaction_list )
+		transaction_list.append( t )
+	return transaction_list, gene2id, all_motif_lst
+
+##
+# Return True if the item-file is in the binary format.
+##
+def isBinaryItemFile(transaction_file):
+	try:
+		f = open( transaction_file, 'rb' )
+		magic = f.read( len( BINARY_MAGIC ) )
+		f.close()
+	except IOError as e:
+		return False
+	return magic == BINARY_MAGIC
+
+##
+# Read the item-file in the binary format and return the same values as readTransactionFile.
+# The file is memory-mapped, and the transactions are made from the CSR arrays without parsing text.
+##
+def readBinaryTransactionFile(transaction_file):
+	try:
+		f = open( transaction_file, 'rb' )
+		mm = mmap.mmap( f.fileno(), 0, access = mmap.ACCESS_READ )
+		f.close()
+	except (IOError, ValueError) as e:
+		sys.stderr.write("Error: %s\n" % e)
+		sys.exit()
+	magic, row_size, col_size, nnz, name_size = BINARY_HEADER.unpack_from( mm, 0 )
+	offset = BINARY_HEADER.size
+	if mm.size() != offset + 4 * ( row_size + 1 + nnz ) + name_size:
+		sys.stderr.write("Error: %s is broken.\n" % transaction_file)
+		sys.exit()
+	indptr = uint32List( mm, offset, row_size + 1 ); offset = offset + 4 * ( row_size + 1 )
+	indices = uint32List( mm, offset, nnz ); offset = offset + 4 * nnz
+	names = mm[ offset:offset + name_size ].split( "\n" )
+	mm.close()
+	columnid2name = names[:col_size]
+	transaction_list = []
+	gene2id = {} # dictionary that gene name -> transaction ID
+	for i in xrange( 0, row_size ):
+		t_name = names[ col_size + i ]
+		if t_name in gene2id:
+			sys.stderr.write("Error: %s is contained two or more times in %s.\n" \
+							 % (t_name, transaction_file))
+			sys.exit()
+		t = transaction.Transaction( t_name )
+		t.itemset = set( indices[ indptr[i]:indptr[i+1] ] )
+		gene2id[t_name] = i
+		transaction_list.append( t )
+	return transaction_list, gene2id, columnid2name
+
+##
+# Return the list of size uint32 values at the offset of the memory-mapped file.
+##
+def uint32List(mm, offset, size):
+	if np != None:
+		return np.frombuffer( mm, dtype = '<u4', count = size, offset = offset ).tolist()
+	a = array( 'I' )
+	a.fromstring( mm[ offset:offset + 4 * size ] )
+	if sys.byteorder == "big":
+		a.byteswap()
+	return a.tolist()
+
+##
+# Write the transactions in the binary format.
+# transaction_list, columnid2name: the values returned by readTransactionFile.
+##
+def writeBinaryTransactionFile(transaction_list, columnid2name, output_file):
+	indptr = array( 'I', [0] ); indices = array( 'I' )
+	for t in transaction_list:
+		indices.extend( sorted( t.itemset ) )
+		indptr.append( len( indices ) )
+	names = "\n".join( list( columnid2name ) + [ t.name for t in transaction_list ] )
+	if sys.byteorder == "big":
+		indptr.byteswap(); indices.byteswap()
+	try:
+		fw = open( output_file, 'wb' )
+		fw.write( BINARY_HEADER.pack( BINARY_MAGIC, len( transaction_list ), len( columnid2name ), \
+									  len( indices ), len( names ) ) )
+		indptr.tofile( fw )
+		indices.tofile( fw )
+		fw.write( names )
+		fw.close()
+	except IOError as e:
+		sys.stderr.write("Error: %s\n" % e)
+		sys.exit()
+
 ##
 # Read flag file and add information about flags to transaction list.
 # value_file: Read flag file.
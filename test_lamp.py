@@ -31,12 +31,24 @@ SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 __author__ = "Aika Terada"
 
-import unittest, sys, datetime
-import lamp
+import unittest, sys, os, shutil, datetime, itertools, struct, io, random, subprocess
+import lamp, fastwy
+import functions.functions4fisher as functions4fisher
+import functions.pvalTable as pvalTable
+import functions.functions4chi as functions4chi
+import functions.functions4u_test as functions4u_test
+import frepattern.patternCache as patternCache
+import frepattern.lcmBinary as lcmBinary
+import frepattern.patternStore as patternStore
+import readFile, transaction
 
 D = datetime.datetime.today()
 RESULT_FILE = "lamp_test_" + D.strftime("%Y%m%d") + "_" + D.strftime("%H%M%S") + "_result.txt"
 LOG_FILE = "lamp_test_" + D.strftime("%Y%m%d") + "_" + D.strftime("%H%M%S") + "_log.txt"
+CACHE_DIR = "lamp_test_" + D.strftime("%Y%m%d") + "_" + D.strftime("%H%M%S") + "_cache"
+BINARY_ITEM_FILE = "lamp_test_" + D.strftime("%Y%m%d") + "_" + D.strftime("%H%M%S") + "_item.bin"
+SPARSE_ITEM_FILE = "lamp_test_" + D.strftime("%Y%m%d") + "_" + D.strftime("%H%M%S") + "_item.sparse"
+LCM_ITEM_FILE = "lamp_test_" + D.strftime("%Y%m%d") + "_" + D.strftime("%H%M%S") + "_item.4lcm53"
 
 class TestLamp(unittest.TestCase):
 	def setUp(self):
@@ -53,11 +65,18 @@ class TestLamp(unittest.TestCase):
 		
 		self.sig_level = 0.05
 		
-	def checkResults( self, csv_file, value_file, method, arity_lim, log_file, true_k, true_lam, true_comb_list, alternative ):
+	def checkResults( self, csv_file, value_file, method, arity_lim, log_file, true_k, true_lam, true_comb_list, alternative, \
+					  miner = "lcm", stream = False, compact = False, precompute = False, prefetch = False, \
+					  lambda_search = "linear", prune = False, transport = "file", count_positives = False, \
+					  test_in_lcm = False, lcm_jobs = 1, lcm_output = "text" ):
 		fw = open( RESULT_FILE, 'a+' )
 		sys.stdout = fw
 		enrich_lst, k, lam, columnid2name \
-					= lamp.run( csv_file, value_file, self.sig_level, method, None, arity_lim, log_file, alternative )
+					= lamp.run( csv_file, value_file, self.sig_level, method, None, arity_lim, log_file, alternative, \
+								  miner, stream, compact, precompute, prefetch = prefetch, \
+								  lambda_search = lambda_search, prune = prune, transport = transport, \
+								  count_positives = count_positives, test_in_lcm = test_in_lcm, lcm_jobs = lcm_jobs, \
+								  lcm_output = lcm_output )
 		sys.stdout.write("\n\n")
 		sys.stdout = sys.__stdout__
 		fw.close()
@@ -312,5 +331,697 @@ class TestLamp(unittest.TestCase):
 		self.checkResults( self.csv_file2, self.flag_less_file2, "chi", -1, LOG_FILE, \
 							true_k, true_lam, true_comb_list, -1 )
 
+	def testPythonMiner(self):
+		sys.stderr.write( "\n\n#######################################\n")
+		sys.stderr.write( "  Test LAMP using the in-process miner\n" )
+		sys.stderr.write( "#######################################\n")
+		sys.stderr.write( "--- Fisher's exact test ---\n" )
+		true_k = 5; true_lam = 5; self.sig_level = 0.05
+		true_comb_list = [ tuple( [set(["TF1", "TF2", "TF3"]), 0.00699300699301, 5, 5 ]) ]
+		self.checkResults( self.csv_file, self.flag_file, "fisher", -1, LOG_FILE, \
+							true_k, true_lam, true_comb_list, 1, "python" )
+		true_k = 7; true_lam = 5
+		true_comb_list = [ tuple( [set(["TF1", "TF2"]), 0.00699300699301, 5, 5 ]),
+						   tuple( [set(["TF1", "TF3"]), 0.00699300699301, 5, 5 ]),
+						   tuple( [set(["TF2", "TF3"]), 0.00699300699301, 5, 5 ]) ]
+		self.checkResults( self.csv_file, self.flag_file, "fisher", 2, LOG_FILE, \
+							true_k, true_lam, true_comb_list, 1, "python" )
+
+		sys.stderr.write( "\n--- Chi-square test ---\n" )
+		true_k = 5; true_lam = 4; self.sig_level = 0.5
+		true_comb_list = [ tuple( [set(["TF1", "TF2", "TF3"]), 0.0173711500544, 5, 5 ]),
+						   tuple( [set(["TF2"]), 0.0725020254219, 6, 5 ]),
+						   tuple( [set(["TF3"]), 0.072502025419, 6, 5 ])]
+		self.checkResults( self.csv_file, self.flag_file, "chi", -1, LOG_FILE, \
+							true_k, true_lam, true_comb_list, 0, "python" )
+
+		sys.stderr.write( "\n--- Mann-Whitney U-test ---\n" )
+		true_k = 7; true_lam = 3; self.sig_level = 0.05
+		true_comb_list = [ tuple( [set(["TF1", "TF2"]), 0.00602414187918, 5, 2.510727 ]),
+						   tuple( [set(["TF1", "TF3"]), 0.00602414187918, 5, 2.510727 ]),
+						   tuple( [set(["TF2", "TF3"]), 0.00602414187918, 5, 2.510727 ]) ]
+		self.checkResults( self.csv_file, self.value_file, "u_test", 2, LOG_FILE, \
+						   true_k, true_lam, true_comb_list, 1, "python" )
+
+	def testPythonMinerBands(self):
+		# The in-process miner continues the enumeration for each lower support (and after LCM-LAMP),
+		# and the patterns of each support are the same as lcm53.
+		rand = random.Random( 2 )
+		transaction_list = []
+		for i in range( 0, 200 ):
+			t = transaction.Transaction( str( i ) ); t.setID( i )
+			t.itemset = set( [ j for j in range( 1, 13 ) if rand.random() < 0.4 ] )
+			transaction_list.append( t )
+		outlog = open( os.devnull, 'w' )
+		def minePatterns( miner, max_comb, lamp_args ):
+			fre_pattern = lamp.newFrequentPatterns( miner, "lcm53/lcm", 100, outlog )
+			fre_pattern.makeFile4Lem( transaction_list, LCM_ITEM_FILE )
+			lam = None
+			if lamp_args != None:
+				lam = fre_pattern.runLCMLAMP( LCM_ITEM_FILE, max_comb, lamp_args[0], 0.05, lamp_args[1] )
+			patterns = {}
+			for low_sup in [ 60, 30, 10 ]:
+				fre_pattern.frequentPatterns( LCM_ITEM_FILE, low_sup, max_comb )
+			for support in range( 100, 9, -1 ):
+				patterns[ support ] = sorted( [ ( sorted( i ), sorted( t ) ) for i, t in fre_pattern.getFrequentList( support ) ] )
+			return lam, patterns
+		for max_comb in [ -1, 2 ]:
+			for lamp_args in [ None, (100, 3), (80, 1) ]:
+				if ( max_comb >= 0 ) and ( lamp_args != None ) and ( lamp_args[1] != 3 ):
+					continue # lcm53 counts the itemsets larger than -u except in U-test
+				self.assertEqual( minePatterns( "python", max_comb, lamp_args ), \
+								  minePatterns( "lcm", max_comb, lamp_args ) )
+		outlog.close()
+		shutil.rmtree( LCM_ITEM_FILE + ".results.lcm", True )
+		os.remove( LCM_ITEM_FILE )
+
+	def testPrefetch(self):
+		sys.stderr.write( "\n\n#######################################\n")
+		sys.stderr.write( "  Test LAMP with the prefetch of the combinations\n" )
+		sys.stderr.write( "#######################################\n")
+		for miner in [ "lcm", "python" ]:
+			sys.stderr.write( "--- %s, Mann-Whitney U-test ---\n" % miner )
+			true_k = 5; true_lam = 3
+			true_comb_list = [ tuple( [set(["TF1", "TF2", "TF3"]), 0.00602414187918, 5, 2.510727 ]) ]
+			self.checkResults( self.csv_file, self.value_file, "u_test", -1, LOG_FILE, \
+								true_k, true_lam, true_comb_list, 1, miner, prefetch = True )
+			true_k = 7; true_lam = 3
+			true_comb_list = [ tuple( [set(["TF1", "TF2"]), 0.00602414187918, 5, 2.510727 ]),
+							   tuple( [set(["TF1", "TF3"]), 0.00602414187918, 5, 2.510727 ]),
+							   tuple( [set(["TF2", "TF3"]), 0.00602414187918, 5, 2.510727 ]) ]
+			self.checkResults( self.csv_file, self.value_file, "u_test", 2, LOG_FILE, \
+								true_k, true_lam, true_comb_list, 1, miner, prefetch = True )
+
+	def testBisectLambda(self):
+		sys.stderr.write( "\n\n#######################################\n")
+		sys.stderr.write( "  Test LAMP with the binary search of lambda\n" )
+		sys.stderr.write( "#######################################\n")
+		true_k = 5; true_lam = 3
+		true_comb_list = [ tuple( [set(["TF1", "TF2", "TF3"]), 0.00602414187918, 5, 2.510727 ]) ]
+		for prefetch in [ False, True ]:
+			self.checkResults( self.csv_file, self.value_file, "u_test", -1, LOG_FILE, \
+								true_k, true_lam, true_comb_list, 1, prefetch = prefetch, lambda_search = "bisect" )
+		# the results of the linear search and the binary search are identical
+		for sig_level in [ 0.01, 0.1, 0.5 ]:
+			self.sig_level = sig_level
+			for alternative in [ 1, 0, -1 ]:
+				results = []
+				for lambda_search in lamp.LAMBDA_SEARCHES:
+					fw = open( RESULT_FILE, 'a+' )
+					sys.stdout = fw
+					enrich_lst, k, lam, columnid2name \
+								= lamp.run( self.csv_file, self.value_file, sig_level, "u_test", None, 2, LOG_FILE, \
+											alternative, lambda_search = lambda_search )
+					sys.stdout = sys.__stdout__
+					fw.close()
+					results.append( ( k, lam, sorted( [ ( sorted( l[0] ), l[1] ) for l in enrich_lst ] ) ) )
+				for result in results[1:]:
+					self.assertEqual( results[0], result )
+		# the probes below lambda* are stopped at bottom, and the patterns below lambda* are not stored
+		rand = random.Random( 1 )
+		transaction_list = []
+		for i in range( 0, 200 ):
+			t = transaction.Transaction( str( i ) ); t.setID( i )
+			t.itemset = set( [ j for j in range( 1, 21 ) if rand.random() < 0.4 ] )
+			t.setValue( rand.random() + 0.1 * len( t.itemset ) )
+			transaction_list.append( t )
+		func_f = functions4u_test.FunctionOfX( transaction_list, 1, False )
+		max_lambda = lamp.maxLambda( transaction_list )
+		outlog = open( os.devnull, 'w' )
+		for miner in [ "lcm", "python" ]:
+			lam_stars = []; probes = []
+			for search in [ "linear", "bisect" ]:
+				fre_pattern = lamp.newFrequentPatterns( miner, "lcm53/lcm", max_lambda, outlog )
+				fre_pattern.makeFile4Lem( transaction_list, LCM_ITEM_FILE )
+				up_to = fre_pattern.frequentPatternsUpTo
+				def frequentPatternsUpTo( input_file, low_sup, arity_limit, limit ):
+					m_lambda = up_to( input_file, low_sup, arity_limit, limit )
+					probes.append( ( low_sup, limit, m_lambda ) )
+					return m_lambda
+				fre_pattern.frequentPatternsUpTo = frequentPatternsUpTo
+				fre_pattern, lam_star = lamp.breadthFirst( LCM_ITEM_FILE, fre_pattern, func_f, -1, 0.05, max_lambda, \
+														   outlog, search )
+				lam_stars.append( lam_star )
+			self.assertEqual( lam_stars[0], lam_stars[1] )
+			self.assertTrue( fre_pattern.constructed_index <= fre_pattern.getIndex( lam_star ) )
+			self.assertTrue( min( [ p[0] for p in probes ] ) < lam_star )
+			for low_sup, limit, m_lambda in probes:
+				if low_sup < lam_star:
+					self.assertEqual( m_lambda, limit )
+		outlog.close()
+		shutil.rmtree( LCM_ITEM_FILE + ".results.lcm", True )
+		os.remove( LCM_ITEM_FILE )
+
+	def testDepthLambda(self):
+		sys.stderr.write( "\n\n#######################################\n")
+		sys.stderr.write( "  Test LAMP with the depth first search of lambda for U-test\n" )
+		sys.stderr.write( "#######################################\n")
+		for miner in [ "lcm", "python" ]:
+			sys.stderr.write( "--- %s ---\n" % miner )
+			true_k = 5; true_lam = 3; self.sig_level = 0.05
+			true_comb_list = [ tuple( [set(["TF1", "TF2", "TF3"]), 0.00602414187918, 5, 2.510727 ]) ]
+			self.checkResults( self.csv_file, self.value_file, "u_test", -1, LOG_FILE, \
+							   true_k, true_lam, true_comb_list, 1, miner, lambda_search = "depth" )
+			true_k = 7; true_lam = 3
+			true_comb_list = [ tuple( [set(["TF1", "TF2"]), 0.00602414187918, 5, 2.510727 ]),
+							   tuple( [set(["TF1", "TF3"]), 0.00602414187918, 5, 2.510727 ]),
+							   tuple( [set(["TF2", "TF3"]), 0.00602414187918, 5, 2.510727 ]) ]
+			self.checkResults( self.csv_file, self.value_file, "u_test", 2, LOG_FILE, \
+							   true_k, true_lam, true_comb_list, 1, miner, True, lambda_search = "depth" )
+			# LCM-LAMP is run instead of the breadth first search
+			fr = open( LOG_FILE, 'r' ); log = fr.read(); fr.close()
+			self.assertFalse( "--- lambda: " in log )
+		# the MASL of LCM-LAMP is not consistent with the exact P-values
+		self.assertRaises( SystemExit, lamp.run, self.csv_file, self.value_file, self.sig_level, "u_test", None, -1, \
+						   LOG_FILE, 1, exact = True, lambda_search = "depth" )
+
+	def testPrune(self):
+		sys.stderr.write( "\n\n#######################################\n")
+		sys.stderr.write( "  Test LAMP with skipping the untestable supports\n" )
+		sys.stderr.write( "#######################################\n")
+		for stream in [ False, True ]:
+			sys.stderr.write( "--- Fisher's exact test, stream = %s ---\n" % stream )
+			true_k = 5; true_lam = 3; self.sig_level = 0.5
+			true_comb_list = [ tuple( [set(["TF1", "TF2", "TF3"]), 0.00699300699301, 5, 5 ]),
+							   tuple( [set(["TF2"]), 0.034965034965, 6, 5 ]),
+							   tuple( [set(["TF3"]), 0.034965034965, 6, 5 ])]
+			self.checkResults( self.csv_file, self.flag_file, "fisher", -1, LOG_FILE, \
+							   true_k, true_lam, true_comb_list, 1, "lcm", stream, prune = True )
+
+			sys.stderr.write( "\n--- Mann-Whitney U-test, stream = %s ---\n" % stream )
+			true_k = 7; true_lam = 3; self.sig_level = 0.05
+			true_comb_list = [ tuple( [set(["TF1", "TF2"]), 0.00602414187918, 5, 2.510727 ]),
+							   tuple( [set(["TF1", "TF3"]), 0.00602414187918, 5, 2.510727 ]),
+							   tuple( [set(["TF2", "TF3"]), 0.00602414187918, 5, 2.510727 ]) ]
+			self.checkResults( self.csv_file, self.value_file, "u_test", 2, LOG_FILE, \
+							   true_k, true_lam, true_comb_list, 1, "lcm", stream, prune = True )
+			fr = open( LOG_FILE, 'r' ); log = fr.read(); fr.close()
+			self.assertTrue( "# of skipped tests: " in log )
+		# In the stream mode, skip is called once for each support, not for each pattern.
+		rand = random.Random( 3 )
+		transaction_list = []
+		for i in range( 0, 100 ):
+			t = transaction.Transaction( str( i ) ); t.setID( i )
+			t.itemset = set( [ j for j in range( 1, 11 ) if rand.random() < 0.4 ] )
+			transaction_list.append( t )
+		outlog = open( os.devnull, 'w' )
+		for miner in [ "lcm", "python" ]:
+			fre_pattern = lamp.newFrequentPatterns( miner, "lcm53/lcm", 50, outlog, True )
+			fre_pattern.makeFile4Lem( transaction_list, LCM_ITEM_FILE )
+			fre_pattern.frequentPatterns( LCM_ITEM_FILE, 5, -1 )
+			calls = []
+			def skip( support ):
+				calls.append( support )
+				return support % 2 == 0
+			supports = []
+			for item_trans_list, batch in fre_pattern.iterBatches( 5, skip = skip ):
+				supports.extend( [ len( t ) for t in batch ] )
+			self.assertEqual( sorted( calls ), range( 5, 50 ) )
+			self.assertTrue( len( supports ) > len( calls ) )
+			self.assertEqual( [ s for s in supports if ( s < 50 ) and ( s % 2 == 0 ) ], [] )
+		outlog.close()
+		shutil.rmtree( LCM_ITEM_FILE + ".results.lcm", True )
+		os.remove( LCM_ITEM_FILE )
+
+	def testPipeTransport(self):
+		sys.stderr.write( "\n\n#######################################\n")
+		sys.stderr.write( "  Test LAMP with the pipe transport of LCM\n" )
+		sys.stderr.write( "#######################################\n")
+		out_dir = self.csv_file + ".4lcm53.results.lcm"
+		shutil.rmtree( out_dir, True )
+		for stream in [ False, True ]:
+			sys.stderr.write( "--- Fisher's exact test, stream = %s ---\n" % stream )
+			true_k = 5; true_lam = 3; self.sig_level = 0.5
+			true_comb_list = [ tuple( [set(["TF1", "TF2", "TF3"]), 0.00699300699301, 5, 5 ]),
+							   tuple( [set(["TF2"]), 0.034965034965, 6, 5 ]),
+							   tuple( [set(["TF3"]), 0.034965034965, 6, 5 ])]
+			self.checkResults( self.csv_file, self.flag_file, "fisher", -1, LOG_FILE, \
+							   true_k, true_lam, true_comb_list, 1, "lcm", stream, transport = "pipe" )
+
+			sys.stderr.write( "\n--- Mann-Whitney U-test, stream = %s ---\n" % stream )
+			true_k = 7; true_lam = 3; self.sig_level = 0.05
+			true_comb_list = [ tuple( [set(["TF1", "TF2"]), 0.00602414187918, 5, 2.510727 ]),
+							   tuple( [set(["TF1", "TF3"]), 0.00602414187918, 5, 2.510727 ]),
+							   tuple( [set(["TF2", "TF3"]), 0.00602414187918, 5, 2.510727 ]) ]
+			self.checkResults( self.csv_file, self.value_file, "u_test", 2, LOG_FILE, \
+							   true_k, true_lam, true_comb_list, 1, "lcm", stream, transport = "pipe" )
+		# the results of LCM are not written to the files
+		self.assertFalse( os.path.exists( out_dir ) )
+
+	def testPatternCache(self):
+		sys.stderr.write( "\n\n#######################################\n")
+		sys.stderr.write( "  Test LAMP with the cache of the combinations\n" )
+		sys.stderr.write( "#######################################\n")
+		cache = patternCache.PatternCache( CACHE_DIR )
+		for stream, compact in [ (False, False), (False, True), (True, False) ]:
+			for sig_level in [ 0.05, 0.5 ]:
+				results = []
+				for use_cache in [ False, True, True ]:
+					fw = open( RESULT_FILE, 'a+' )
+					sys.stdout = fw
+					enrich_lst, k, lam, columnid2name \
+								= lamp.run( self.csv_file, self.value_file, sig_level, "u_test", None, 2, LOG_FILE, \
+											1, stream = stream, compact = compact, cache = ( cache if use_cache else None ) )
+					sys.stdout = sys.__stdout__
+					fw.close()
+					results.append( ( k, lam, sorted( [ ( sorted( l[0] ), l[1] ) for l in enrich_lst ] ) ) )
+				# the combinations are loaded from the cache in the last run
+				fr = open( LOG_FILE, 'r' ); log = fr.read(); fr.close()
+				self.assertTrue( "load the patterns from the cache" in log )
+				self.assertEqual( results[0], results[1] )
+				self.assertEqual( results[0], results[2] )
+		self.assertTrue( len( cache.entries() ) > 0 )
+		# the entry written with the other width of the counts is not used
+		filename, matrix_hash, arity, min_sup, kind = cache.entries()[0]
+		path = os.path.join( CACHE_DIR, filename )
+		fr = open( path, 'rb' ); data = fr.read(); fr.close()
+		self.assertTrue( cache.load( matrix_hash, arity, min_sup, kind == "pat" ) != None )
+		header = list( patternCache.HEADER.unpack( data[ :patternCache.HEADER.size ] ) )
+		header[2] = 4
+		fw = open( path, 'wb' ); fw.write( patternCache.HEADER.pack( *header ) + data[ patternCache.HEADER.size: ] ); fw.close()
+		self.assertEqual( cache.load( matrix_hash, arity, min_sup, kind == "pat" ), None )
+		# the entries are removed when they exceed the disk budget
+		cache.max_size = 0
+		cache.evict()
+		self.assertEqual( len( cache.entries() ), 0 )
+		shutil.rmtree( CACHE_DIR )
+
+	def testBinaryItemFile(self):
+		sys.stderr.write( "\n\n#######################################\n")
+		sys.stderr.write( "  Test LAMP with the item-file in the binary format\n" )
+		sys.stderr.write( "#######################################\n")
+		transaction_list, gene2id, columnid2name = readFile.readTransactionFile( self.csv_file, ',' )
+		readFile.writeBinaryTransactionFile( transaction_list, columnid2name, BINARY_ITEM_FILE )
+		self.assertTrue( readFile.isBinaryItemFile( BINARY_ITEM_FILE ) )
+		self.assertFalse( readFile.isBinaryItemFile( self.csv_file ) )
+		bin_list, bin_gene2id, bin_columnid2name = readFile.readTransactionFile( BINARY_ITEM_FILE, ',' )
+		self.assertEqual( bin_columnid2name, columnid2name )
+		self.assertEqual( bin_gene2id, gene2id )
+		for t, bin_t in zip( transaction_list, bin_list ):
+			self.assertEqual( bin_t.name, t.name )
+			self.assertEqual( bin_t.itemset, t.itemset )
+
+		true_k = 5; true_lam = 3; self.sig_level = 0.5
+		true_comb_list = [ tuple( [set(["TF1", "TF2", "TF3"]), 0.00699300699301, 5, 5 ]),
+						   tuple( [set(["TF2"]), 0.034965034965, 6, 5 ]),
+						   tuple( [set(["TF3"]), 0.034965034965, 6, 5 ])]
+		self.checkResults( BINARY_ITEM_FILE, self.flag_file, "fisher", -1, LOG_FILE, \
+						   true_k, true_lam, true_comb_list, 1 )
+		os.remove( BINARY_ITEM_FILE )
+		os.remove( BINARY_ITEM_FILE + ".4lcm53" )
+		shutil.rmtree( BINARY_ITEM_FILE + ".4lcm53.results.lcm", True )
+
+	def testSparseItemFile(self):
+		sys.stderr.write( "\n\n#######################################\n")
+		sys.stderr.write( "  Test LAMP with the item-file in the sparse format\n" )
+		sys.stderr.write( "#######################################\n")
+		transaction_list, gene2id, columnid2name = readFile.readTransactionFile( self.csv_file, ',' )
+		fw = open( SPARSE_ITEM_FILE, 'w' )
+		fw.write( "#gene,items\n" )
+		for t in transaction_list:
+			fw.write( ",".join( [ t.name ] + [ columnid2name[i-1] for i in sorted( t.itemset ) ] ) + "\n" )
+		fw.close()
+		sparse_list, sparse_gene2id, sparse_columnid2name = readFile.readTransactionFile( SPARSE_ITEM_FILE, ',' )
+		self.assertEqual( sparse_gene2id, gene2id )
+		for t, sparse_t in zip( transaction_list, sparse_list ):
+			self.assertEqual( set( [ sparse_columnid2name[i-1] for i in sparse_t.itemset ] ), \
+							  set( [ columnid2name[i-1] for i in t.itemset ] ) )
+
+		true_k = 5; true_lam = 3; self.sig_level = 0.5
+		true_comb_list = [ tuple( [set(["TF1", "TF2", "TF3"]), 0.00699300699301, 5, 5 ]),
+						   tuple( [set(["TF2"]), 0.034965034965, 6, 5 ]),
+						   tuple( [set(["TF3"]), 0.034965034965, 6, 5 ])]
+		self.checkResults( SPARSE_ITEM_FILE, self.flag_file, "fisher", -1, LOG_FILE, \
+						   true_k, true_lam, true_comb_list, 1 )
+		os.remove( SPARSE_ITEM_FILE )
+		os.remove( SPARSE_ITEM_FILE + ".4lcm53" )
+		shutil.rmtree( SPARSE_ITEM_FILE + ".4lcm53.results.lcm", True )
+
+	def testStream(self):
+		sys.stderr.write( "\n\n#######################################\n")
+		sys.stderr.write( "  Test LAMP in the stream mode\n" )
+		sys.stderr.write( "#######################################\n")
+		for miner in [ "lcm", "python" ]:
+			sys.stderr.write( "--- %s, Fisher's exact test ---\n" % miner )
+			true_k = 5; true_lam = 3; self.sig_level = 0.5
+			true_comb_list = [ tuple( [set(["TF1", "TF2", "TF3"]), 0.00699300699301, 5, 5 ]),
+							   tuple( [set(["TF2"]), 0.034965034965, 6, 5 ]),
+							   tuple( [set(["TF3"]), 0.034965034965, 6, 5 ])]
+			self.checkResults( self.csv_file, self.flag_file, "fisher", -1, LOG_FILE, \
+								true_k, true_lam, true_comb_list, 1, miner, True )
+
+			sys.stderr.write( "\n--- %s, Mann-Whitney U-test ---\n" % miner )
+			true_k = 7; true_lam = 3; self.sig_level = 0.05
+			true_comb_list = [ tuple( [set(["TF1", "TF2"]), 0.00602414187918, 5, 2.510727 ]),
+							   tuple( [set(["TF1", "TF3"]), 0.00602414187918, 5, 2.510727 ]),
+							   tuple( [set(["TF2", "TF3"]), 0.00602414187918, 5, 2.510727 ]) ]
+			self.checkResults( self.csv_file, self.value_file, "u_test", 2, LOG_FILE, \
+							   true_k, true_lam, true_comb_list, 1, miner, True )
+
+			# the patterns at lambda are counted from the histogram of LCM-LAMP
+			sys.stderr.write( "\n--- %s, Chi-square test, arity limit = 2 ---\n" % miner )
+			true_k = 7; true_lam = 5; self.sig_level = 0.1
+			true_comb_list = [ tuple( [set(["TF1", "TF2"]), 0.0086855750272, 5, 5 ]),
+							   tuple( [set(["TF1", "TF3"]), 0.0086855750272, 5, 5 ]),
+							   tuple( [set(["TF2", "TF3"]), 0.0086855750272, 5, 5 ]) ]
+			self.checkResults( self.csv_file, self.flag_file, "chi", 2, LOG_FILE, \
+							   true_k, true_lam, true_comb_list, 1, miner, True )
+			fr = open( LOG_FILE, 'r' ); log = fr.read(); fr.close()
+			self.assertTrue( "from the histogram of LCM-LAMP" in log )
+
+	def testCountPositives(self):
+		sys.stderr.write( "\n\n#######################################\n")
+		sys.stderr.write( "  Test LAMP with the positives counted by LCM\n" )
+		sys.stderr.write( "#######################################\n")
+		for miner, transport in [ ("lcm", "file"), ("lcm", "pipe"), ("python", "file") ]:
+			sys.stderr.write( "--- %s, %s, Fisher's exact test ---\n" % (miner, transport) )
+			true_k = 5; true_lam = 3; self.sig_level = 0.5
+			true_comb_list = [ tuple( [set(["TF1", "TF2", "TF3"]), 0.00699300699301, 5, 5 ]),
+							   tuple( [set(["TF2"]), 0.034965034965, 6, 5 ]),
+							   tuple( [set(["TF3"]), 0.034965034965, 6, 5 ])]
+			self.checkResults( self.csv_file, self.flag_file, "fisher", -1, LOG_FILE, \
+							   true_k, true_lam, true_comb_list, 1, miner, True, \
+							   transport = transport, count_positives = True )
+
+			sys.stderr.write( "\n--- %s, %s, Chi-square test, arity limit = 2 ---\n" % (miner, transport) )
+			true_k = 7; true_lam = 5; self.sig_level = 0.1
+			true_comb_list = [ tuple( [set(["TF1", "TF2"]), 0.0086855750272, 5, 5 ]),
+							   tuple( [set(["TF1", "TF3"]), 0.0086855750272, 5, 5 ]),
+							   tuple( [set(["TF2", "TF3"]), 0.0086855750272, 5, 5 ]) ]
+			self.checkResults( self.csv_file, self.flag_file, "chi", 2, LOG_FILE, \
+							   true_k, true_lam, true_comb_list, 1, miner, True, \
+							   transport = transport, count_positives = True )
+
+	def testTestInLCM(self):
+		sys.stderr.write( "\n\n#######################################\n")
+		sys.stderr.write( "  Test LAMP with the P-values computed in LCM\n" )
+		sys.stderr.write( "#######################################\n")
+		for alternative in [ 1, 0 ]:
+			sys.stderr.write( "--- Fisher's exact test, alternative = %d ---\n" % alternative )
+			true_k = 5; true_lam = 3; self.sig_level = 0.5
+			true_comb_list = [ tuple( [set(["TF1", "TF2", "TF3"]), 0.00699300699301, 5, 5 ]),
+							   tuple( [set(["TF2"]), 0.034965034965, 6, 5 ]),
+							   tuple( [set(["TF3"]), 0.034965034965, 6, 5 ])]
+			if alternative == 0:
+				true_comb_list = [ tuple( [set(["TF1", "TF2", "TF3"]), 0.00699300699301, 5, 5 ]),
+								   tuple( [set(["TF2"]), 0.0405594405594, 6, 5 ]),
+								   tuple( [set(["TF3"]), 0.0405594405594, 6, 5 ])]
+			self.checkResults( self.csv_file, self.flag_file, "fisher", -1, LOG_FILE, \
+							   true_k, true_lam, true_comb_list, alternative, "lcm", True, test_in_lcm = True )
+			fr = open( LOG_FILE, 'r' ); log = fr.read(); fr.close()
+			self.assertTrue( "# of significant combinations found in LCM: " in log )
+
+		sys.stderr.write( "\n--- Chi-square test, arity limit = 2 ---\n" )
+		true_k = 7; true_lam = 5; self.sig_level = 0.1
+		true_comb_list = [ tuple( [set(["TF1", "TF2"]), 0.0086855750272, 5, 5 ]),
+						   tuple( [set(["TF1", "TF3"]), 0.0086855750272, 5, 5 ]),
+						   tuple( [set(["TF2", "TF3"]), 0.0086855750272, 5, 5 ]) ]
+		self.checkResults( self.csv_file, self.flag_file, "chi", 2, LOG_FILE, \
+						   true_k, true_lam, true_comb_list, 1, "lcm", True, test_in_lcm = True )
+
+	def testLCMJobs(self):
+		sys.stderr.write( "\n\n#######################################\n")
+		sys.stderr.write( "  Test LAMP with the enumeration of LCM divided into the processes\n" )
+		sys.stderr.write( "#######################################\n")
+		for stream, transport in [ (False, "file"), (True, "pipe") ]:
+			sys.stderr.write( "--- Fisher's exact test, stream = %s ---\n" % stream )
+			true_k = 5; true_lam = 3; self.sig_level = 0.5
+			true_comb_list = [ tuple( [set(["TF1", "TF2", "TF3"]), 0.00699300699301, 5, 5 ]),
+							   tuple( [set(["TF2"]), 0.034965034965, 6, 5 ]),
+							   tuple( [set(["TF3"]), 0.034965034965, 6, 5 ])]
+			self.checkResults( self.csv_file, self.flag_file, "fisher", -1, LOG_FILE, \
+							   true_k, true_lam, true_comb_list, 1, "lcm", stream, \
+							   transport = transport, lcm_jobs = 3 )
+
+			sys.stderr.write( "\n--- Chi-square test, arity limit = 2, stream = %s ---\n" % stream )
+			true_k = 7; true_lam = 5; self.sig_level = 0.1
+			true_comb_list = [ tuple( [set(["TF1", "TF2"]), 0.0086855750272, 5, 5 ]),
+							   tuple( [set(["TF1", "TF3"]), 0.0086855750272, 5, 5 ]),
+							   tuple( [set(["TF2", "TF3"]), 0.0086855750272, 5, 5 ]) ]
+			self.checkResults( self.csv_file, self.flag_file, "chi", 2, LOG_FILE, \
+							   true_k, true_lam, true_comb_list, 1, "lcm", stream, \
+							   transport = transport, lcm_jobs = 3 )
+
+			sys.stderr.write( "\n--- U-test, the depth first search of lambda, stream = %s ---\n" % stream )
+			true_k = 5; true_lam = 3; self.sig_level = 0.05
+			true_comb_list = [ tuple( [set(["TF1", "TF2", "TF3"]), 0.00602414187918, 5, 2.510727 ]) ]
+			self.checkResults( self.csv_file, self.value_file, "u_test", -1, LOG_FILE, \
+							   true_k, true_lam, true_comb_list, 1, "lcm", stream, lambda_search = "depth", \
+							   transport = transport, lcm_jobs = 3 )
+
+	def testLCMJobsLAMP(self):
+		# LCM-LAMP divided into the processes outputs the same lambda and histogram as the serial run.
+		# The histogram is compared for the supports of frq_lb or more, where it is complete.
+		rand = random.Random( 1 )
+		fw = open( LCM_ITEM_FILE, 'w' )
+		for i in range( 0, 300 ):
+			fw.write( "".join( [ "%d " % j for j in range( 1, 16 ) if rand.random() < 0.3 ] ) + "\n" )
+		fw.close()
+		def runLCMLAMP( args ):
+			out = subprocess.check_output( [ "lcm53/lcm" ] + args + [ LCM_ITEM_FILE, "0.05" ] ).splitlines()
+			frq = [ l for l in out if l.startswith( "frq= " ) ]
+			frq_lb = [ int( l.split()[1] ) for l in out if l.startswith( "frq_lb= " ) ]
+			hist = [ l for l in out if l.startswith( "hist= " ) and ( int( l.split()[1] ) >= frq_lb[0] ) ]
+			return frq, frq_lb, hist
+		for mode in [ [ "C" ], [ "F", "-u", "2" ] ]:
+			for p_mode in [ "1", "2", "3" ]:
+				for hist_opt in [ [], [ "-LAMP_H", "1" ] ]:
+					options = [ "-LAMP", "150", "-LAMP_P", p_mode ] + hist_opt
+					serial = runLCMLAMP( mode + options )
+					self.assertEqual( len( serial[0] ), 1 )
+					for jobs in [ "2", "3", "7" ]:
+						self.assertEqual( runLCMLAMP( mode + [ "-T", jobs ] + options ), serial )
+		os.remove( LCM_ITEM_FILE )
+
+	def testBinaryOutput(self):
+		sys.stderr.write( "\n\n#######################################\n")
+		sys.stderr.write( "  Test LAMP with the binary output of LCM\n" )
+		sys.stderr.write( "#######################################\n")
+		# the records over the chunks are read
+		records = [ tuple( [ [], 4, [0, 1, 2, 3] ] ), tuple( [ [1, 3], 2, [0, 2] ] ), tuple( [ [2], 3, [] ] ) ]
+		data = b"".join( [ struct.pack( "<%di" % ( len( i ) + len( t ) + 3 ), \
+										*( [ len( i ) ] + i + [ s, len( t ) ] + t ) ) for i, s, t in records ] )
+		for chunk_size in [ 3, 8, 1024 ]:
+			self.assertEqual( list( lcmBinary.iterRecords( io.BytesIO( data ), chunk_size ) ), records )
+		for stream, transport, compact in [ (False, "file", False), (False, "file", True), (True, "pipe", False) ]:
+			sys.stderr.write( "--- Fisher's exact test, stream = %s, compact = %s ---\n" % (stream, compact) )
+			true_k = 5; true_lam = 3; self.sig_level = 0.5
+			true_comb_list = [ tuple( [set(["TF1", "TF2", "TF3"]), 0.00699300699301, 5, 5 ]),
+							   tuple( [set(["TF2"]), 0.034965034965, 6, 5 ]),
+							   tuple( [set(["TF3"]), 0.034965034965, 6, 5 ])]
+			self.checkResults( self.csv_file, self.flag_file, "fisher", -1, LOG_FILE, \
+							   true_k, true_lam, true_comb_list, 1, "lcm", stream, compact, \
+							   transport = transport, lcm_output = "binary" )
+
+			sys.stderr.write( "\n--- Mann-Whitney U-test, stream = %s, compact = %s ---\n" % (stream, compact) )
+			true_k = 7; true_lam = 3; self.sig_level = 0.05
+			true_comb_list = [ tuple( [set(["TF1", "TF2"]), 0.00602414187918, 5, 2.510727 ]),
+							   tuple( [set(["TF1", "TF3"]), 0.00602414187918, 5, 2.510727 ]),
+							   tuple( [set(["TF2", "TF3"]), 0.00602414187918, 5, 2.510727 ]) ]
+			self.checkResults( self.csv_file, self.value_file, "u_test", 2, LOG_FILE, \
+							   true_k, true_lam, true_comb_list, 1, "lcm", stream, compact, \
+							   transport = transport, lcm_output = "binary" )
+
+		sys.stderr.write( "\n--- Chi-square test, arity limit = 2, 3 jobs ---\n" )
+		true_k = 7; true_lam = 5; self.sig_level = 0.1
+		true_comb_list = [ tuple( [set(["TF1", "TF2"]), 0.0086855750272, 5, 5 ]),
+						   tuple( [set(["TF1", "TF3"]), 0.0086855750272, 5, 5 ]),
+						   tuple( [set(["TF2", "TF3"]), 0.0086855750272, 5, 5 ]) ]
+		self.checkResults( self.csv_file, self.flag_file, "chi", 2, LOG_FILE, \
+						   true_k, true_lam, true_comb_list, 1, "lcm", False, \
+						   lcm_jobs = 3, lcm_output = "binary" )
+
+	def testCompact(self):
+		sys.stderr.write( "\n\n#######################################\n")
+		sys.stderr.write( "  Test LAMP in the compact mode\n" )
+		sys.stderr.write( "#######################################\n")
+		sys.stderr.write( "--- Chi-square test ---\n" )
+		true_k = 5; true_lam = 3; self.sig_level = 0.5
+		true_comb_list = [ tuple( [set(["TF1", "TF2", "TF3"]), 0.0086855750272, 5, 5 ]),
+						   tuple( [set(["TF2"]), 0.036251012711, 6, 5 ]),
+						   tuple( [set(["TF3"]), 0.036251012711, 6, 5 ])]
+		self.checkResults( self.csv_file, self.flag_file, "chi", -1, LOG_FILE, \
+							true_k, true_lam, true_comb_list, 1, compact = True )
+
+		sys.stderr.write( "\n--- Mann-Whitney U-test ---\n" )
+		true_k = 7; true_lam = 3; self.sig_level = 0.05
+		true_comb_list = [ tuple( [set(["TF1", "TF2"]), 0.00602414187918, 5, 2.510727 ]),
+						   tuple( [set(["TF1", "TF3"]), 0.00602414187918, 5, 2.510727 ]),
+						   tuple( [set(["TF2", "TF3"]), 0.00602414187918, 5, 2.510727 ]) ]
+		self.checkResults( self.csv_file, self.value_file, "u_test", 2, LOG_FILE, \
+						   true_k, true_lam, true_comb_list, 1, "python", compact = True )
+
+		# the patterns are concatenated by the offsets
+		patterns = [ tuple( [ [1, 2], [0, 3, 4] ] ), tuple( [ [3], [] ] ), tuple( [ [2, 4, 5], [1] ] ) ]
+		store = patternStore.PatternStore(); other = patternStore.PatternStore()
+		store.append( patterns[0] )
+		for item_tuple in patterns[1:]:
+			other.append( item_tuple )
+		store.extend( other )
+		self.assertEqual( len( store ), 3 )
+		for i in range( 0, 3 ):
+			self.assertEqual( store.getItemSet( i ).tolist(), patterns[i][0] )
+			self.assertEqual( store.getTransactionSet( i ).tolist(), patterns[i][1] )
+
+	@unittest.skipIf( functions4fisher.np is None, "NumPy is not installed" )
+	def testPrecompute(self):
+		sys.stderr.write( "\n\n#######################################\n")
+		sys.stderr.write( "  Test LAMP using precomputed P-values\n" )
+		sys.stderr.write( "#######################################\n")
+		sys.stderr.write( "--- alternative=\"greater\" ---\n" )
+		true_k = 5; true_lam = 3; self.sig_level = 0.5
+		true_comb_list = [ tuple( [set(["TF1", "TF2", "TF3"]), 0.00699300699301, 5, 5 ]),
+						   tuple( [set(["TF2"]), 0.034965034965, 6, 5 ]),
+						   tuple( [set(["TF3"]), 0.034965034965, 6, 5 ])]
+		self.checkResults( self.csv_file, self.flag_file, "fisher", -1, LOG_FILE, \
+							true_k, true_lam, true_comb_list, 1, precompute = True )
+
+		sys.stderr.write( "\n--- alternative=\"two.sided\" ---\n" )
+		true_comb_list = [ tuple( [set(["TF1", "TF2", "TF3"]), 0.00699300699301, 5, 0 ]),
+						   tuple( [set(["TF2"]), 0.0405594405594, 6, 1 ]),
+						   tuple( [set(["TF3"]), 0.0405594405594, 6, 1 ])]
+		self.checkResults( self.csv_file, self.flag_less_file, "fisher", -1, LOG_FILE, \
+							true_k, true_lam, true_comb_list, 0, precompute = True )
+		true_k = 5; true_lam = 5; self.sig_level = 0.3
+		true_comb_list = [tuple( [set(["TF1", "TF2", "TF3"]), 0.020979020979, 5, 5 ])]
+		self.checkResults( self.csv_file2, self.flag_file2, "fisher", -1, LOG_FILE, \
+							true_k, true_lam, true_comb_list, 0, precompute = True )
+
+		sys.stderr.write( "\n--- tied tables of two.sided ---\n" )
+		for n, n1 in [ (7, 2), (8, 4), (10, 3), (20, 10) ]:
+			transaction_list = []
+			for i in range( 0, n ):
+				t = transaction.Transaction( "g%d" % i )
+				t.value = float( i < n1 )
+				transaction_list.append( t )
+			func_pre = functions4fisher.FunctionOfX( transaction_list, n, 0, True )
+			func_lazy = functions4fisher.FunctionOfX( transaction_list, n, 0, False )
+			for x in range( 0, n ):
+				for a in range( max( 0, x - n + n1 ), min( x, n1 ) + 1 ):
+					self.assertAlmostEqual( func_pre.calPValueFromCount( x, a )[0], \
+											func_lazy.calPValueFromCount( x, a )[0] )
+			# P(a=0) and P(a=1) are tied when n = 7, n1 = 2 and x = 2
+			if ( n, n1 ) == ( 7, 2 ):
+				self.assertAlmostEqual( func_lazy.calPValueFromCount( 2, 1 )[0], 1.0 )
+
+	def testPvalTable(self):
+		tables = [ pvalTable.PvalTable( 3 ) ]
+		if pvalTable.np is not None:
+			tables.append( pvalTable.ArrayPvalTable( 3, 2 ) )
+		for table in tables:
+			self.assertEqual( table.getValue( 1, 1 ), -1 )
+			table.putValue( 1, 1, 0.5 ); table.putValue( 2, 0, 0.25 ); table.putValue( 7, 5, 0.125 )
+			self.assertEqual( table.getValue( 1, 1 ), 0.5 )
+			self.assertEqual( table.getValue( 7, 5 ), 0.125 )
+			self.assertEqual( table.getValue( 9, 9 ), -1 )
+			self.assertEqual( table.hashSize(), 3 )
+		if pvalTable.np is not None:
+			values = tables[1].getValues( [1, 2, 9], [1, 1, 0] )
+			self.assertEqual( values[0], 0.5 )
+			self.assertTrue( pvalTable.np.isnan( values[1] ) and pvalTable.np.isnan( values[2] ) )
+
+	@unittest.skipIf( functions4fisher.np is None, "NumPy is not installed" )
+	def testCalPValues(self):
+		# compare the P-values computed at once with those computed for each pattern.
+		for value_file, method, alternative in [ (self.flag_file, "fisher", 1), (self.flag_file, "fisher", 0),
+												 (self.flag_file, "chi", 1), (self.flag_file, "chi", 0),
+												 (self.value_file, "u_test", 1), (self.value_file, "u_test", 0) ]:
+			transaction_list, columnid2name = readFile.readFiles( self.csv_file, value_file, ',' )
+			if method == "fisher":
+				func = functions4fisher.FunctionOfX( transaction_list, len( transaction_list ), alternative )
+			elif method == "chi":
+				func = functions4chi.FunctionOfX( transaction_list, len( transaction_list ), alternative )
+			else:
+				func = functions4u_test.FunctionOfX( transaction_list, alternative )
+			batch = []
+			for i in range( 1, len( columnid2name ) + 1 ):
+				for j in range( i, len( columnid2name ) + 1 ):
+					occ = [ k for k in range( 0, len( transaction_list ) ) \
+							if ( i in transaction_list[k].itemset ) and ( j in transaction_list[k].itemset ) ]
+					if 0 < len( occ ) < len( transaction_list ):
+						batch.append( occ )
+			p_values, stat_scores = func.calPValues( transaction_list, batch )
+			for i in range( 0, len( batch ) ):
+				if method == "u_test":
+					# z-score from the u-value counted directly
+					n = len( transaction_list ); x = len( batch[i] )
+					values_x = [ transaction_list[k].value for k in batch[i] ]
+					values_y = [ transaction_list[k].value for k in range( 0, n ) if not k in batch[i] ]
+					u_value = 0.0
+					for v in values_x:
+						u_value = u_value + ( len( [y for y in values_y if y < v] ) + len( [y for y in values_y if y <= v] ) ) / 2.0
+					z_value = ( u_value - x*(n - x)/2.0 ) / ( x*(n - x)*(n + 1)/12.0 )**0.5
+					self.assertAlmostEqual( stat_scores[i], z_value )
+				p, stat_score = func.calPValue( transaction_list, batch[i] )
+				self.assertAlmostEqual( p_values[i], p )
+				self.assertAlmostEqual( stat_scores[i], stat_score )
+
+	@unittest.skipIf( functions4fisher.np is None, "NumPy is not installed" )
+	def testUTestExact(self):
+		# compare the exact P-values with those counted over all groups of the same size.
+		transaction_list, columnid2name = readFile.readFiles( self.csv_file, self.value_file, ',' )
+		n = len( transaction_list )
+		ranks = functions4u_test.midRanks( [ t.value for t in transaction_list ] )
+		for alternative in [1, 0]:
+			func = functions4u_test.FunctionOfX( transaction_list, alternative, exact = True )
+			for x in range( 1, 5 ):
+				rank_sums = [ sum( [ ranks[i] for i in c ] ) for c in itertools.combinations( range( 0, n ), x ) ]
+				batch = [ list( c ) for c in itertools.combinations( range( 0, n ), x ) ][::97]
+				p_values, stat_scores = func.calPValues( transaction_list, batch )
+				for i in range( 0, len( batch ) ):
+					r = sum( [ ranks[j] for j in batch[i] ] )
+					upper = len( [ s for s in rank_sums if s >= r ] ) / float( len( rank_sums ) )
+					lower = len( [ s for s in rank_sums if s <= r ] ) / float( len( rank_sums ) )
+					if alternative == 0:
+						upper = min( 2*min( upper, lower ), 1.0 )
+					self.assertAlmostEqual( p_values[i], upper )
+					self.assertAlmostEqual( func.calPValue( transaction_list, batch[i] )[0], upper )
+					self.assertTrue( func.funcF( x ) <= p_values[i] )
+
+	def testContingencyTable(self):
+		transaction_list, columnid2name = readFile.readFiles( self.csv_file, self.flag_file, ',' )
+		func = functions4fisher.FunctionOfX( transaction_list, len( transaction_list ), 1 )
+		n = len( transaction_list ); n1 = func.getN1()
+		labels = bytearray( [ int( t.value ) for t in transaction_list ] )
+		for item in range( 1, len( columnid2name ) + 1 ):
+			occ = [ i for i in range( 0, n ) if item in transaction_list[i].itemset ]
+			occ_bits = 0
+			for i in occ:
+				occ_bits = occ_bits | (1 << i)
+			true_pos = len( [ i for i in occ if transaction_list[i].value == 1 ] )
+			true_table = [ [ true_pos, len( occ ) - true_pos ], [ n1 - true_pos, n - n1 - len( occ ) + true_pos ] ]
+			self.assertEqual( func.contingencyTable( transaction_list, occ, n, n1 ), true_table )
+			self.assertEqual( func.contingencyTable( labels, occ, n, n1 ), true_table )
+			self.assertEqual( func.contingencyTable( transaction_list, occ_bits, n, n1 ), true_table )
+
+	def testFastWYJobs(self):
+		# the results with the worker processes and the compact mode are identical to those of the serial run.
+		results = []
+		for jobs, compact in [ (1, False), (2, False), (1, True) ]:
+			fw = open( RESULT_FILE, 'a+' )
+			sys.stdout = fw
+			enrich_lst, adjusted_threshold, columnid2name \
+						= fastwy.run( self.csv_file, self.flag_file, self.sig_level, 20, "fisher", None, -1, \
+									  LOG_FILE, 1, compact = compact, jobs = jobs, seed = 1 )
+			sys.stdout = sys.__stdout__
+			fw.close()
+			results.append( ( sorted( [ ( sorted( l[0] ), l[1] ) for l in enrich_lst ] ), adjusted_threshold ) )
+		self.assertEqual( results[0], results[1] )
+		self.assertEqual( results[0], results[2] )
+
+	@unittest.skipIf( functions4fisher.np is None, "NumPy is not installed" )
+	def testFastWYBatch(self):
+		# the minimum P-values computed in the matrix form are identical to those of the serial run.
+		results = []
+		for batch in [1, 4]:
+			outlog = open( LOG_FILE, 'w' )
+			transaction_list, columnid2name = readFile.readFiles( self.csv_file, self.flag_file, "," )
+			min_p_list, fre_pattern, func_f \
+						= fastwy.generateMinPDist( transaction_list, self.csv_file + ".4lcm53", self.sig_level, \
+												   "fisher", None, 4, 10, outlog, 1, seed = 1, batch = batch )
+			outlog.close()
+			results.append( [ l[0:3] for l in min_p_list ] )
+		self.assertEqual( results[0], results[1] )
+
 if __name__ == '__main__':
 	unittest.main()